@@ -0,0 +1,132 @@
+import atexit
+import os
+
+import click
+from flask import Flask
+from flask_cors import CORS
+
+from config import obtener_config
+from models import db
+from routes.auth import auth_bp
+from routes.carrito import carrito_bp
+from routes.medios import medios_bp, serve_static
+from routes.metricas import metricas_bp
+from routes.pagos import pagos_bp, procesador_webhooks
+from routes.pedidos import pedidos_bp, buffer_pedidos
+from routes.productos import productos_bp
+from services.concurrencia import verificador_sesiones
+from services.esquema import aplicar_migraciones, crear_esquema, migraciones_disponibles, migraciones_aplicadas
+from services.imagenes import variantes_imagenes
+from services.medios import medios
+from services.metricas import metricas
+from services.respuestas import compresion, configurar_json
+from services.tokens import servicio_tokens
+
+
+def create_app(config=None):
+    """Crea la aplicación Flask.
+
+    `config` es el nombre de una configuración de config.py ('produccion',
+    'desarrollo', 'pruebas') o una instancia; por defecto se usa APP_CONFIG.
+    Crear la aplicación no abre conexiones a la base de datos salvo que la
+    configuración pida CREAR_ESQUEMA.
+    """
+    if config is None or isinstance(config, str):
+        config = obtener_config(config)
+
+    # Los archivos de static/ los sirve services/medios.py (índice, Range, variantes y cache)
+    app = Flask(__name__, static_folder=None)
+    app.config.from_object(config)
+    CORS(app)  # Esto permite las solicitudes CORS desde el frontend
+    # Firma de tokens con SECRET_KEY; sin ella la aplicación no arranca en producción
+    servicio_tokens.init_app(app)
+
+    # Métricas por petición (services/metricas.py). Se registra antes que la compresión
+    # para que su after_request corra al final y mida también ese tiempo.
+    metricas.init_app(app)
+
+    # JSON con orjson si está instalado y compresión gzip/brotli de las respuestas (services/respuestas.py)
+    configurar_json(app)
+    compresion.init_app(app)
+
+    # Base de datos: DB_USER/DB_PASS/DB_HOST/DB_NAME o DATABASE_URL, DB_DRIVER
+    # (mysqlconnector o pymysql), tamaño del pool, reciclado y réplica de lectura opcional.
+    # Ver services/database.py
+    db.init_app(app)
+    # Con hilos (gthread) o greenlets (gevent) cada petición debe usar su propia sesión
+    verificador_sesiones.init_app(app)
+    if app.config['CREAR_ESQUEMA']:
+        with app.app_context():
+            db.create_all()
+
+    app.register_blueprint(productos_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/api/users')
+    app.register_blueprint(pedidos_bp, url_prefix='/api')
+    app.register_blueprint(carrito_bp, url_prefix='/api')
+    app.register_blueprint(pagos_bp, url_prefix='/api')
+    app.register_blueprint(metricas_bp)
+    app.register_blueprint(medios_bp)
+    app.add_url_rule('/static/<path:filename>', endpoint='static', view_func=serve_static)
+    app.cli.add_command(db_cli)
+
+    # Índice de archivos estáticos. Los videos se buscan primero en `backend/static/videos`
+    # y luego en `../src/assets/videos` (útil en desarrollo)
+    medios.montar('static', os.path.join(app.root_path, 'static'))
+    medios.montar('assets/videos', os.path.join(app.root_path, 'static', 'videos'))
+    medios.montar('assets/videos', os.path.join(app.root_path, '..', 'src', 'assets', 'videos'))
+    medios.construir(os.path.join(app.instance_path, 'medios_hashes.json'))
+    variantes_imagenes.cargar(os.path.join(app.root_path, 'static', 'images'))
+
+    if app.config['INICIAR_HILOS'] and not _en_comando_cli():
+        # Hilos que consultan en Mercado Pago los pagos notificados al webhook
+        procesador_webhooks.iniciar(app)
+        # Escritura diferida de pedidos en lotes (ver services/pedidos.py)
+        if app.config['PEDIDOS_BUFFER']:
+            buffer_pedidos.iniciar(app)
+            atexit.register(buffer_pedidos.detener)
+
+    return app
+
+
+def _en_comando_cli():
+    """True si la aplicación se crea para un comando `flask` (db migrar, productos import...).
+
+    Esos comandos no atienden peticiones y no deben iniciar los hilos de fondo:
+    con una base sin migrar consultarían tablas que todavía no existen.
+    `flask run` sí es un servidor.
+    """
+    contexto = click.get_current_context(silent=True)
+    return contexto is not None and contexto.info_name != 'run'
+
+
+# Esquema de la base de datos: flask --app app db crear|migrar|estado (services/esquema.py)
+db_cli = click.Group('db', help='Esquema de la base de datos.')
+
+
+@db_cli.command('crear')
+def crear_esquema_cli():
+    """Base nueva: crea las tablas desde los modelos y marca las migraciones como aplicadas."""
+    marcadas = crear_esquema()
+    click.echo(f'Tablas creadas; {len(marcadas)} migraciones marcadas como aplicadas')
+
+
+@db_cli.command('migrar')
+@click.option('--solo-marcar', is_flag=True, help='Registrar las pendientes sin ejecutarlas (ya aplicadas a mano).')
+def migrar_cli(solo_marcar):
+    """Aplica en orden las migraciones de migrations/ que falten."""
+    try:
+        aplicadas = aplicar_migraciones(solo_marcar=solo_marcar)
+    except Exception as e:
+        db.session.rollback()
+        raise click.ClickException(f'La migración falló: {e}')
+    for nombre in aplicadas:
+        click.echo(f"{'marcada' if solo_marcar else 'aplicada'}: {nombre}")
+    click.echo(f'{len(aplicadas)} migraciones {"marcadas" if solo_marcar else "aplicadas"}')
+
+
+@db_cli.command('estado')
+def estado_cli():
+    """Lista las migraciones y si ya están aplicadas."""
+    aplicadas = migraciones_aplicadas()
+    for nombre in migraciones_disponibles():
+        click.echo(f"{'[x]' if nombre in aplicadas else '[ ]'} {nombre}")
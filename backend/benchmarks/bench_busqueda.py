@@ -0,0 +1,78 @@
+"""Compara la búsqueda ILIKE '%termino%' contra el índice en memoria.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_busqueda --productos 5000 --repeticiones 200
+
+Usa SQLite en memoria, así que no toca la base de datos real. En MySQL la
+diferencia es mayor porque cada ILIKE es además un viaje de red.
+"""
+import argparse
+import random
+import time
+
+from flask import Flask
+
+from models import db, Producto
+from services.busqueda import IndiceMemoria
+
+SABORES = ['limón', 'chocolate', 'fresa', 'vainilla', 'mango', 'nuez', 'café', 'coco', 'piña', 'mora']
+TIPOS = ['pastel', 'cupcakes', 'pay', 'tarta', 'brownie', 'cheesecake', 'galletas']
+TERMINOS = ['lim', 'limon', 'choco', 'pastel fresa', 'cafe', 'piña', 'tarta coco', 'vain']
+
+
+def crear_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def sembrar(n):
+    rnd = random.Random(42)
+    db.session.add_all(
+        Producto(
+            nombre=f'{rnd.choice(TIPOS).capitalize()} de {rnd.choice(SABORES)} {i}',
+            descripcion=f'Hecho con {rnd.choice(SABORES)} y {rnd.choice(SABORES)}',
+            precio=rnd.randint(50, 900),
+        )
+        for i in range(n)
+    )
+    db.session.commit()
+
+
+def medir(nombre, funcion, repeticiones):
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        funcion(TERMINOS[i % len(TERMINOS)])
+    total = time.perf_counter() - inicio
+    print(f'{nombre:<10} {total / repeticiones * 1000:8.3f} ms/consulta')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=5000)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    app = crear_app()
+    with app.app_context():
+        db.create_all()
+        sembrar(args.productos)
+
+        def ilike(termino):
+            return Producto.query.filter(
+                Producto.nombre.ilike(f'%{termino}%') |
+                Producto.descripcion.ilike(f'%{termino}%')
+            ).all()
+
+        indice = IndiceMemoria()
+        inicio = time.perf_counter()
+        indice.reconstruir(p.to_dict() for p in Producto.query.all())
+        print(f'índice construido en {(time.perf_counter() - inicio) * 1000:.1f} ms ({args.productos} productos)')
+
+        medir('ilike', ilike, args.repeticiones)
+        medir('indice', lambda t: indice.buscar(t, limite=20), args.repeticiones)
+
+
+if __name__ == '__main__':
+    main()
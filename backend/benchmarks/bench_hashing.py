@@ -0,0 +1,63 @@
+"""Throughput de login (verificación de contraseña) según algoritmo y costo.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_hashing --logins 40 --concurrencia 8
+
+Cada configuración verifica `--logins` contraseñas desde `--concurrencia`
+hilos a través de ServicioHashing, igual que lo hace la ruta de login.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.hashing import PasswordHasher, ServicioHashing
+
+CONFIGURACIONES = [
+    ('pbkdf2', {'iteraciones': 100_000}),
+    ('pbkdf2', {'iteraciones': 600_000}),
+    ('pbkdf2', {'iteraciones': 1_000_000}),
+    ('scrypt', {'scrypt_n': 2 ** 14}),
+    ('scrypt', {'scrypt_n': 2 ** 15}),
+    ('argon2', {'argon2_tiempo': 2, 'argon2_memoria': 19456}),
+    ('argon2', {'argon2_tiempo': 3, 'argon2_memoria': 65536}),
+]
+
+
+def medir(algoritmo, costo, logins, concurrencia, hilos):
+    servicio = ServicioHashing(algoritmo=algoritmo, hilos=hilos,
+                               max_concurrentes=concurrencia, espera_max=60, **costo)
+    password_hash = servicio.hashear('pastel-de-limon')
+
+    def login(_):
+        inicio = time.perf_counter()
+        assert servicio.verificar(password_hash, 'pastel-de-limon')
+        return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as clientes:
+        latencias = sorted(clientes.map(login, range(logins)))
+    total = time.perf_counter() - inicio
+
+    p95 = latencias[int(len(latencias) * 0.95) - 1]
+    parametros = ','.join(f'{k}={v}' for k, v in costo.items())
+    print(f'{algoritmo:<7} {parametros:<38} {logins / total:8.1f} logins/s  '
+          f'p50 {statistics.median(latencias) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--hilos', type=int, default=2, help='hilos del pool de hashing (HASH_HILOS)')
+    args = parser.parse_args()
+
+    for algoritmo, costo in CONFIGURACIONES:
+        if algoritmo == 'argon2' and PasswordHasher is None:
+            print('argon2  (omitido: argon2-cffi no está instalado)')
+            continue
+        medir(algoritmo, costo, args.logins, args.concurrencia, args.hilos)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""CPU por petición del listado del catálogo: serialización y compresión.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_respuestas --productos 500 --repeticiones 200
+
+Compara objetos ORM + json de la biblioteca estándar (como antes) contra filas
+SQL + orjson, y el costo de comprimir cada respuesta contra reutilizar la
+versión comprimida por ETag. Mide tiempo de CPU del proceso (no de reloj) con
+SQLite en memoria, así que no toca la base de datos real.
+"""
+import argparse
+import gzip
+import random
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+
+from models import db, Producto
+from services.respuestas import Compresion, ProveedorOrjson, brotli, orjson
+
+SABORES = ['limón', 'chocolate', 'fresa', 'vainilla', 'mango', 'nuez', 'café', 'coco', 'piña', 'mora']
+TIPOS = ['pastel', 'cupcakes', 'pay', 'tarta', 'brownie', 'cheesecake', 'galletas']
+
+
+def crear_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def sembrar(n):
+    rnd = random.Random(42)
+    db.session.add_all(
+        Producto(
+            nombre=f'{rnd.choice(TIPOS).capitalize()} de {rnd.choice(SABORES)} {i}',
+            descripcion=f'Hecho con {rnd.choice(SABORES)} y {rnd.choice(SABORES)}, ideal para {rnd.randint(4, 20)} personas',
+            precio=rnd.randint(50, 900),
+            imagen_url=f'{rnd.choice(TIPOS)}_{rnd.choice(SABORES)}.jpg',
+            categoria=rnd.choice(TIPOS),
+        )
+        for i in range(n)
+    )
+    db.session.commit()
+
+
+def medir(nombre, funcion, repeticiones):
+    funcion()  # calentamiento
+    inicio = time.process_time()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    total = time.process_time() - inicio
+    print(f'{nombre:<28} {total / repeticiones * 1000:8.3f} ms CPU/petición')
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=500)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    app = crear_app()
+    estandar = DefaultJSONProvider(app)
+    rapido = ProveedorOrjson(app) if orjson is not None else None
+    with app.app_context():
+        db.create_all()
+        sembrar(args.productos)
+        print(f'{args.productos} productos, orjson: {"sí" if rapido else "no"}, brotli: {"sí" if brotli else "no"}')
+
+        def antes():
+            db.session.expire_all()
+            productos = db.session.scalars(select(Producto)).all()
+            return estandar.dumps([p.to_dict() for p in productos]).encode('utf-8')
+
+        def filas(proveedor):
+            def serializar():
+                resultado = db.session.execute(Producto.consulta_filas())
+                return proveedor.dumps([Producto.fila_a_dict(f) for f in resultado]).encode('utf-8')
+            return serializar
+
+        cuerpo = medir('ORM + json (antes)', antes, args.repeticiones)
+        medir('filas + json', filas(estandar), args.repeticiones)
+        if rapido:
+            medir('filas + orjson (después)', filas(rapido), args.repeticiones)
+
+        print(f'\ntamaño sin comprimir: {len(cuerpo) / 1024:.1f} KB')
+        compresion = Compresion()
+        comprimido = medir('gzip por petición', lambda: gzip.compress(cuerpo, compresslevel=6), args.repeticiones)
+        print(f'{"":<28} {len(comprimido) / 1024:8.1f} KB')
+        if brotli:
+            comprimido = medir('brotli por petición', lambda: compresion._comprimir_bytes(cuerpo, 'br'), args.repeticiones)
+            print(f'{"":<28} {len(comprimido) / 1024:8.1f} KB')
+        # Con ETag fuerte la respuesta comprimida se reutiliza: solo queda el lookup
+        cache = {('etag', 'gzip'): comprimido}
+        medir('gzip reutilizado por ETag', lambda: cache.get(('etag', 'gzip')), args.repeticiones)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import os
+
+from services.database import configuracion_base_datos
+
+# Configuración de la aplicación por entorno (ver aplicacion.create_app).
+# APP_CONFIG elige la clase: produccion (por defecto), desarrollo o pruebas.
+# Los valores se leen del entorno al crear la aplicación, no al importar.
+
+
+class Config:
+    DEBUG = False
+    TESTING = False
+    # db.create_all() al crear la aplicación. En producción el esquema se
+    # maneja con `flask --app app db crear|migrar` durante el despliegue.
+    CREAR_ESQUEMA = False
+    # Hilos de fondo: procesador de webhooks y buffer de pedidos (no con comandos `flask` salvo `run`)
+    INICIAR_HILOS = True
+    # /metrics sin METRICAS_TOKEN: en producción queda deshabilitado (404), porque
+    # expone estadísticas internas de SQL y del pool de conexiones
+    METRICAS_SIN_TOKEN = False
+
+    def __init__(self):
+        self.__dict__.update(configuracion_base_datos())
+        self.CREAR_ESQUEMA = os.getenv('DB_CREAR_ESQUEMA', '1' if self.CREAR_ESQUEMA else '0') == '1'
+
+        # Cache-Control por endpoint para las respuestas del catálogo (ver services/catalogo.py).
+        # "no-cache" obliga al navegador a revalidar con If-None-Match, que responde 304 sin ir a la DB.
+        self.CACHE_CONTROL = {
+            'productos.get_productos': os.getenv('CACHE_CONTROL_PRODUCTOS', 'public, no-cache'),
+            'productos.get_productos_por_categoria': os.getenv('CACHE_CONTROL_PRODUCTOS', 'public, no-cache'),
+            'productos.get_categorias': os.getenv('CACHE_CONTROL_PRODUCTOS', 'public, no-cache'),
+            'productos.get_producto': os.getenv('CACHE_CONTROL_PRODUCTO', 'public, max-age=60'),
+            'productos.buscar_productos': os.getenv('CACHE_CONTROL_BUSQUEDA', 'public, max-age=30'),
+        }
+
+        # MEDIOS_X_SENDFILE=1: el proxy entrega el archivo (X-Sendfile) en lugar del worker
+        self.USE_X_SENDFILE = os.getenv('MEDIOS_X_SENDFILE', '0') == '1'
+        # Escritura diferida de pedidos en lotes (desactivada por defecto, ver services/pedidos.py)
+        self.PEDIDOS_BUFFER = os.getenv('PEDIDOS_BUFFER', '0') == '1'
+        self.METRICAS_TOKEN = os.getenv('METRICAS_TOKEN')
+        # Firma de los tokens de sesión (services/tokens.py); obligatoria salvo en desarrollo y pruebas
+        self.SECRET_KEY = os.getenv('SECRET_KEY')
+        self.TOKEN_ACCESO_TTL = int(os.getenv('TOKEN_ACCESO_TTL', '900'))
+        self.TOKEN_REFRESCO_TTL = int(os.getenv('TOKEN_REFRESCO_TTL', str(30 * 24 * 3600)))
+        # Detectar sesiones de SQLAlchemy usadas desde dos hilos/greenlets (services/concurrencia.py)
+        self.VERIFICAR_SESIONES = os.getenv('DB_VERIFICAR_SESIONES', '1') == '1'
+
+
+class ConfigProduccion(Config):
+    pass
+
+
+class ConfigDesarrollo(Config):
+    DEBUG = True
+    CREAR_ESQUEMA = True
+    METRICAS_SIN_TOKEN = True
+
+
+class ConfigPruebas(Config):
+    TESTING = True
+    CREAR_ESQUEMA = True
+    INICIAR_HILOS = False
+    METRICAS_SIN_TOKEN = True
+
+    def __init__(self):
+        super().__init__()
+        # SQLite en memoria salvo que DATABASE_URL indique otra base de pruebas
+        if not os.getenv('DATABASE_URL'):
+            self.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+            self.SQLALCHEMY_ENGINE_OPTIONS = {}
+            self.__dict__.pop('SQLALCHEMY_BINDS', None)
+
+
+CONFIGURACIONES = {
+    'produccion': ConfigProduccion,
+    'desarrollo': ConfigDesarrollo,
+    'pruebas': ConfigPruebas,
+}
+
+
+def obtener_config(nombre=None):
+    nombre = nombre or os.getenv('APP_CONFIG', 'produccion')
+    try:
+        return CONFIGURACIONES[nombre]()
+    except KeyError:
+        raise ValueError(f'APP_CONFIG desconocida: {nombre} (opciones: {", ".join(CONFIGURACIONES)})')
@@ -0,0 +1,61 @@
+# Configuración de gunicorn: `gunicorn -c gunicorn.conf.py app:app` (Procfile, render.yaml).
+#
+# Casi todas las rutas pasan su tiempo esperando a MySQL (detrás del proxy de
+# Railway) o a Mercado Pago, así que cada worker atiende varias peticiones a la
+# vez en lugar de una:
+# - gthread (por defecto): GUNICORN_HILOS hilos por worker. No requiere nada extra.
+# - gevent: miles de conexiones por worker con greenlets (`pip install gevent`).
+#   Necesita un driver de MySQL cooperativo: services/database.py usa PyMySQL
+#   (Python puro) en lugar de mysql-connector (extensión C, bloquea el loop).
+# - sync: el modo anterior, una petición por worker.
+#
+# WEB_CONCURRENCY (la variable estándar de Render/Heroku) fija el número de
+# workers; por defecto se deriva de los CPUs. Cada worker tiene su propio pool
+# de conexiones, así que el máximo de conexiones a MySQL es
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW): con gthread conviene que el pool
+# alcance para GUNICORN_HILOS; con gevent el pool es el límite real de
+# consultas simultáneas y las demás peticiones esperan su turno (DB_POOL_TIMEOUT).
+import logging
+import multiprocessing
+import os
+
+cpus = multiprocessing.cpu_count()
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gevent':
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        logging.warning('GUNICORN_WORKER_CLASS=gevent pero gevent no está instalado; se usa gthread')
+        worker_class = 'gthread'
+
+if worker_class == 'sync':
+    workers_por_defecto = cpus * 2 + 1
+else:
+    # Con hilos o greenlets la concurrencia la dan los hilos: un worker por CPU (mínimo 2)
+    workers_por_defecto = max(2, cpus)
+
+workers = int(os.getenv('WEB_CONCURRENCY', str(workers_por_defecto)))
+threads = int(os.getenv('GUNICORN_HILOS', '8')) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_CONEXIONES', '1000'))
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '20'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+# Reiniciar cada worker tras N peticiones (con variación) acota fugas de memoria; 0 lo desactiva
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Sin preload: create_app inicia hilos de fondo (webhooks, buffer de pedidos) y
+# el pool de conexiones, que no sobreviven al fork si se crean en el master.
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+
+def on_starting(server):
+    por_worker = {'gthread': f'{threads} hilos', 'gevent': f'{worker_connections} conexiones'}.get(worker_class, '1 petición')
+    server.log.info(f'{workers} workers {worker_class}, {por_worker} por worker')
@@ -0,0 +1,3 @@
+-- Índice FULLTEXT para la búsqueda de productos con BUSQUEDA_BACKEND=mysql
+-- (services/busqueda.py). Solo es necesario si se usa ese backend.
+ALTER TABLE productos ADD FULLTEXT INDEX ft_productos_nombre_descripcion (nombre, descripcion);
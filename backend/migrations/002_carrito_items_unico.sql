@@ -0,0 +1,20 @@
+-- Una fila por (usuario_id, producto_id) en carrito_items, necesario para el
+-- PATCH /api/carrito que aplica los cambios como upserts.
+
+-- 1) Unificar duplicados existentes sumando sus cantidades en la fila más antigua
+UPDATE carrito_items c
+JOIN (
+    SELECT usuario_id, producto_id, MIN(id) AS id, SUM(cantidad) AS cantidad
+    FROM carrito_items
+    GROUP BY usuario_id, producto_id
+    HAVING COUNT(*) > 1
+) d ON d.id = c.id
+SET c.cantidad = d.cantidad;
+
+DELETE c FROM carrito_items c
+JOIN carrito_items o
+  ON o.usuario_id = c.usuario_id AND o.producto_id = c.producto_id AND o.id < c.id;
+
+-- 2) Restricción única (también funciona como índice para filtrar por usuario_id)
+ALTER TABLE carrito_items
+    ADD CONSTRAINT uq_carrito_usuario_producto UNIQUE (usuario_id, producto_id);
@@ -0,0 +1,7 @@
+-- Reutilización de preferencias de Mercado Pago para carritos sin cambios
+-- (routes/pagos.py: crear_preferencia).
+ALTER TABLE preferencias_pago
+    ADD COLUMN huella_carrito VARCHAR(64) NULL,
+    ADD COLUMN expira_en DATETIME NULL;
+
+CREATE INDEX ix_preferencias_usuario_huella ON preferencias_pago (usuario_id, huella_carrito);
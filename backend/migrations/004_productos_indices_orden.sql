@@ -0,0 +1,5 @@
+-- Índices para el listado paginado de /api/productos ordenado por precio o nombre.
+-- InnoDB agrega la llave primaria (id_producto) a cada índice secundario, que es
+-- justo el desempate que usa el cursor.
+CREATE INDEX ix_productos_precio ON productos (precio);
+CREATE INDEX ix_productos_nombre ON productos (nombre);
@@ -0,0 +1,8 @@
+-- Columna de categoría indexada para /api/productos/categoria/<categoria> y /api/categorias.
+ALTER TABLE productos ADD COLUMN categoria VARCHAR(50) NULL;
+CREATE INDEX ix_productos_categoria ON productos (categoria);
+
+-- Clasificación inicial de los productos existentes a partir del nombre
+UPDATE productos SET categoria = 'cupcakes' WHERE categoria IS NULL AND nombre LIKE 'Cupcake%';
+UPDATE productos SET categoria = 'pasteles' WHERE categoria IS NULL AND nombre LIKE 'Pastel%';
+UPDATE productos SET categoria = 'postres'  WHERE categoria IS NULL;
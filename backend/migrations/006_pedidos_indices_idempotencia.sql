@@ -0,0 +1,17 @@
+-- Índices para las consultas diarias de cocina (pedidos por fecha de entrega y por cliente).
+CREATE INDEX ix_pedidos_email ON pedidos (email);
+CREATE INDEX ix_pedidos_fecha_entrega ON pedidos (fecha_entrega);
+
+-- Respuestas guardadas por Idempotency-Key (services/idempotencia.py).
+-- Las filas de más de IDEMPOTENCIA_TTL_HORAS se borran periódicamente desde la aplicación.
+-- IF NOT EXISTS: en bases donde la aplicación ya la creó con db.create_all().
+CREATE TABLE IF NOT EXISTS claves_idempotencia (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    clave VARCHAR(128) NOT NULL,
+    huella_peticion VARCHAR(64) NOT NULL,
+    codigo INT NOT NULL,
+    respuesta TEXT NOT NULL,
+    creado_en DATETIME NOT NULL,
+    CONSTRAINT uq_claves_idempotencia_clave UNIQUE (clave),
+    INDEX ix_claves_idempotencia_creado_en (creado_en)
+);
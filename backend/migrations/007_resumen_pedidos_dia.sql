@@ -0,0 +1,19 @@
+-- Índice compuesto para el GROUP BY (fecha_entrega, producto); reemplaza al de 006.
+DROP INDEX ix_pedidos_fecha_entrega ON pedidos;
+CREATE INDEX ix_pedidos_fecha_entrega_producto ON pedidos (fecha_entrega, producto);
+
+-- Resumen diario de producción, actualizado en cada pedido (services/pedidos.py).
+CREATE TABLE resumen_pedidos_dia (
+    fecha_entrega DATE NOT NULL,
+    producto VARCHAR(100) NOT NULL,
+    pedidos INT NOT NULL DEFAULT 0,
+    cantidad INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha_entrega, producto)
+);
+
+-- Carga inicial con los pedidos existentes (equivale a `flask pedidos reconstruir-resumen`)
+INSERT INTO resumen_pedidos_dia (fecha_entrega, producto, pedidos, cantidad)
+SELECT fecha_entrega, producto, COUNT(*), COALESCE(SUM(cantidad), 0)
+FROM pedidos
+WHERE fecha_entrega IS NOT NULL
+GROUP BY fecha_entrega, producto;
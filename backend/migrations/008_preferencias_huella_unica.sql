@@ -0,0 +1,16 @@
+-- Una sola preferencia por (usuario_id, huella_carrito): dos checkouts simultáneos
+-- del mismo carrito ya no guardan dos preferencias (routes/pagos.py: crear_preferencia).
+-- La aplicación borra las vencidas del usuario antes de insertar, así que la
+-- restricción solo choca con preferencias vigentes.
+
+-- 1) Borrar las vencidas y, de los duplicados que queden, conservar la más reciente
+DELETE FROM preferencias_pago WHERE expira_en < UTC_TIMESTAMP();
+
+DELETE p FROM preferencias_pago p
+JOIN preferencias_pago o
+  ON o.usuario_id = p.usuario_id AND o.huella_carrito = p.huella_carrito AND o.id > p.id;
+
+-- 2) La restricción única reemplaza al índice de 003
+ALTER TABLE preferencias_pago
+    ADD CONSTRAINT uq_preferencias_usuario_huella UNIQUE (usuario_id, huella_carrito);
+DROP INDEX ix_preferencias_usuario_huella ON preferencias_pago;
@@ -0,0 +1,16 @@
+-- Cola de notificaciones de Mercado Pago (services/webhooks.py).
+-- Hasta ahora solo la creaba db.create_all() al arrancar la aplicación; con
+-- IF NOT EXISTS la migración no falla en las bases donde ya existe.
+CREATE TABLE IF NOT EXISTS webhook_pagos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    payment_id VARCHAR(64) NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    estado_pago VARCHAR(30),
+    intentos INT NOT NULL,
+    proximo_intento DATETIME NOT NULL,
+    ultimo_error TEXT,
+    creado_en DATETIME NOT NULL,
+    actualizado_en DATETIME NOT NULL,
+    CONSTRAINT uq_webhook_pagos_payment_id UNIQUE (payment_id),
+    INDEX ix_webhook_pagos_proximo_intento (proximo_intento)
+);
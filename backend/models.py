@@ -1,4 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime, timedelta
+import hashlib
+
+from services.hashing import servicio_hashing
+from services.imagenes import variantes_imagenes
+from services.medios import medios
 
 db = SQLAlchemy()
 
@@ -6,23 +12,76 @@ db = SQLAlchemy()
 class Producto(db.Model):
     __tablename__ = 'productos'
     id_producto = db.Column(db.Integer, primary_key=True)
-    nombre = db.Column(db.String(100), nullable=False)
+    # nombre y precio indexados para ordenar/paginar el catálogo (migrations/004_productos_indices_orden.sql)
+    nombre = db.Column(db.String(100), nullable=False, index=True)
     descripcion = db.Column(db.Text)
-    precio = db.Column(db.Float, nullable=False)
+    precio = db.Column(db.Float, nullable=False, index=True)
     imagen_url = db.Column(db.String(200))
+    # Slug de la categoría ('pasteles', 'cupcakes', ...); ver migrations/005_productos_categoria.sql
+    categoria = db.Column(db.String(50), index=True)
+
+    # Índice de la búsqueda con BUSQUEDA_BACKEND=mysql (migrations/001_productos_fulltext.sql);
+    # solo existe en MySQL, así que `db crear` en otra base no lo crea
+    __table_args__ = (
+        db.Index('ft_productos_nombre_descripcion', 'nombre', 'descripcion',
+                 mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    # Columnas de `consulta_filas()`, en el orden que espera `fila_a_dict()`
+    COLUMNAS_FILA = ('id_producto', 'nombre', 'descripcion', 'precio', 'imagen_url', 'categoria')
 
     def to_dict(self):
+        return Producto.fila_a_dict((self.id_producto, self.nombre, self.descripcion,
+                                     self.precio, self.imagen_url, self.categoria))
+
+    @classmethod
+    def consulta_filas(cls):
+        """SELECT de las columnas de `to_dict()` que devuelve tuplas en lugar de objetos ORM."""
+        return db.select(*(cls.__table__.c[c] for c in cls.COLUMNAS_FILA))
+
+    @staticmethod
+    def fila_a_dict(fila):
+        """Mismo dict que `to_dict()` a partir de una fila de `consulta_filas()`.
+
+        Con filas el catálogo se serializa sin crear objetos ORM.
+        """
+        id_producto, nombre, descripcion, precio, imagen_url, categoria = fila
         return {
-            'id_producto': self.id_producto,
-            'nombre': self.nombre,
-            'descripcion': self.descripcion,
-            'precio': self.precio,
-            'imagen_url': self.imagen_url
+            'id_producto': id_producto,
+            'nombre': nombre,
+            'descripcion': descripcion,
+            'precio': precio,
+            'imagen_url': imagen_url,
+            **Producto.campos_imagen(imagen_url),
+            'categoria': categoria
         }
 
+    @staticmethod
+    def campos_imagen(imagen_url):
+        """`imagen_src` y `srcset` que acompañan a `imagen_url` en las respuestas del catálogo."""
+        return {
+            'imagen_src': _imagen_src(imagen_url),
+            'srcset': variantes_imagenes.srcset(imagen_url),
+        }
+
+
+def _imagen_src(imagen_url):
+    """URL con hash de contenido de la imagen (cacheable como inmutable), si está en static/images."""
+    if not imagen_url or '://' in imagen_url:
+        return None
+    ruta = imagen_url.lstrip('/')
+    if not ruta.startswith('static/'):
+        ruta = 'static/images/' + ruta
+    return medios.url(ruta)
+
 # Modelo para el carrito
 class CarritoItem(db.Model):
     __tablename__ = 'carrito_items'
+    # Una fila por producto en el carrito de cada usuario; el índice también sirve
+    # para los filtros por usuario_id (ver migrations/002_carrito_items_unico.sql)
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'producto_id', name='uq_carrito_usuario_producto'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, nullable=False)
     producto_id = db.Column(db.Integer, nullable=False)
@@ -47,6 +106,14 @@ class PreferenciaPago(db.Model):
     mp_preference_id = db.Column(db.String(150), nullable=False)
     init_point = db.Column(db.Text, nullable=False)
     fecha_creacion = db.Column(db.DateTime, nullable=False, server_default=db.func.current_timestamp())
+    # Huella del contenido del carrito (services/precios.huella_carrito) para reutilizar la preferencia
+    huella_carrito = db.Column(db.String(64))
+    expira_en = db.Column(db.DateTime)
+    # Una preferencia por carrito: las vencidas se borran antes de insertar una nueva
+    # (migrations/008_preferencias_huella_unica.sql)
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'huella_carrito', name='uq_preferencias_usuario_huella'),
+    )
 
     def to_dict(self):
         return {
@@ -54,5 +121,167 @@ class PreferenciaPago(db.Model):
             'usuario_id': self.usuario_id,
             'mp_preference_id': self.mp_preference_id,
             'init_point': self.init_point,
-            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None
-        }
\ No newline at end of file
+            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
+            'expira_en': self.expira_en.isoformat() if self.expira_en else None
+        }
+
+
+# Notificaciones de pago de Mercado Pago pendientes de procesar.
+# El webhook solo inserta aquí y responde; services/webhooks.py consulta el pago en segundo plano.
+class WebhookPago(db.Model):
+    __tablename__ = 'webhook_pagos'
+    # Mismo nombre que en migrations/009_webhook_pagos.sql
+    __table_args__ = (
+        db.UniqueConstraint('payment_id', name='uq_webhook_pagos_payment_id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    payment_id = db.Column(db.String(64), nullable=False)
+    estado = db.Column(db.String(20), nullable=False, default='pendiente')  # pendiente | procesando | completado | fallido
+    estado_pago = db.Column(db.String(30))  # estado reportado por Mercado Pago (approved, pending, ...)
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    proximo_intento = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    ultimo_error = db.Column(db.Text)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'payment_id': self.payment_id,
+            'estado': self.estado,
+            'estado_pago': self.estado_pago,
+            'intentos': self.intentos,
+            'proximo_intento': self.proximo_intento.isoformat() if self.proximo_intento else None,
+            'ultimo_error': self.ultimo_error,
+            'creado_en': self.creado_en.isoformat() if self.creado_en else None
+        }
+
+
+# Respuestas guardadas por Idempotency-Key para que los reintentos de un cliente
+# no dupliquen la operación (services/idempotencia.py)
+class ClaveIdempotencia(db.Model):
+    __tablename__ = 'claves_idempotencia'
+    # Mismo nombre que en migrations/006_pedidos_indices_idempotencia.sql
+    __table_args__ = (
+        db.UniqueConstraint('clave', name='uq_claves_idempotencia_clave'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    clave = db.Column(db.String(128), nullable=False)
+    huella_peticion = db.Column(db.String(64), nullable=False)
+    codigo = db.Column(db.Integer, nullable=False)
+    respuesta = db.Column(db.Text, nullable=False)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+# Total por día de entrega y producto, mantenido al crear cada pedido
+# (services/pedidos.py) para que el reporte de cocina no recorra todos los pedidos
+class ResumenPedidosDia(db.Model):
+    __tablename__ = 'resumen_pedidos_dia'
+    fecha_entrega = db.Column(db.Date, primary_key=True)
+    producto = db.Column(db.String(100), primary_key=True)
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'producto': self.producto,
+            'pedidos': self.pedidos,
+            'cantidad': self.cantidad,
+        }
+
+
+# Modelo de Pedido
+class Pedido(db.Model):
+    __tablename__ = 'pedidos'
+    id = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
+    producto = db.Column(db.String(100), nullable=False)
+    cantidad = db.Column(db.Integer, default=1)
+    fecha_entrega = db.Column(db.Date)
+    nota = db.Column(db.Text)
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Sirve a las consultas por fecha de entrega y al GROUP BY del resumen de producción
+    __table_args__ = (
+        db.Index('ix_pedidos_fecha_entrega_producto', 'fecha_entrega', 'producto'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'email': self.email,
+            'producto': self.producto,
+            'cantidad': self.cantidad,
+            'fecha_entrega': self.fecha_entrega.isoformat() if self.fecha_entrega else None,
+            'nota': self.nota,
+            'creado_en': self.creado_en.isoformat()
+        }
+
+
+# Modelo de Usuario
+class User(db.Model):
+    __tablename__ = 'users'
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(255), unique=True, nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
+    first_name = db.Column(db.String(100))
+    last_name = db.Column(db.String(100))
+    display_name = db.Column(db.String(100))
+    phone = db.Column(db.String(30))
+    avatar_url = db.Column(db.Text)
+    date_of_birth = db.Column(db.Date)
+    email_verified = db.Column(db.Boolean, default=False)
+    email_verification_hash = db.Column(db.String(128))
+    password_reset_hash = db.Column(db.String(128))
+    password_reset_expires = db.Column(db.DateTime)
+    settings = db.Column(db.JSON)
+    role = db.Column(db.String(50), default='user')
+    is_active = db.Column(db.Boolean, default=True)
+    last_login_at = db.Column(db.DateTime)
+    failed_login_attempts = db.Column(db.Integer, default=0)
+    locked_until = db.Column(db.DateTime)
+    deleted_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def set_password(self, password: str):
+        # Algoritmo y costo configurables (HASH_ALGORITMO); se calcula en el pool de services/hashing.py
+        self.password_hash = servicio_hashing.hashear(password)
+
+    def check_password(self, password: str) -> bool:
+        return servicio_hashing.verificar(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return servicio_hashing.necesita_rehash(self.password_hash)
+
+    @staticmethod
+    def make_token_hash(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def set_email_verification_token(self, token_plain: str):
+        self.email_verification_hash = self.make_token_hash(token_plain)
+
+    def check_email_verification_token(self, token_plain: str) -> bool:
+        if not self.email_verification_hash:
+            return False
+        return self.email_verification_hash == self.make_token_hash(token_plain)
+
+    def set_password_reset_token(self, token_plain: str, expires_hours=1):
+        self.password_reset_hash = self.make_token_hash(token_plain)
+        self.password_reset_expires = datetime.utcnow() + timedelta(hours=expires_hours)
+
+    def check_password_reset_token(self, token_plain: str) -> bool:
+        if not self.password_reset_hash or not self.password_reset_expires:
+            return False
+        if datetime.utcnow() > self.password_reset_expires:
+            return False
+        return self.password_reset_hash == self.make_token_hash(token_plain)
+
+
+# Archivos de migrations/ ya aplicados en esta base (`flask --app app db migrar`, services/esquema.py)
+class MigracionAplicada(db.Model):
+    __tablename__ = 'esquema_migraciones'
+    nombre = db.Column(db.String(200), primary_key=True)
+    aplicada_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,205 @@
+from flask import Blueprint, jsonify, request
+from datetime import datetime, timedelta
+import os
+import secrets
+from models import db, User
+from services.cache import cache
+from services.hashing import HashingSaturado
+from services.tokens import servicio_tokens
+
+# Registro, login y tokens de usuarios (/api/users/...)
+auth_bp = Blueprint('auth', __name__)
+
+# Segundos que se reutiliza el estado de la cuenta (activa y rol) al refrescar tokens;
+# desactivar una cuenta tarda como máximo esto en impedir nuevos refresh (0 = consultar siempre)
+AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', '60'))
+
+
+@auth_bp.app_errorhandler(HashingSaturado)
+def hashing_saturado(e):
+    # Demasiados logins calculando hashes a la vez: mejor rechazar que bloquear el worker
+    return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+
+
+@auth_bp.route('/register', methods=['POST'])
+def register_user():
+    data = request.get_json() or {}
+    email = (data.get('email') or '').strip().lower()
+    password = data.get('password')
+    first_name = data.get('first_name')
+
+    if not email or not password:
+        return jsonify({'error': 'email and password required'}), 400
+
+    if User.query.filter_by(email=email).first():
+        return jsonify({'error': 'email already registered'}), 400
+
+    user = User(email=email, first_name=first_name)
+    user.set_password(password)
+
+    # generar token de verificación (en desarrollo podemos devolverlo; en producción se envía por email)
+    token = secrets.token_urlsafe(32)
+    user.set_email_verification_token(token)
+
+    db.session.add(user)
+    db.session.commit()
+
+    # En producción: enviar email con token. Aquí devolvemos el token para pruebas.
+    return jsonify({'message': 'user created', 'verification_token': token}), 201
+
+@auth_bp.route('/verify_email', methods=['GET'])
+def verify_email():
+    token = request.args.get('token')
+    email = (request.args.get('email') or '').strip().lower()
+    if not token or not email:
+        return jsonify({'error': 'token and email required'}), 400
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'error': 'user not found'}), 404
+
+    if user.check_email_verification_token(token):
+        user.email_verified = True
+        user.email_verification_hash = None
+        db.session.commit()
+        return jsonify({'message': 'email verified'}), 200
+
+    return jsonify({'error': 'invalid token'}), 400
+
+@auth_bp.route('/login', methods=['POST'])
+def login():
+    data = request.get_json() or {}
+    email = (data.get('email') or '').strip().lower()
+    password = data.get('password')
+
+    if not email or not password:
+        return jsonify({'error': 'email and password required'}), 400
+
+    user = User.query.filter_by(email=email).first()
+    if not user or not user.check_password(password):
+        return jsonify({'error': 'invalid credentials'}), 401
+
+    if not user.is_active:
+        return jsonify({'error': 'account disabled'}), 401
+
+    if user.locked_until and user.locked_until > datetime.utcnow():
+        return jsonify({'error': 'account locked', 'unlock_at': user.locked_until.isoformat()}), 401
+
+    # Check failed attempts
+    if user.failed_login_attempts >= 5:
+        user.locked_until = datetime.utcnow() + timedelta(minutes=15)
+        db.session.commit()
+        return jsonify({'error': 'too many failed attempts', 'unlock_at': user.locked_until.isoformat()}), 401
+
+    # Success - reset counters and update last login
+    if user.password_needs_rehash():
+        # El hash usa un algoritmo/costo anterior: se actualiza ahora que tenemos la contraseña
+        user.set_password(password)
+    user.failed_login_attempts = 0
+    user.last_login_at = datetime.utcnow()
+    db.session.commit()
+
+    datos_usuario = {
+        'id': user.id,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'role': user.role,
+        'email_verified': user.email_verified
+    }
+    # Los campos del usuario se mantienen en la raíz por compatibilidad con clientes anteriores
+    return jsonify({
+        **datos_usuario,
+        'user': datos_usuario,
+        **servicio_tokens.emitir(user.id, user.role)
+    }), 200
+
+
+@auth_bp.route('/refresh', methods=['POST'])
+def refresh_token():
+    data = request.get_json() or {}
+    usuario_id = servicio_tokens.verificar_refresco(data.get('refresh_token') or '')
+    if usuario_id is None:
+        return jsonify({'error': 'invalid or expired refresh token'}), 401
+
+    # Única consulta del flujo de tokens: confirmar que la cuenta sigue activa y leer su rol actual.
+    # Se guarda en el cache compartido, así que refrescos simultáneos (varias pestañas) hacen una sola
+    def cargar_cuenta():
+        user = db.session.get(User, usuario_id)
+        activa = bool(user and user.is_active and not user.deleted_at)
+        return {'activa': activa, 'rol': user.role if user else None}
+
+    cuenta = cache.obtener(f'cuenta:{usuario_id}', cargar_cuenta, ttl=AUTH_CACHE_TTL)
+    if not cuenta['activa']:
+        return jsonify({'error': 'account disabled'}), 401
+
+    return jsonify(servicio_tokens.emitir(usuario_id, cuenta['rol'])), 200
+
+@auth_bp.route('/reset-password', methods=['POST'])
+def request_password_reset():
+    data = request.get_json() or {}
+    email = (data.get('email') or '').strip().lower()
+
+    if not email:
+        return jsonify({'error': 'email required'}), 400
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        # Don't reveal if user exists
+        return jsonify({'message': 'if account exists, reset instructions sent'}), 200
+
+    # Generate reset token
+    token = secrets.token_urlsafe(32)
+    user.set_password_reset_token(token)
+    db.session.commit()
+
+    # TODO: Send email with reset link
+    # For development, return token
+    return jsonify({
+        'message': 'reset token generated',
+        'token': token  # Remove in production
+    }), 200
+
+
+@auth_bp.route('/reset-password', methods=['PUT'])
+def complete_password_reset():
+    data = request.get_json() or {}
+    token = data.get('token')
+    password = data.get('password')
+    email = (data.get('email') or '').strip().lower()
+
+    if not token or not password or not email:
+        return jsonify({'error': 'token, password, and email required'}), 400
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'error': 'user not found'}), 404
+
+    # Validate token
+    if not user.check_password_reset_token(token):
+        return jsonify({'error': 'invalid or expired token'}), 400
+
+    # Update password
+    user.set_password(password)
+    user.password_reset_hash = None
+    user.password_reset_expires = None
+    db.session.commit()
+
+    return jsonify({'message': 'password reset successfully'}), 200
+
+
+@auth_bp.route('/verify', methods=['GET'])
+def verify_user():
+    token = request.args.get('token')
+    email = (request.args.get('email') or '').strip().lower()
+    if not token or not email:
+        return jsonify({'error': 'invalid'}), 400
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'error': 'user not found'}), 404
+    if user.check_email_verification_token(token):
+        user.email_verified = True
+        user.email_verification_hash = None
+        db.session.commit()
+        return jsonify({'message': 'verified'}), 200
+    return jsonify({'error': 'invalid token'}), 400
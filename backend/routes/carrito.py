@@ -1,39 +1,55 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, g
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from models import db, CarritoItem
+from services.precios import cotizacion_carrito, invalidar_carrito
+from services.tokens import requiere_token
 from datetime import datetime
 
 carrito_bp = Blueprint('carrito', __name__)
 
 @carrito_bp.route('/carrito', methods=['GET'])
+@requiere_token
 def obtener_carrito():
     try:
-        # Obtener el ID del usuario del token o sesión
-        usuario_id = request.args.get('usuario_id')
-        if not usuario_id:
-            return jsonify({'error': 'Usuario no autenticado'}), 401
+        # ID del usuario del token (validado por requiere_token)
+        usuario_id = g.usuario_id
 
-        # Obtener items del carrito
-        items = CarritoItem.query.filter_by(usuario_id=usuario_id).all()
+        # Obtener items del carrito (una sola consulta con los productos)
+        expandir = 'productos' in request.args.get('expand', '').split(',')
+        cotizacion = cotizacion_carrito(usuario_id, incluir_productos=expandir)
+        if expandir:
+            # Carrito con los datos de cada producto y los totales, sin pedirlos uno por uno
+            return jsonify(cotizacion), 200
         
         # Convertir items a formato JSON
         carrito = [{
-            'producto_id': item.producto_id,
-            
-            'cantidad': item.cantidad,
-            'fecha_actualizacion': item.fecha_actualizacion.isoformat()
-        } for item in items]
+            'producto_id': linea['producto_id'],
+            'cantidad': linea['cantidad'],
+            'fecha_actualizacion': linea['fecha_actualizacion']
+        } for linea in cotizacion['items']]
         
         return jsonify({'items': carrito}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@carrito_bp.route('/carrito/resumen', methods=['GET'])
+@requiere_token
+def resumen_carrito():
+    try:
+        usuario_id = g.usuario_id
+
+        return jsonify(cotizacion_carrito(usuario_id)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @carrito_bp.route('/carrito', methods=['POST'])
+@requiere_token
 def actualizar_carrito():
     try:
-        # Obtener el ID del usuario del token o sesión
-        usuario_id = request.json.get('usuario_id')
-        if not usuario_id:
-            return jsonify({'error': 'Usuario no autenticado'}), 401
+        # ID del usuario del token (validado por requiere_token)
+        usuario_id = g.usuario_id
 
         # Obtener los items del carrito del cuerpo de la petición
         items = request.json.get('items', [])
@@ -51,20 +67,109 @@ def actualizar_carrito():
             db.session.add(nuevo_item)
 
         db.session.commit()
+        invalidar_carrito(usuario_id)
+        return jsonify({'message': 'Carrito actualizado exitosamente'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _upsert_item(usuario_id, producto_id, cantidad, sumar):
+    """Inserta la fila del producto o actualiza su cantidad en una sola sentencia.
+
+    Con `sumar` la cantidad se suma a la existente; si no, la reemplaza.
+    Depende de la restricción única (usuario_id, producto_id).
+    """
+    tabla = CarritoItem.__table__
+    valores = {
+        'usuario_id': usuario_id,
+        'producto_id': producto_id,
+        'cantidad': cantidad,
+        'fecha_actualizacion': db.func.current_timestamp(),
+    }
+    dialecto = db.session.get_bind().dialect.name
+
+    if dialecto in ('mysql', 'mariadb'):
+        stmt = mysql_insert(tabla).values(**valores)
+        nueva = stmt.inserted.cantidad
+        stmt = stmt.on_duplicate_key_update(
+            cantidad=tabla.c.cantidad + nueva if sumar else nueva,
+            fecha_actualizacion=stmt.inserted.fecha_actualizacion,
+        )
+    else:
+        insert = postgresql_insert if dialecto == 'postgresql' else sqlite_insert
+        stmt = insert(tabla).values(**valores)
+        nueva = stmt.excluded.cantidad
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['usuario_id', 'producto_id'],
+            set_={
+                'cantidad': tabla.c.cantidad + nueva if sumar else nueva,
+                'fecha_actualizacion': stmt.excluded.fecha_actualizacion,
+            },
+        )
+    db.session.execute(stmt)
+
+
+def _es_entero(valor):
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+@carrito_bp.route('/carrito', methods=['PATCH'])
+@requiere_token
+def modificar_carrito():
+    """Aplica cambios por producto en lugar de reescribir todo el carrito.
+
+    Cuerpo: {"cambios": [{"op": "add"|"set"|"remove", "producto_id": 3, "cantidad": 1}]}
+    - add: suma `cantidad` (1 o más) a la existente; para restar se usa set
+    - set: fija la cantidad; 0 o menos elimina el producto
+    - remove: elimina el producto del carrito
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'El cuerpo debe ser un objeto JSON'}), 400
+        usuario_id = g.usuario_id
+
+        cambios = data.get('cambios')
+        if not isinstance(cambios, list) or not cambios:
+            return jsonify({'error': 'Se requiere una lista de cambios'}), 400
+
+        # Se valida toda la lista antes de tocar la base: un cambio inválido no deja aplicados los anteriores
+        validos = []
+        for cambio in cambios:
+            if not isinstance(cambio, dict):
+                return jsonify({'error': f'Cambio inválido: {cambio}'}), 400
+            op = cambio.get('op')
+            producto_id = cambio.get('producto_id')
+            cantidad = cambio.get('cantidad', 1)
+            # bool es subclase de int: true/false no son cantidades ni ids válidos
+            if op not in ('add', 'set', 'remove') or not _es_entero(producto_id):
+                return jsonify({'error': f'Cambio inválido: {cambio}'}), 400
+            if (op != 'remove' and not _es_entero(cantidad)) or (op == 'add' and cantidad < 1):
+                return jsonify({'error': f'Cantidad inválida: {cambio}'}), 400
+            validos.append((op, producto_id, cantidad))
+
+        for op, producto_id, cantidad in validos:
+            if op == 'remove' or (op == 'set' and cantidad <= 0):
+                CarritoItem.query.filter_by(usuario_id=usuario_id, producto_id=producto_id).delete()
+            else:
+                _upsert_item(usuario_id, producto_id, cantidad, sumar=(op == 'add'))
+
+        db.session.commit()
+        invalidar_carrito(usuario_id)
         return jsonify({'message': 'Carrito actualizado exitosamente'}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @carrito_bp.route('/carrito', methods=['DELETE'])
+@requiere_token
 def limpiar_carrito():
     try:
-        usuario_id = request.args.get('usuario_id')
-        if not usuario_id:
-            return jsonify({'error': 'Usuario no autenticado'}), 401
+        usuario_id = g.usuario_id
 
         CarritoItem.query.filter_by(usuario_id=usuario_id).delete()
         db.session.commit()
+        invalidar_carrito(usuario_id)
         return jsonify({'message': 'Carrito eliminado exitosamente'}), 200
     except Exception as e:
         db.session.rollback()
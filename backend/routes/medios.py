@@ -0,0 +1,43 @@
+from flask import Blueprint, current_app
+import click
+import os
+from services.imagenes import generar_variantes, ANCHOS
+from services.medios import medios
+
+# Archivos estáticos desde el índice construido al iniciar (services/medios.py)
+# y `flask --app app imagenes generar` (requiere Pillow)
+medios_bp = Blueprint('medios', __name__, cli_group='imagenes')
+medios_bp.cli.help = 'Variantes responsivas de las imágenes de productos.'
+
+
+# Se registra en la aplicación (create_app) con el endpoint 'static', para url_for('static', ...)
+def serve_static(filename: str):
+    return medios.servir(f'static/{filename}')
+
+
+@medios_bp.route('/assets/videos/<path:filename>')
+def serve_video_asset(filename: str):
+    return medios.servir(f'assets/videos/{filename}')
+
+
+@medios_bp.cli.command('generar')
+@click.option('--anchos', default=','.join(map(str, ANCHOS)), show_default=True, help='Anchos en píxeles, separados por coma.')
+@click.option('--calidad', default=80, show_default=True, help='Calidad de WebP/JPEG (1-100).')
+@click.option('--procesos', type=int, help='Procesos en paralelo (por defecto, uno por CPU).')
+@click.option('--forzar', is_flag=True, help='Regenerar también las imágenes sin cambios.')
+def generar_imagenes_cli(anchos, calidad, procesos, forzar):
+    """Genera las variantes que falten en static/images/variantes."""
+    try:
+        anchos = [int(a) for a in anchos.split(',') if a.strip()]
+        resultado = generar_variantes(os.path.join(current_app.root_path, 'static', 'images'),
+                                      anchos=anchos, calidad=calidad, procesos=procesos, forzar=forzar)
+    except (RuntimeError, ValueError) as e:
+        raise click.ClickException(str(e))
+    # Guarda los hashes de las variantes nuevas (instance/medios_hashes.json) para que
+    # los workers no tengan que calcularlos al arrancar
+    medios.construir()
+
+    for nombre, error in resultado['errores'].items():
+        click.echo(f'{nombre}: {error}', err=True)
+    click.echo(f"{len(resultado['generadas'])} generadas, {resultado['omitidas']} sin cambios, "
+               f"{resultado['eliminadas']} variantes obsoletas eliminadas, {len(resultado['errores'])} con errores")
@@ -0,0 +1,53 @@
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from routes.pagos import pasarela
+from routes.pedidos import buffer_pedidos
+from services.cache import cache
+from services.concurrencia import verificador_sesiones
+from services.database import estadisticas_pool
+from services.metricas import metricas
+
+metricas_bp = Blueprint('metricas', __name__)
+
+# Valores de estadisticas_pool() acumulados desde el arranque: (clave, métrica, ayuda)
+CONTADORES_POOL = (
+    ('checkouts', 'checkouts_total', 'conexiones obtenidas'),
+    ('timeouts', 'timeouts_total', 'esperas que superaron pool_timeout'),
+    ('espera_total_segundos', 'espera_segundos_total', 'tiempo total esperando una conexión'),
+)
+
+
+# Métricas en formato Prometheus con `Authorization: Bearer <METRICAS_TOKEN>`.
+# Sin METRICAS_TOKEN solo responden en desarrollo y pruebas (METRICAS_SIN_TOKEN).
+@metricas_bp.route('/metrics', methods=['GET'])
+def metrics():
+    token = current_app.config.get('METRICAS_TOKEN')
+    if not token:
+        if not current_app.config.get('METRICAS_SIN_TOKEN'):
+            abort(404)
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Usuario no autenticado'}), 401
+
+    pool = estadisticas_pool()
+    contadores = {
+        f'db_pool_{nombre}': (f'Pool de conexiones: {ayuda}.', pool.pop(clave))
+        for clave, nombre, ayuda in CONTADORES_POOL
+    }
+    extras = {
+        f'db_pool_{nombre}': (f'Pool de conexiones: {nombre}.', valor)
+        for nombre, valor in pool.items()
+    }
+    extras['mercadopago_circuito_abierto'] = (
+        'Circuit breaker de Mercado Pago abierto (1) o cerrado (0).',
+        int(pasarela.http_client.breaker.abierto_desde is not None),
+    )
+    contadores['db_sesiones_compartidas_total'] = (
+        'Usos de una sesión de SQLAlchemy desde otro hilo o greenlet (deberían ser 0).',
+        verificador_sesiones.violaciones,
+    )
+    contadores['cache_aciertos_total'] = ('Lecturas de services/cache.py servidas desde el cache.', cache.aciertos)
+    contadores['cache_fallos_total'] = ('Lecturas de services/cache.py que no lo encontraron guardado.', cache.fallos)
+    contadores['cache_errores_total'] = ('Operaciones del cache que fallaron (Redis caído o lento).', cache.errores)
+    extras['pedidos_buffer_pendientes'] = ('Pedidos en el buffer sin escribir.', buffer_pedidos.pendientes())
+    return Response(metricas.prometheus(extras, contadores), mimetype='text/plain; version=0.0.4')
@@ -1,9 +1,15 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, g
 from flask_cors import cross_origin
-import mercadopago
-from models import db, Producto, CarritoItem, PreferenciaPago
+from sqlalchemy.exc import IntegrityError
+from models import db, PreferenciaPago
+from services.precios import cotizar_carrito, huella_carrito
+from services.pasarela import PasarelaPagos, CircuitoAbierto
+from services.webhooks import ProcesadorWebhooks, encolar_pago
+from services.tokens import requiere_token
+from services.metricas import metricas
 import os
 import logging
+from datetime import datetime, timedelta, timezone
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -13,37 +19,49 @@ pagos_bp = Blueprint('pagos', __name__)
 # Configura tu ACCESS_TOKEN de Mercado Pago desde variable de entorno
 MERCADOPAGO_ACCESS_TOKEN = os.getenv('MERCADOPAGO_ACCESS_TOKEN', 'APP_USR-230244185445361-102018-b8a8cb8a3a1b18659692f304e04e5680-2937230999') 
 
+# Cliente de Mercado Pago compartido (sesión HTTP con pool, timeouts y circuit breaker).
+# Con MERCADOPAGO_API_BASE se puede apuntar a un servidor stub local. Las llamadas se miden en /metrics.
+pasarela = PasarelaPagos.desde_entorno(MERCADOPAGO_ACCESS_TOKEN, observador=metricas.observador_externo('mercadopago'))
+
+# Minutos durante los que se reutiliza la preferencia de un carrito sin cambios
+PREFERENCIA_TTL_MINUTOS = int(os.getenv('PREFERENCIA_TTL_MINUTOS', '30'))
+
+# Procesa en segundo plano las notificaciones que recibe webhook_mercadopago (se inicia en create_app)
+procesador_webhooks = ProcesadorWebhooks(
+    cliente=lambda: pasarela.sdk,
+    hilos=int(os.getenv('WEBHOOK_HILOS', '2')),
+    max_intentos=int(os.getenv('WEBHOOK_MAX_INTENTOS', '8')),
+)
+
+def _preferencia_vigente(usuario_id, huella, ahora):
+    return PreferenciaPago.query.filter(
+        PreferenciaPago.usuario_id == int(usuario_id),
+        PreferenciaPago.huella_carrito == huella,
+        PreferenciaPago.expira_en > ahora
+    ).first()
+
+
 @pagos_bp.route('/crear-preferencia', methods=['POST'])
 @cross_origin()
+@requiere_token
 def crear_preferencia():
     try:
         logging.info('Iniciando creación de preferencia de pago')
-        # Obtener el ID del usuario y los items del carrito
-        data = request.json
-        usuario_id = data.get('usuario_id')
-        
-        if not usuario_id:
-            return jsonify({'error': 'Usuario no autenticado'}), 401
-
-        # Obtener items del carrito
-        items_carrito = CarritoItem.query.filter_by(usuario_id=usuario_id).all()
-        if not items_carrito:
-            return jsonify({'error': 'Carrito vacío'}), 400
+        # ID del usuario del token (validado por requiere_token)
+        usuario_id = g.usuario_id
 
-        # Crear el SDK de MercadoPago
-        sdk = mercadopago.SDK(MERCADOPAGO_ACCESS_TOKEN)
+        # Obtener items del carrito con sus precios (una sola consulta)
+        cotizacion = cotizar_carrito(usuario_id)
+        if not cotizacion['cantidad_articulos']:
+            return jsonify({'error': 'Carrito vacío'}), 400
 
         # Preparar items para MercadoPago
-        preference_items = []
-        for item in items_carrito:
-            producto = Producto.query.get(item.producto_id)
-            if producto:
-                preference_items.append({
-                    "title": producto.nombre,
-                    "quantity": item.cantidad,
-                    "currency_id": "MXN",  # Ajusta según tu moneda
-                    "unit_price": float(producto.precio)
-                })
+        preference_items = [{
+            "title": linea['nombre'],
+            "quantity": linea['cantidad'],
+            "currency_id": "MXN",  # Ajusta según tu moneda
+            "unit_price": linea['precio_unitario']
+        } for linea in cotizacion['items'] if linea['disponible']]
 
         # Crear la preferencia
         # Construir back_urls desde variable de entorno si está definida
@@ -58,6 +76,18 @@ def crear_preferencia():
             failure_url = "http://localhost:4200/cart?status=failure"
             pending_url = "http://localhost:4200/cart?status=pending"
 
+        # Si el mismo usuario ya generó una preferencia vigente para este mismo carrito
+        # (doble clic, reintento), se devuelve sin llamar a Mercado Pago
+        huella = huella_carrito(cotizacion, success_url)
+        ahora = datetime.utcnow()
+        existente = _preferencia_vigente(usuario_id, huella, ahora)
+        if existente:
+            return jsonify({
+                "id": existente.mp_preference_id,
+                "init_point": existente.init_point
+            })
+
+        expira_en = ahora + timedelta(minutes=PREFERENCIA_TTL_MINUTOS)
         preference_data = {
             "items": preference_items,
             "back_urls": {
@@ -65,28 +95,54 @@ def crear_preferencia():
                 "failure": failure_url,
                 "pending": pending_url
             },
-            "external_reference": str(usuario_id)
+            "external_reference": str(usuario_id),
+            # La preferencia caduca en Mercado Pago cuando deja de reutilizarse aquí
+            "expires": True,
+            "expiration_date_to": expira_en.replace(tzinfo=timezone.utc).isoformat(timespec='milliseconds')
         }
 
-        preference_response = sdk.preference().create(preference_data)
-        logging.info(f'Preference response raw: {preference_response}')
+        preference_response = pasarela.crear_preferencia(preference_data)
         # El SDK devuelve un dict; inspeccionar la clave 'response'
         preference = preference_response.get("response") if isinstance(preference_response, dict) else None
 
         if not preference or 'id' not in preference or 'init_point' not in preference:
             logging.error(f'Preferencia creada inválida: {preference}')
             return jsonify({'error': 'invalid preference response from mercadopago', 'raw': preference_response}), 500
+        logging.info(f"Preferencia {preference['id']} creada para el usuario {usuario_id}")
 
-        # Guardar preferencia en la base de datos
+        # Guardar preferencia en la base de datos. La restricción única
+        # (usuario_id, huella_carrito) hace que, si dos checkouts del mismo carrito
+        # llegan a la vez, solo se guarde una; el otro devuelve la que quedó guardada.
         try:
+            # Borrar las preferencias vencidas del usuario (incluida la de este mismo
+            # carrito, si venció) para que la tabla no crezca y no choquen con la nueva
+            PreferenciaPago.query.filter(
+                PreferenciaPago.usuario_id == int(usuario_id),
+                (PreferenciaPago.expira_en < ahora) |
+                (PreferenciaPago.expira_en.is_(None) &
+                 (PreferenciaPago.fecha_creacion < ahora - timedelta(minutes=PREFERENCIA_TTL_MINUTOS)))
+            ).delete(synchronize_session=False)
             nueva_pref = PreferenciaPago(
                 usuario_id=int(usuario_id),
                 mp_preference_id=preference["id"],
-                init_point=preference["init_point"]
+                init_point=preference["init_point"],
+                huella_carrito=huella,
+                expira_en=expira_en
             )
             db.session.add(nueva_pref)
             db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            existente = _preferencia_vigente(usuario_id, huella, ahora)
+            if existente:
+                logging.info(f"Preferencia {preference['id']} descartada: el usuario {usuario_id} "
+                             f"ya tenía {existente.mp_preference_id} para el mismo carrito")
+                return jsonify({
+                    "id": existente.mp_preference_id,
+                    "init_point": existente.init_point
+                })
         except Exception as db_err:
+            db.session.rollback()
             logging.error(f'Error guardando preferencia en DB: {db_err}')
             # No bloqueamos la respuesta al cliente: devolvemos la preferencia creada
 
@@ -95,6 +151,8 @@ def crear_preferencia():
             "init_point": preference["init_point"]
         })
 
+    except CircuitoAbierto as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logging.error(f'Error al crear preferencia de pago: {str(e)}')
         return jsonify({'error': str(e)}), 500
@@ -102,25 +160,17 @@ def crear_preferencia():
 @pagos_bp.route('/webhook/mercadopago', methods=['POST'])
 def webhook_mercadopago():
     try:
-        data = request.json
-        
-        if data["type"] == "payment":
-            # Obtener información del pago
-            sdk = mercadopago.SDK(MERCADOPAGO_ACCESS_TOKEN)
-            payment_info = sdk.payment().get(data["data"]["id"])
-            
-            if payment_info["status"] == 200:
-                payment = payment_info["response"]
-                
-                if payment["status"] == "approved":
-                    # Aquí puedes actualizar el estado del pedido en tu base de datos
-                    usuario_id = int(payment["external_reference"])
-                    
-                    # Limpiar el carrito después de un pago exitoso
-                    CarritoItem.query.filter_by(usuario_id=usuario_id).delete()
-                    db.session.commit()
+        data = request.get_json(silent=True) or {}
+        # Mercado Pago puede mandar la notificación en el cuerpo o en la query string
+        tipo = data.get('type') or request.args.get('type') or request.args.get('topic')
+        payment_id = (data.get('data') or {}).get('id') or request.args.get('data.id') or request.args.get('id')
+
+        if tipo == "payment" and payment_id:
+            # Solo se guarda la notificación; el pago se consulta en segundo plano
+            encolar_pago(payment_id)
 
         return jsonify({'status': 'ok'}), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
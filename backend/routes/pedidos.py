@@ -0,0 +1,122 @@
+from flask import Blueprint, jsonify, request
+import click
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+import os
+from models import db, Pedido
+from services.idempotencia import huella_peticion, respuesta_guardada, registrar_clave, ConflictoIdempotencia
+from services.pedidos import BufferPedidos, acumular_resumen, reconstruir_resumen, resumen_produccion
+from services.tokens import requiere_rol
+
+# Pedidos personalizados (/api/pedidos) y `flask --app app pedidos reconstruir-resumen`
+pedidos_bp = Blueprint('pedidos', __name__, cli_group='pedidos')
+pedidos_bp.cli.help = 'Mantenimiento de pedidos.'
+
+# Escritura diferida en lotes; se inicia en create_app si PEDIDOS_BUFFER=1
+buffer_pedidos = BufferPedidos(
+    Pedido,
+    max_lote=int(os.getenv('PEDIDOS_BUFFER_LOTE', '50')),
+    max_espera=float(os.getenv('PEDIDOS_BUFFER_ESPERA', '0.2')),
+)
+
+
+@pedidos_bp.route('/pedidos', methods=['POST'])
+def crear_pedido():
+    data = request.get_json() or {}
+    nombre = data.get('nombre')
+    email = data.get('email')
+    producto = data.get('producto')
+    cantidad = data.get('cantidad', 1)
+    fecha_entrega = data.get('fecha_entrega')
+    nota = data.get('nota')
+
+    if not nombre or not email or not producto:
+        return jsonify({'error': 'Campos requeridos: nombre, email, producto'}), 400
+
+    # Con Idempotency-Key, un reintento del cliente devuelve la respuesta del primer intento
+    clave = request.headers.get('Idempotency-Key')
+    huella = None
+    if clave:
+        if len(clave) > 128:
+            return jsonify({'error': 'Idempotency-Key demasiado larga (máximo 128 caracteres)'}), 400
+        huella = huella_peticion(data)
+        try:
+            previa = respuesta_guardada(clave, huella)
+            pendiente = buffer_pedidos.clave_pendiente(clave)
+        except ConflictoIdempotencia as e:
+            return jsonify({'error': str(e)}), 422
+        if previa is not None:
+            return previa
+        if pendiente is not None:
+            if pendiente[0] != huella:
+                return jsonify({'error': 'Idempotency-Key ya usada con otra petición'}), 422
+            return jsonify(pendiente[1]), 202, {'Idempotent-Replayed': 'true'}
+
+    fecha_entrega_obj = None
+    if fecha_entrega:
+        try:
+            fecha_entrega_obj = datetime.fromisoformat(fecha_entrega).date()
+        except Exception:
+            fecha_entrega_obj = None
+
+    valores = {
+        'nombre': nombre,
+        'email': email,
+        'producto': producto,
+        'cantidad': int(cantidad) if cantidad else 1,
+        'fecha_entrega': fecha_entrega_obj,
+        'nota': nota,
+        'creado_en': datetime.utcnow(),
+    }
+
+    if buffer_pedidos.activo:
+        # Escritura diferida: el pedido se guarda en el próximo lote
+        cuerpo = {**Pedido(**valores).to_dict(), 'estado': 'en_cola'}
+        if buffer_pedidos.encolar(valores, clave, huella, cuerpo):
+            return jsonify(cuerpo), 202
+        # Buffer lleno: se escribe directamente
+
+    nuevo = Pedido(**valores)
+    db.session.add(nuevo)
+    acumular_resumen([valores])
+    if clave:
+        db.session.flush()
+        registrar_clave(clave, huella, nuevo.to_dict(), 201)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Otro intento con la misma clave se guardó primero
+        db.session.rollback()
+        try:
+            previa = respuesta_guardada(clave, huella) if clave else None
+        except ConflictoIdempotencia as e:
+            # El otro intento usó la misma clave con otro cuerpo
+            return jsonify({'error': str(e)}), 422
+        if previa is None:
+            raise
+        return previa
+
+    return jsonify(nuevo.to_dict()), 201
+
+
+@pedidos_bp.route('/pedidos/resumen', methods=['GET'])
+@requiere_rol('admin')
+def resumen_pedidos():
+    """Cuánto preparar de cada producto por día de entrega (por defecto, hoy)."""
+    try:
+        desde = request.args.get('desde')
+        desde = datetime.fromisoformat(desde).date() if desde else datetime.now().date()
+        hasta = request.args.get('hasta')
+        hasta = datetime.fromisoformat(hasta).date() if hasta else desde
+        return jsonify(resumen_produccion(desde, hasta))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# flask --app app pedidos reconstruir-resumen
+@pedidos_bp.cli.command('reconstruir-resumen')
+def reconstruir_resumen_cli():
+    """Recalcula el resumen diario de producción desde la tabla de pedidos."""
+    filas = reconstruir_resumen(Pedido)
+    db.session.commit()
+    click.echo(f'{filas} filas en resumen_pedidos_dia')
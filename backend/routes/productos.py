@@ -0,0 +1,203 @@
+from flask import Blueprint, jsonify, request, abort, Response, stream_with_context
+import click
+from sqlalchemy import func, select
+from models import db, Producto
+from services.catalogo import catalogo_cache, pagina_productos
+from services.database import bind_lectura
+from services.busqueda import indice_productos
+from services.tokens import requiere_rol
+from services.importacion import (
+    ErrorImportacion, TIPOS_CONTENIDO, detectar_formato, exportar_productos, importar_productos, leer_filas
+)
+
+# Catálogo de productos (/api/productos...) y comandos `flask --app app productos import|export`
+productos_bp = Blueprint('productos', __name__, cli_group='productos')
+productos_bp.cli.help = 'Importar y exportar el catálogo de productos.'
+
+
+@productos_bp.route('/productos', methods=['GET'])
+def get_productos():
+    # Sin parámetros se devuelve el catálogo completo (como antes).
+    # Con limite/despues/campos/orden se devuelve una página: {'items': [...], 'siguiente': cursor}
+    if not any(p in request.args for p in ('limite', 'despues', 'campos', 'orden')):
+        # Filas en lugar de objetos ORM: el catálogo completo se serializa sin pasar por el identity map
+        return catalogo_cache.respuesta('productos', lambda: [
+            Producto.fila_a_dict(fila)
+            for fila in db.session.execute(Producto.consulta_filas(), bind_arguments=bind_lectura())
+        ])
+
+    limite = request.args.get('limite', 24, type=int)
+    despues = request.args.get('despues')
+    campos = [c for c in request.args.get('campos', '').split(',') if c] or None
+    orden = request.args.get('orden', 'id')
+    clave = f'pagina:{limite}:{despues}:{",".join(campos or [])}:{orden}'
+    try:
+        return catalogo_cache.respuesta(clave, lambda: pagina_productos(limite, despues, campos, orden))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@productos_bp.route('/productos/categoria/<categoria>', methods=['GET'])
+def get_productos_por_categoria(categoria):
+    categoria = categoria.lower()
+    return catalogo_cache.respuesta(f'categoria:{categoria}', lambda: [
+        Producto.fila_a_dict(fila) for fila in db.session.execute(
+            Producto.consulta_filas().where(Producto.categoria == categoria), bind_arguments=bind_lectura()
+        )
+    ])
+
+@productos_bp.route('/categorias', methods=['GET'])
+def get_categorias():
+    # Conteo por categoría: un GROUP BY sobre el índice de `categoria`, que queda
+    # guardado en el cache del catálogo hasta la siguiente escritura de productos
+    def cargar():
+        filas = db.session.execute(
+            select(Producto.categoria, func.count(Producto.id_producto))
+            .where(Producto.categoria.is_not(None))
+            .group_by(Producto.categoria)
+            .order_by(Producto.categoria),
+            bind_arguments=bind_lectura()
+        )
+        return [{'categoria': categoria, 'total': total} for categoria, total in filas]
+
+    return catalogo_cache.respuesta('categorias', cargar)
+
+@productos_bp.route('/productos/<int:id>', methods=['GET'])
+def get_producto(id):
+    def cargar():
+        producto = db.session.get(Producto, id, bind_arguments=bind_lectura())
+        if producto is None:
+            # abort lanza la excepción dentro de la carga, así que los 404 no se guardan
+            abort(404)
+        return producto.to_dict()
+
+    return catalogo_cache.respuesta(f'producto:{id}', cargar)
+
+@productos_bp.route('/productos/buscar/<termino>', methods=['GET'])
+def buscar_productos(termino):
+    # Sin `pagina` se devuelve la lista completa (como antes); con `pagina` un objeto paginado
+    pagina = request.args.get('pagina', type=int)
+    por_pagina = min(request.args.get('por_pagina', 20, type=int), 100)
+
+    def cargar():
+        if pagina is None:
+            productos, _ = indice_productos.buscar(termino)
+            return productos
+        productos, total = indice_productos.buscar(
+            termino, offset=(max(pagina, 1) - 1) * por_pagina, limite=por_pagina
+        )
+        return {'items': productos, 'total': total, 'pagina': max(pagina, 1), 'por_pagina': por_pagina}
+
+    return catalogo_cache.respuesta(f'buscar:{termino.lower()}:{pagina}:{por_pagina}', cargar)
+
+
+@productos_bp.route('/productos', methods=['POST'])
+def agregar_producto():
+    data = request.get_json()
+    nombre = data.get('nombre')
+    descripcion = data.get('descripcion')
+    precio = data.get('precio')
+    imagen_url = data.get('imagen_url')
+    categoria = (data.get('categoria') or '').strip().lower() or None
+
+    if not nombre or not precio:
+        return jsonify({'error': 'Faltan campos obligatorios: nombre y precio'}), 400
+
+    nuevo_producto = Producto(
+        nombre=nombre,
+        descripcion=descripcion,
+        precio=float(precio),
+        imagen_url=imagen_url,
+        categoria=categoria
+    )
+
+    db.session.add(nuevo_producto)
+    db.session.commit()
+    # Primero la invalidación: agregar() registra esa versión y evita reconstruir el índice
+    catalogo_cache.invalidar()
+    indice_productos.agregar(nuevo_producto.to_dict())
+
+    return jsonify(nuevo_producto.to_dict()), 201
+
+
+@productos_bp.route('/productos/importar', methods=['POST'])
+@requiere_rol('admin')
+def importar_productos_ruta():
+    # El cuerpo es el archivo (CSV o NDJSON) y se lee como stream, sin cargarlo completo
+    try:
+        formato = detectar_formato(request.content_type, request.args.get('formato'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        resultado = importar_productos(
+            leer_filas(request.stream, formato),
+            tamano_lote=request.args.get('lote', 500, type=int),
+            estricto=request.args.get('estricto') == '1'
+        )
+        db.session.commit()
+    except ErrorImportacion as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'errores': e.errores}), 400
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'El archivo debe estar codificado en UTF-8'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    catalogo_cache.invalidar()
+    indice_productos.invalidar()
+    return jsonify(resultado), 200
+
+
+@productos_bp.route('/productos/exportar', methods=['GET'])
+@requiere_rol('admin')
+def exportar_productos_ruta():
+    try:
+        formato = detectar_formato(None, request.args.get('formato', 'csv'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(
+        stream_with_context(exportar_productos(formato)),
+        mimetype=TIPOS_CONTENIDO[formato],
+        headers={'Content-Disposition': f'attachment; filename=productos.{formato}'}
+    )
+
+
+# Comandos de consola: flask --app app productos import|export
+@productos_bp.cli.command('import')
+@click.argument('archivo', type=click.File('rb'))
+@click.option('--formato', type=click.Choice(['csv', 'ndjson']), help='Por defecto se deduce de la extensión.')
+@click.option('--lote', default=500, show_default=True, help='Filas por INSERT/UPDATE.')
+@click.option('--estricto', is_flag=True, help='Cancelar todo si alguna fila es inválida.')
+def importar_productos_cli(archivo, formato, lote, estricto):
+    try:
+        formato = detectar_formato(None, formato or archivo.name.rsplit('.', 1)[-1].replace('jsonl', 'ndjson'))
+    except ValueError as e:
+        raise click.ClickException(f'{e}; indícalo con --formato')
+    try:
+        resultado = importar_productos(leer_filas(archivo, formato), tamano_lote=lote, estricto=estricto)
+        db.session.commit()
+    except ErrorImportacion as e:
+        db.session.rollback()
+        for error in e.errores:
+            click.echo(f"fila {error['fila']}: {error['error']}", err=True)
+        raise click.ClickException(str(e))
+    except UnicodeDecodeError:
+        db.session.rollback()
+        raise click.ClickException('El archivo debe estar codificado en UTF-8')
+
+    # Con CACHE_URL la invalidación llega a los workers en marcha; con el cache en memoria no tiene efecto
+    catalogo_cache.invalidar()
+    for error in resultado['errores']:
+        click.echo(f"fila {error['fila']}: {error['error']} (omitida)", err=True)
+    click.echo(f"{resultado['insertados']} insertados, {resultado['actualizados']} actualizados, "
+               f"{len(resultado['errores'])} con errores")
+
+
+@productos_bp.cli.command('export')
+@click.option('--formato', type=click.Choice(['csv', 'ndjson']), default='csv', show_default=True)
+@click.option('--salida', type=click.File('w', encoding='utf-8'), default='-', help='Archivo destino (por defecto stdout).')
+def exportar_productos_cli(formato, salida):
+    for bloque in exportar_productos(formato):
+        salida.write(bloque)
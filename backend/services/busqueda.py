@@ -0,0 +1,216 @@
+import bisect
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from sqlalchemy import select, text
+
+from models import db, Producto
+from services.cache import cache
+from services.catalogo import CatalogoCache
+from services.database import bind_lectura
+
+# Motor de búsqueda de productos.
+# Reemplaza el `ILIKE '%termino%'` (que recorre toda la tabla en cada tecla)
+# por un índice invertido en memoria con búsqueda por prefijo y ranking.
+# Con BUSQUEDA_BACKEND=mysql se usa en su lugar un índice FULLTEXT de MySQL
+# (ver migrations/001_productos_fulltext.sql).
+
+# Palabras que no aportan a la búsqueda ("pastel de limón" -> pastel, limon)
+STOPWORDS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'lo', 'los',
+    'para', 'por', 'sin', 'un', 'una', 'y',
+}
+
+# Un término que aparece en el nombre pesa más que en la descripción
+PESOS = {'nombre': 3, 'descripcion': 1}
+
+_SEPARADOR = re.compile(r'[^0-9a-zñ]+')
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos ("Limón" -> "limon"); conserva la ñ."""
+    texto = (texto or '').lower().replace('ñ', '\0')
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return texto.replace('\0', 'ñ')
+
+
+def tokenizar(texto):
+    return [t for t in _SEPARADOR.split(normalizar(texto)) if t and t not in STOPWORDS]
+
+
+class IndiceMemoria:
+    """Índice invertido token -> {id_producto: peso}, con la lista de tokens ordenada
+    para resolver prefijos con bisect.
+
+    `version` devuelve la versión actual del catálogo (la etiqueta "catalogo"
+    del cache compartido): si cambió desde la última construcción, otro worker
+    escribió productos y el índice se reconstruye antes de buscar. Así los
+    resultados que se guardan en el cache compartido nunca son más viejos que
+    la versión con la que se guardan.
+    """
+
+    def __init__(self, reindexar_cada=300, version=None):
+        self.reindexar_cada = reindexar_cada
+        self._version = version
+        self._version_construida = None
+        self._postings = {}
+        self._tokens = []
+        self._productos = {}
+        self._construido_en = None
+        self._lock = threading.RLock()
+
+    def reconstruir(self, productos):
+        with self._lock:
+            self._postings = {}
+            self._tokens = []
+            self._productos = {}
+            for producto in productos:
+                self._indexar(producto)
+            # Se ordena una sola vez al final: insort por token es cuadrático con catálogos grandes
+            self._tokens = sorted(self._postings)
+            self._construido_en = time.monotonic()
+
+    def invalidar(self):
+        """Fuerza a reconstruir el índice en la siguiente búsqueda (p. ej. tras una importación)."""
+        with self._lock:
+            self._construido_en = None
+
+    def agregar(self, producto):
+        """Indexa (o reindexa) un producto ya serializado con `to_dict()`.
+
+        Llamar después de invalidar el catálogo: si la única escritura desde la
+        última construcción es esta (la versión avanzó en uno), el índice la
+        registra y la próxima búsqueda no lo reconstruye desde la base.
+        """
+        with self._lock:
+            if self._construido_en is None:
+                return
+            self._agregar(producto)
+            version = self._version() if self._version else None
+            if version is not None and self._version_construida is not None \
+                    and version == self._version_construida + 1:
+                self._version_construida = version
+
+    def _agregar(self, producto):
+        for token in self._indexar(producto):
+            bisect.insort(self._tokens, token)
+
+    def _indexar(self, producto):
+        """Agrega las postings del producto; devuelve los tokens nuevos (sin ordenar en `_tokens`)."""
+        pid = producto['id_producto']
+        if pid in self._productos:
+            self._quitar(pid)
+        nuevos = []
+        for campo, peso in PESOS.items():
+            for token in tokenizar(producto.get(campo)):
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = {}
+                    nuevos.append(token)
+                posting[pid] = posting.get(pid, 0) + peso
+        self._productos[pid] = producto
+        return nuevos
+
+    def _quitar(self, pid):
+        for token in [t for t, posting in self._postings.items() if pid in posting]:
+            del self._postings[token][pid]
+            if not self._postings[token]:
+                del self._postings[token]
+                # Durante reconstruir() los tokens todavía no están en la lista ordenada
+                i = bisect.bisect_left(self._tokens, token)
+                if i < len(self._tokens) and self._tokens[i] == token:
+                    self._tokens.pop(i)
+        del self._productos[pid]
+
+    def _asegurar_construido(self):
+        # Otros workers pueden haber agregado productos: se reconstruye si cambió la
+        # versión del catálogo y, por si el cache no responde, también periódicamente.
+        # La versión se lee antes de consultar la base para no registrar una más nueva que los datos.
+        version = self._version() if self._version else None
+        vencido = (self._construido_en is None or version != self._version_construida or
+                   time.monotonic() - self._construido_en > self.reindexar_cada)
+        if vencido:
+            self.reconstruir(p.to_dict() for p in db.session.scalars(select(Producto), bind_arguments=bind_lectura()))
+            self._version_construida = version
+
+    def _puntajes(self, token):
+        """Puntaje por producto para un token de la consulta, tratándolo como prefijo.
+        Una coincidencia exacta vale el doble que una por prefijo."""
+        puntajes = {}
+        i = bisect.bisect_left(self._tokens, token)
+        while i < len(self._tokens) and self._tokens[i].startswith(token):
+            factor = 2 if self._tokens[i] == token else 1
+            for pid, peso in self._postings[self._tokens[i]].items():
+                puntajes[pid] = puntajes.get(pid, 0) + peso * factor
+            i += 1
+        return puntajes
+
+    def buscar(self, consulta, offset=0, limite=None):
+        """Devuelve `(productos, total)`; todos los términos deben coincidir."""
+        tokens = tokenizar(consulta)
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            self._asegurar_construido()
+            puntajes = None
+            for token in tokens:
+                encontrados = self._puntajes(token)
+                if puntajes is None:
+                    puntajes = encontrados
+                else:
+                    puntajes = {pid: puntajes[pid] + p for pid, p in encontrados.items() if pid in puntajes}
+                if not puntajes:
+                    return [], 0
+
+            orden = sorted(puntajes, key=lambda pid: (-puntajes[pid], pid))
+            fin = None if limite is None else offset + limite
+            return [self._productos[pid] for pid in orden[offset:fin]], len(orden)
+
+
+class IndiceMySQLFulltext:
+    """Delegado al índice FULLTEXT de MySQL (`MATCH ... AGAINST` en modo booleano)."""
+
+    def agregar(self, producto):
+        # MySQL mantiene el índice FULLTEXT por su cuenta
+        pass
+
+    def invalidar(self):
+        pass
+
+    def buscar(self, consulta, offset=0, limite=None):
+        tokens = tokenizar(consulta)
+        if not tokens:
+            return [], 0
+
+        # +token* = el término es obligatorio y se busca como prefijo
+        booleana = ' '.join(f'+{t}*' for t in tokens)
+        match = 'MATCH(nombre, descripcion) AGAINST (:q IN BOOLEAN MODE)'
+        total = db.session.execute(
+            text(f'SELECT COUNT(*) FROM productos WHERE {match}'), {'q': booleana}
+        ).scalar()
+        sql = f'SELECT id_producto FROM productos WHERE {match} ORDER BY {match} DESC, id_producto'
+        params = {'q': booleana, 'offset': offset}
+        if limite is not None:
+            sql += ' LIMIT :limite OFFSET :offset'
+            params['limite'] = limite
+        ids = [fila[0] for fila in db.session.execute(text(sql), params)]
+        por_id = {p.id_producto: p for p in Producto.query.filter(Producto.id_producto.in_(ids))} if ids else {}
+        return [por_id[pid].to_dict() for pid in ids if pid in por_id], total
+
+
+def crear_indice(backend=None):
+    backend = backend or os.getenv('BUSQUEDA_BACKEND', 'memoria')
+    if backend == 'mysql':
+        return IndiceMySQLFulltext()
+    if backend == 'memoria':
+        return IndiceMemoria(reindexar_cada=int(os.getenv('BUSQUEDA_REINDEXAR_CADA', '300')),
+                             version=lambda: cache.version(CatalogoCache.ETIQUETA))
+    raise ValueError(f'BUSQUEDA_BACKEND desconocido: {backend}')
+
+
+indice_productos = crear_indice()
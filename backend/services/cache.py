@@ -0,0 +1,275 @@
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# Cache compartido por el catálogo, los carritos y auth.
+# Interfaz común (Cache): leer/guardar/borrar con TTL, invalidación por
+# etiquetas y `obtener(clave, cargar)`, que carga una sola vez aunque lleguen
+# muchas peticiones a la vez por la misma clave (single-flight).
+#
+# Backends:
+# - BackendMemoria: LRU dentro del proceso; cada worker de gunicorn tiene el suyo.
+# - BackendRedis: cualquier servidor que hable el protocolo de Redis (Redis,
+#   Valkey, KeyDB...), compartido por todos los workers. Requiere `pip install redis`.
+#
+# Invalidación por etiquetas: cada etiqueta tiene un contador de versión y cada
+# entrada guarda las versiones de sus etiquetas al cargarse; invalidar una
+# etiqueta solo incrementa su contador, y las entradas con una versión anterior
+# dejan de servirse. Con CACHE_URL los contadores viven en Redis, así que una
+# escritura en un worker (o en un comando `flask`) invalida el cache de todos,
+# incluso con CACHE_LOCAL=1 (valores en memoria de cada worker, versiones en Redis).
+
+_FALTA = object()
+
+
+class BackendMemoria:
+    # Cada proceso tiene el suyo: una invalidación no llega a los demás workers
+    compartido = False
+
+    def __init__(self, max_entradas=1024):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()  # clave -> (expira_en, valor)
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def leer(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return _FALTA
+            if entrada[0] <= time.monotonic():
+                del self._entradas[clave]
+                return _FALTA
+            self._entradas.move_to_end(clave)
+            return entrada[1]
+
+    def escribir(self, clave, valor, ttl):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def borrar(self, clave):
+        with self._lock:
+            self._entradas.pop(clave, None)
+
+    def versiones(self, etiquetas):
+        return [self._versiones.get(etiqueta, 0) for etiqueta in etiquetas]
+
+    def incrementar(self, etiqueta):
+        with self._lock:
+            self._versiones[etiqueta] = self._versiones.get(etiqueta, 0) + 1
+
+    def bloquear(self, clave, ttl):
+        # Dentro de un proceso el single-flight de Cache ya evita cargas repetidas
+        return True
+
+    def liberar(self, clave):
+        pass
+
+
+class BackendRedis:
+    """Valores serializados con pickle: el servidor debe ser privado (no expuesto a Internet).
+
+    Los contadores de versión no tienen TTL; con `maxmemory-policy` usar
+    `volatile-lru` (o `noeviction`) para que nunca se desalojen.
+    """
+
+    compartido = True
+
+    def __init__(self, url, prefijo='pasteleria:', timeout=0.5):
+        import redis  # opcional: solo se necesita con CACHE_URL
+
+        self.prefijo = prefijo
+        self._redis = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+    def leer(self, clave):
+        crudo = self._redis.get(self.prefijo + clave)
+        return _FALTA if crudo is None else pickle.loads(crudo)
+
+    def escribir(self, clave, valor, ttl):
+        self._redis.set(self.prefijo + clave, pickle.dumps(valor, pickle.HIGHEST_PROTOCOL), px=int(ttl * 1000))
+
+    def borrar(self, clave):
+        self._redis.delete(self.prefijo + clave)
+
+    def versiones(self, etiquetas):
+        valores = self._redis.mget([f'{self.prefijo}version:{etiqueta}' for etiqueta in etiquetas])
+        return [int(valor or 0) for valor in valores]
+
+    def incrementar(self, etiqueta):
+        self._redis.incr(f'{self.prefijo}version:{etiqueta}')
+
+    def bloquear(self, clave, ttl):
+        return bool(self._redis.set(f'{self.prefijo}cargando:{clave}', b'1', nx=True, px=int(ttl * 1000)))
+
+    def liberar(self, clave):
+        self._redis.delete(f'{self.prefijo}cargando:{clave}')
+
+
+class Cache:
+    def __init__(self, backend, versiones=None, ttl=60, espera_carga=5.0):
+        self.backend = backend
+        self.ttl = ttl
+        # Segundos que una petición espera a que otra termine de cargar la misma clave
+        self.espera_carga = espera_carga
+        self.aciertos = 0
+        self.fallos = 0
+        self.errores = 0
+        self._versiones = versiones or backend
+        self._cargando = {}  # clave -> threading.Event de la carga en curso en este proceso
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_entorno(cls):
+        url = os.getenv('CACHE_URL')
+        memoria = BackendMemoria(max_entradas=int(os.getenv('CACHE_MAX_ENTRADAS', '1024')))
+        if not url:
+            return cls(memoria, ttl=int(os.getenv('CACHE_TTL', '60')))
+        try:
+            redis = BackendRedis(url, prefijo=os.getenv('CACHE_PREFIJO', 'pasteleria:'),
+                                 timeout=float(os.getenv('CACHE_TIMEOUT', '0.5')))
+        except ImportError:
+            logging.warning('CACHE_URL definida pero el paquete redis no está instalado; se usa el cache en memoria')
+            return cls(memoria, ttl=int(os.getenv('CACHE_TTL', '60')))
+        if os.getenv('CACHE_LOCAL', '0') == '1':
+            return cls(memoria, versiones=redis, ttl=int(os.getenv('CACHE_TTL', '60')))
+        return cls(redis, ttl=int(os.getenv('CACHE_TTL', '60')))
+
+    def _fallo_backend(self, operacion, error):
+        # Si el cache no responde la petición sigue contra la base de datos
+        self.errores += 1
+        logging.warning(f'Cache: {operacion} falló: {error}')
+
+    def _leer(self, clave):
+        try:
+            entrada = self.backend.leer(clave)
+            if entrada is _FALTA:
+                return _FALTA
+            etiquetas, versiones, valor = entrada
+            if etiquetas and self._versiones.versiones(etiquetas) != versiones:
+                return _FALTA
+            return valor
+        except Exception as e:
+            self._fallo_backend('leer', e)
+            return _FALTA
+
+    def leer(self, clave, defecto=None):
+        valor = self._leer(clave)
+        return defecto if valor is _FALTA else valor
+
+    def guardar(self, clave, valor, ttl=None, etiquetas=(), versiones=None):
+        """Guarda `valor` durante `ttl` segundos (por defecto el del cache) con sus etiquetas.
+
+        `versiones` son las de las etiquetas al momento de leer los datos; si
+        no se indican se toman las actuales.
+        """
+        etiquetas = tuple(etiquetas)
+        try:
+            if versiones is None:
+                versiones = self._versiones.versiones(etiquetas) if etiquetas else []
+            self.backend.escribir(clave, (etiquetas, versiones, valor), self.ttl if ttl is None else ttl)
+        except Exception as e:
+            self._fallo_backend('guardar', e)
+
+    def borrar(self, clave):
+        try:
+            self.backend.borrar(clave)
+        except Exception as e:
+            self._fallo_backend('borrar', e)
+
+    @property
+    def versiones_compartidas(self):
+        """True si las invalidaciones llegan a todos los workers (contadores de versión en Redis)."""
+        return getattr(self._versiones, 'compartido', False)
+
+    def version(self, etiqueta):
+        """Versión actual de `etiqueta` (None si el backend no responde)."""
+        try:
+            return self._versiones.versiones((etiqueta,))[0]
+        except Exception as e:
+            self._fallo_backend(f'versión {etiqueta}', e)
+            return None
+
+    def invalidar(self, *etiquetas):
+        """Descarta todas las entradas guardadas con alguna de las etiquetas."""
+        for etiqueta in etiquetas:
+            try:
+                self._versiones.incrementar(etiqueta)
+            except Exception as e:
+                self._fallo_backend(f'invalidar {etiqueta}', e)
+
+    def obtener(self, clave, cargar, ttl=None, etiquetas=()):
+        """Valor de `clave`, llamando a `cargar()` si no está guardado o quedó invalidado.
+
+        Si varias peticiones piden a la vez la misma clave, solo una llama a
+        `cargar()` y las demás esperan su resultado. Si `cargar()` lanza una
+        excepción no se guarda nada y la excepción llega a quien llamó.
+        Con `ttl=0` no se usa el cache.
+        """
+        if ttl == 0:
+            return cargar()
+        valor = self._leer(clave)
+        if valor is not _FALTA:
+            self.aciertos += 1
+            return valor
+        self.fallos += 1
+
+        with self._lock:
+            evento = self._cargando.get(clave)
+            propia = evento is None
+            if propia:
+                evento = self._cargando[clave] = threading.Event()
+
+        if not propia:
+            evento.wait(self.espera_carga)
+            valor = self._leer(clave)
+            if valor is not _FALTA:
+                return valor
+            # La otra carga falló o tardó demasiado: se carga de nuevo
+            return self._cargar(clave, cargar, ttl, etiquetas)
+
+        try:
+            return self._cargar(clave, cargar, ttl, etiquetas)
+        finally:
+            with self._lock:
+                del self._cargando[clave]
+            evento.set()
+
+    def _cargar(self, clave, cargar, ttl, etiquetas):
+        etiquetas = tuple(etiquetas)
+        # Versiones leídas antes de cargar: si hay una invalidación mientras
+        # tanto, lo que se guarda ya nace viejo y no se sirve
+        try:
+            versiones = self._versiones.versiones(etiquetas) if etiquetas else []
+            bloqueada = self.backend.bloquear(clave, self.espera_carga)
+        except Exception as e:
+            self._fallo_backend('cargar', e)
+            return cargar()
+
+        if not bloqueada:
+            # Otro worker está cargando la misma clave (Redis): se espera su resultado
+            limite = time.monotonic() + self.espera_carga
+            while time.monotonic() < limite:
+                time.sleep(0.05)
+                valor = self._leer(clave)
+                if valor is not _FALTA:
+                    return valor
+
+        try:
+            valor = cargar()
+            self.guardar(clave, valor, ttl, etiquetas, versiones)
+            return valor
+        finally:
+            if bloqueada:
+                try:
+                    self.backend.liberar(clave)
+                except Exception as e:
+                    self._fallo_backend('liberar', e)
+
+
+cache = Cache.desde_entorno()
@@ -0,0 +1,137 @@
+import base64
+import hashlib
+import json
+import os
+
+from flask import current_app, request
+from sqlalchemy import select
+
+from models import db, Producto
+from services.cache import cache
+from services.database import bind_lectura
+
+# Cache del catálogo de productos sobre el cache compartido (services/cache.py).
+# Guarda las respuestas ya serializadas (bytes JSON) para que las lecturas del
+# catálogo no tengan que ir a la base de datos remota ni volver a serializar.
+# Cada escritura de productos invalida la etiqueta "catalogo"; con CACHE_URL
+# la invalidación llega a todos los workers, si no, el TTL acota cuánto tiempo
+# puede quedar desactualizado un worker que no recibió la escritura.
+
+
+class CatalogoCache:
+    ETIQUETA = 'catalogo'
+
+    def __init__(self, cache, ttl=60):
+        self.cache = cache
+        self.ttl = ttl
+
+    def obtener(self, clave, cargar):
+        """Devuelve `(etag, cuerpo)` de `clave`, llamando a `cargar()` si no están vigentes.
+
+        El ETag es un hash del contenido, así que todos los workers generan el
+        mismo valor para los mismos datos.
+        """
+        def serializar():
+            cuerpo = current_app.json.dumps(cargar()).encode('utf-8')
+            return hashlib.sha1(cuerpo).hexdigest(), cuerpo
+
+        return self.cache.obtener(f'catalogo:{clave}', serializar, ttl=self.ttl, etiquetas=(self.ETIQUETA,))
+
+    def respuesta(self, clave, cargar):
+        """Respuesta JSON con ETag fuerte; contesta 304 si el cliente ya tiene esa versión.
+
+        El encabezado Cache-Control se toma de `app.config['CACHE_CONTROL']`
+        según el endpoint que atiende la petición.
+        """
+        etag, cuerpo = self.obtener(clave, cargar)
+        respuesta = current_app.response_class(cuerpo, mimetype='application/json')
+        respuesta.set_etag(etag)
+        cache_control = current_app.config.get('CACHE_CONTROL', {}).get(request.endpoint)
+        if cache_control:
+            respuesta.headers['Cache-Control'] = cache_control
+        return respuesta.make_conditional(request)
+
+    def invalidar(self):
+        # También invalida los carritos cotizados, que llevan la misma etiqueta (services/precios.py)
+        self.cache.invalidar(self.ETIQUETA)
+
+
+catalogo_cache = CatalogoCache(cache, ttl=int(os.getenv('CATALOGO_CACHE_TTL', '60')))
+
+
+# Listado paginado del catálogo con cursor (keyset): en lugar de OFFSET, cada
+# página continúa después del último (valor de orden, id_producto) devuelto, así
+# que cada página es un rango sobre el índice de la columna de orden.
+ORDENES = {'id': 'id_producto', 'precio': 'precio', 'nombre': 'nombre'}
+LIMITE_MAXIMO = 100
+
+
+def _codificar_cursor(valor, id_producto):
+    crudo = json.dumps([valor, id_producto], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valor, id_producto = json.loads(crudo)
+        return valor, int(id_producto)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido')
+
+
+def pagina_productos(limite=24, despues=None, campos=None, orden='id'):
+    """Una página del catálogo: `{'items': [...], 'siguiente': cursor | None}`.
+
+    `campos` limita las columnas que se leen de la base de datos (con
+    imagen_url se agregan imagen_src y srcset); `orden` es id, precio o
+    nombre, con prefijo "-" para orden descendente.
+    Lanza ValueError si algún parámetro no es válido.
+    """
+    columnas = Producto.__table__.columns
+    campos = campos or list(columnas.keys())
+    desconocidos = [c for c in campos if c not in columnas]
+    if desconocidos:
+        raise ValueError(f'Campos desconocidos: {", ".join(desconocidos)}')
+
+    descendente = orden.startswith('-')
+    if orden.lstrip('-') not in ORDENES:
+        raise ValueError(f'Orden inválido: {orden}')
+    nombre_orden = ORDENES[orden.lstrip('-')]
+    col_orden = columnas[nombre_orden]
+    col_id = columnas['id_producto']
+
+    # Siempre se leen el id y la columna de orden porque forman el cursor
+    seleccion = list(dict.fromkeys(['id_producto', nombre_orden, *campos]))
+    consulta = select(*(columnas[c] for c in seleccion))
+
+    if despues:
+        valor, ultimo_id = _decodificar_cursor(despues)
+        if nombre_orden == 'id_producto':
+            consulta = consulta.where(col_id < ultimo_id if descendente else col_id > ultimo_id)
+        else:
+            pasado = col_orden < valor if descendente else col_orden > valor
+            consulta = consulta.where(pasado | ((col_orden == valor) & (col_id > ultimo_id)))
+
+    if nombre_orden == 'id_producto':
+        consulta = consulta.order_by(col_id.desc() if descendente else col_id)
+    else:
+        consulta = consulta.order_by(col_orden.desc() if descendente else col_orden, col_id)
+
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    filas = db.session.execute(consulta.limit(limite + 1), bind_arguments=bind_lectura()).mappings().all()
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    items = []
+    for fila in filas:
+        item = {c: fila[c] for c in campos}
+        if 'imagen_url' in item:
+            # Mismas URLs de imagen que el catálogo completo (Producto.fila_a_dict)
+            item.update(Producto.campos_imagen(item['imagen_url']))
+        items.append(item)
+
+    return {
+        'items': items,
+        'siguiente': _codificar_cursor(filas[-1][nombre_orden], filas[-1]['id_producto']) if hay_mas else None,
+    }
@@ -0,0 +1,65 @@
+import logging
+import sys
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Soporte para servir con hilos (gunicorn gthread) o greenlets (gevent).
+# - servidor_cooperativo(): True si gevent parcheó la biblioteca estándar; lo
+#   usan services/database.py (driver de MySQL) y services/hashing.py (pool de hilos reales).
+# - VerificadorSesiones: comprueba que cada sesión de SQLAlchemy se use desde un
+#   solo hilo/greenlet. Flask-SQLAlchemy crea una sesión por contexto de
+#   aplicación, así que compartirla indica un objeto de sesión (o un objeto ORM
+#   con carga diferida) guardado en estado global o pasado a otro hilo sin su
+#   propio app_context().
+
+
+def servidor_cooperativo():
+    """True si el proceso corre con gevent y los sockets están parcheados."""
+    if 'gevent' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('socket')
+
+
+class SesionCompartida(RuntimeError):
+    """Una sesión de SQLAlchemy se usó desde dos hilos o greenlets."""
+
+
+class VerificadorSesiones:
+    def __init__(self):
+        self.violaciones = 0
+        self.estricto = False
+        self._lock = threading.Lock()
+        self._registrado = False
+
+    def init_app(self, app):
+        """Con VERIFICAR_SESIONES activo; en TESTING una violación lanza SesionCompartida."""
+        if not app.config.get('VERIFICAR_SESIONES'):
+            return
+        self.estricto = self.estricto or app.testing
+        if not self._registrado:
+            # do_orm_execute cubre session.execute/scalars/get/query; after_begin, los flush
+            event.listen(Session, 'do_orm_execute', lambda estado: self._verificar(estado.session))
+            event.listen(Session, 'after_begin', lambda sesion, *args: self._verificar(sesion))
+            self._registrado = True
+
+    def _verificar(self, sesion):
+        # threading.get_ident() devuelve el id del greenlet cuando gevent parcheó threading
+        actual = threading.get_ident()
+        duena = sesion.info.setdefault('verificador_hilo', actual)
+        if duena == actual:
+            return
+        with self._lock:
+            self.violaciones += 1
+        mensaje = (f'Sesión de SQLAlchemy compartida entre hilos ({duena} y {actual}): '
+                   f'usa un app_context() propio en cada hilo')
+        if self.estricto:
+            raise SesionCompartida(mensaje)
+        if not sesion.info.get('verificador_reportada'):
+            sesion.info['verificador_reportada'] = True
+            logging.error(mensaje)
+
+
+verificador_sesiones = VerificadorSesiones()
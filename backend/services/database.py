@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.pool import QueuePool
+
+from models import db
+from services.concurrencia import servidor_cooperativo
+
+# Configuración de la conexión a MySQL.
+# La base de datos está detrás del proxy de Railway, que cierra las conexiones
+# inactivas; por eso se reciclan antes de ese límite y se validan con
+# pool_pre_ping al sacarlas del pool. Cada worker de gunicorn tiene su propio
+# pool, así que el máximo de conexiones abiertas es
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+
+DRIVERS = {
+    'mysqlconnector': 'mysql+mysqlconnector',
+    'pymysql': 'mysql+pymysql',
+}
+
+# Argumento de timeout de conexión de cada driver
+_TIMEOUT_CONEXION = {
+    'mysqlconnector': 'connection_timeout',
+    'pymysql': 'connect_timeout',
+}
+
+
+class _Estadisticas:
+    """Tiempos de espera para obtener una conexión del pool (por proceso)."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos, timeout=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timeout)
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+
+
+estadisticas = _Estadisticas()
+
+
+# Esperas por encima de este valor (segundos) se registran en el log: el pool se está quedando corto
+ESPERA_ALERTA = float(os.getenv('DB_POOL_ESPERA_ALERTA', '0.5'))
+
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada petición por una conexión."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            estadisticas.registrar(time.perf_counter() - inicio, timeout=True)
+            logging.error(f'Pool de conexiones agotado: {self.status()}')
+            raise
+        espera = time.perf_counter() - inicio
+        estadisticas.registrar(espera)
+        if espera > ESPERA_ALERTA:
+            logging.warning(f'Espera de {espera:.3f}s por una conexión del pool: {self.status()}')
+        return conexion
+
+
+def construir_uri(host=None, driver=None):
+    """URI de SQLAlchemy a partir de DATABASE_URL o de las variables DB_*."""
+    if os.getenv('DATABASE_URL') and host is None:
+        return os.getenv('DATABASE_URL')
+
+    driver = driver or os.getenv('DB_DRIVER', 'mysqlconnector')
+    if driver not in DRIVERS:
+        raise ValueError(f'DB_DRIVER desconocido: {driver} (opciones: {", ".join(DRIVERS)})')
+
+    host = host or os.getenv('DB_HOST', 'shuttle.proxy.rlwy.net:36862')
+    host, _, puerto = host.partition(':')
+    return URL.create(
+        DRIVERS[driver],
+        username=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASS', 'HBxkhSSKMDivRSTwDpzMlupGCZofbljA'),  # si usas XAMPP suele estar vacío
+        host=host,
+        port=int(puerto) if puerto else None,
+        database=os.getenv('DB_NAME', 'pasteleria_db'),
+    ).render_as_string(hide_password=False)
+
+
+def driver_cooperativo(uri):
+    """Con gevent, cambia los drivers de MySQL con extensión C por PyMySQL.
+
+    mysql-connector (con su extensión C) y mysqlclient hacen la E/S fuera de los
+    sockets de Python, así que una consulta bloquearía a todo el worker.
+    """
+    url = make_url(uri)
+    if not servidor_cooperativo() or url.get_backend_name() != 'mysql' or url.get_driver_name() == 'pymysql':
+        return uri
+    logging.warning(f'Worker gevent: se usa PyMySQL en lugar de {url.get_driver_name()} para MySQL')
+    return url.set(drivername='mysql+pymysql').render_as_string(hide_password=False)
+
+
+def opciones_engine(uri):
+    """Opciones del engine (pool, reciclado y timeouts) según el tipo de base de datos."""
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        # SQLite (pruebas/benchmarks) no necesita ajustes de pool
+        return {}
+
+    opciones = {
+        'poolclass': QueuePoolMedido,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '5')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        # Reciclar antes de que el proxy corte las conexiones inactivas
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '280')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1',
+    }
+    argumento_timeout = _TIMEOUT_CONEXION.get(url.get_driver_name())
+    if argumento_timeout:
+        opciones['connect_args'] = {argumento_timeout: int(os.getenv('DB_CONNECT_TIMEOUT', '5'))}
+    return opciones
+
+
+def configuracion_base_datos():
+    """Claves SQLALCHEMY_* para app.config.
+
+    Si se define DB_REPLICA_HOST (o DATABASE_REPLICA_URL) se registra el bind
+    'replica', que usan las lecturas hechas con `bind_lectura()`.
+    """
+    uri = driver_cooperativo(construir_uri())
+    config = {
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': opciones_engine(uri),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+    }
+
+    uri_replica = os.getenv('DATABASE_REPLICA_URL')
+    if not uri_replica and os.getenv('DB_REPLICA_HOST'):
+        uri_replica = construir_uri(host=os.getenv('DB_REPLICA_HOST'))
+    if uri_replica:
+        uri_replica = driver_cooperativo(uri_replica)
+        config['SQLALCHEMY_BINDS'] = {'replica': {'url': uri_replica, **opciones_engine(uri_replica)}}
+    return config
+
+
+def bind_lectura():
+    """`bind_arguments` para enviar una consulta de solo lectura a la réplica, si existe.
+
+    Uso: db.session.scalars(select(Producto), bind_arguments=bind_lectura())
+    """
+    if 'replica' in db.engines:
+        return {'bind': db.engines['replica']}
+    return {}
+
+
+def estadisticas_pool():
+    """Estado del pool principal y tiempos de espera acumulados de este proceso."""
+    pool = db.engine.pool
+    datos = {
+        'checkouts': estadisticas.checkouts,
+        'timeouts': estadisticas.timeouts,
+        'espera_total_segundos': round(estadisticas.espera_total, 6),
+        'espera_max_segundos': round(estadisticas.espera_max, 6),
+    }
+    if isinstance(pool, QueuePool):
+        datos.update({
+            'tamano': pool.size(),
+            'en_uso': pool.checkedout(),
+            'disponibles': pool.checkedin(),
+            'overflow': pool.overflow(),
+        })
+    return datos
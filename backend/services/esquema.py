@@ -0,0 +1,76 @@
+import logging
+import os
+import re
+
+from sqlalchemy import inspect, text
+
+from models import db, MigracionAplicada
+
+# Esquema de la base de datos como paso explícito del despliegue, no al importar
+# la aplicación (antes cada worker hacía db.create_all() contra la base remota al
+# arrancar, con una consulta de metadatos por tabla).
+# - crear_esquema(): base nueva; crea las tablas desde los modelos, que ya
+#   incluyen todas las migraciones, y las registra como aplicadas.
+# - aplicar_migraciones(): base existente; ejecuta en orden los archivos de
+#   migrations/*.sql que no estén en la tabla esquema_migraciones.
+# Los archivos .sql están escritos para MySQL.
+
+DIRECTORIO_MIGRACIONES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+_COMENTARIO = re.compile(r'^\s*--.*$', re.MULTILINE)
+
+
+def migraciones_disponibles(directorio=DIRECTORIO_MIGRACIONES):
+    """Nombres de los archivos .sql de migrations/, en orden de aplicación."""
+    return sorted(nombre for nombre in os.listdir(directorio) if nombre.endswith('.sql'))
+
+
+def sentencias(ruta):
+    """Sentencias de un archivo .sql (sin comentarios de línea, separadas por ';')."""
+    with open(ruta, encoding='utf-8') as f:
+        contenido = _COMENTARIO.sub('', f.read())
+    return [s.strip() for s in contenido.split(';') if s.strip()]
+
+
+def _tabla_migraciones():
+    MigracionAplicada.__table__.create(db.engine, checkfirst=True)
+
+
+def migraciones_aplicadas():
+    if not inspect(db.engine).has_table(MigracionAplicada.__tablename__):
+        return set()
+    return set(db.session.scalars(db.select(MigracionAplicada.nombre)))
+
+
+def migraciones_pendientes(directorio=DIRECTORIO_MIGRACIONES):
+    aplicadas = migraciones_aplicadas()
+    return [nombre for nombre in migraciones_disponibles(directorio) if nombre not in aplicadas]
+
+
+def crear_esquema(directorio=DIRECTORIO_MIGRACIONES):
+    """Crea las tablas que falten y marca todas las migraciones como aplicadas."""
+    db.create_all()
+    pendientes = migraciones_pendientes(directorio)
+    db.session.add_all(MigracionAplicada(nombre=nombre) for nombre in pendientes)
+    db.session.commit()
+    return pendientes
+
+
+def aplicar_migraciones(directorio=DIRECTORIO_MIGRACIONES, solo_marcar=False):
+    """Ejecuta en orden las migraciones pendientes y registra cada una al terminarla.
+
+    Con `solo_marcar` se registran sin ejecutarlas (bases donde ya se aplicaron a mano).
+    MySQL confirma cada DDL por separado: si una sentencia falla, el archivo
+    queda sin registrar y hay que revisarlo antes de volver a ejecutar.
+    """
+    _tabla_migraciones()
+    aplicadas = []
+    for nombre in migraciones_pendientes(directorio):
+        if not solo_marcar:
+            logging.info(f'Aplicando migración {nombre}')
+            for sentencia in sentencias(os.path.join(directorio, nombre)):
+                db.session.execute(text(sentencia))
+        db.session.add(MigracionAplicada(nombre=nombre))
+        db.session.commit()
+        aplicadas.append(nombre)
+    return aplicadas
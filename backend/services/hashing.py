@@ -0,0 +1,109 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+from services.concurrencia import servidor_cooperativo
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerifyMismatchError
+except ImportError:  # argon2-cffi es opcional
+    PasswordHasher = None
+
+# Hashing de contraseñas fuera del camino caliente de las peticiones.
+# PBKDF2/scrypt/argon2 son deliberadamente lentos: cada hash se ejecuta en un
+# pool de hilos acotado (hashlib y argon2 liberan el GIL) y un semáforo limita
+# cuántos logins pueden estar calculando a la vez, para que una ráfaga de
+# logins no ocupe todos los hilos del worker y deje sin atender al catálogo.
+# Con workers sync de gunicorn el límite solo aplica dentro de cada proceso.
+# Con gevent el pool es de hilos reales del sistema (los de threading serían
+# greenlets y el hash bloquearía a todas las peticiones del worker).
+
+
+class HashingSaturado(Exception):
+    """Hay demasiados hashes en curso; el cliente debe reintentar más tarde."""
+
+
+class ServicioHashing:
+    def __init__(self, algoritmo='pbkdf2', iteraciones=DEFAULT_PBKDF2_ITERATIONS, scrypt_n=2 ** 15,
+                 argon2_tiempo=3, argon2_memoria=65536, hilos=2, max_concurrentes=4, espera_max=2.0):
+        if algoritmo == 'argon2' and PasswordHasher is None:
+            logging.warning('HASH_ALGORITMO=argon2 pero argon2-cffi no está instalado; se usa pbkdf2')
+            algoritmo = 'pbkdf2'
+        if algoritmo not in ('pbkdf2', 'scrypt', 'argon2'):
+            raise ValueError(f'HASH_ALGORITMO desconocido: {algoritmo}')
+
+        self.algoritmo = algoritmo
+        self.metodo_werkzeug = {
+            'pbkdf2': f'pbkdf2:sha256:{iteraciones}',
+            'scrypt': f'scrypt:{scrypt_n}:8:1',
+        }.get(algoritmo)
+        self.argon2 = (PasswordHasher(time_cost=argon2_tiempo, memory_cost=argon2_memoria)
+                       if PasswordHasher is not None else None)
+        self.espera_max = espera_max
+        if servidor_cooperativo():
+            from gevent.threadpool import ThreadPoolExecutor as ThreadPoolExecutorNativo
+            self._executor = ThreadPoolExecutorNativo(max_workers=hilos)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='hashing')
+        self._cupos = threading.BoundedSemaphore(max_concurrentes)
+
+    @classmethod
+    def desde_entorno(cls):
+        return cls(
+            algoritmo=os.getenv('HASH_ALGORITMO', 'pbkdf2'),
+            iteraciones=int(os.getenv('HASH_PBKDF2_ITERACIONES', str(DEFAULT_PBKDF2_ITERATIONS))),
+            scrypt_n=int(os.getenv('HASH_SCRYPT_N', str(2 ** 15))),
+            argon2_tiempo=int(os.getenv('HASH_ARGON2_TIEMPO', '3')),
+            argon2_memoria=int(os.getenv('HASH_ARGON2_MEMORIA', '65536')),
+            hilos=int(os.getenv('HASH_HILOS', '2')),
+            max_concurrentes=int(os.getenv('HASH_MAX_CONCURRENTES', '4')),
+            espera_max=float(os.getenv('HASH_ESPERA_MAX', '2')),
+        )
+
+    def _ejecutar(self, funcion, *args):
+        if not self._cupos.acquire(timeout=self.espera_max):
+            raise HashingSaturado('Demasiadas solicitudes de autenticación, intenta de nuevo')
+        try:
+            return self._executor.submit(funcion, *args).result()
+        finally:
+            self._cupos.release()
+
+    def _hashear(self, password):
+        if self.algoritmo == 'argon2':
+            return self.argon2.hash(password)
+        return generate_password_hash(password, method=self.metodo_werkzeug, salt_length=16)
+
+    @staticmethod
+    def _verificar(argon2, password_hash, password):
+        if password_hash.startswith('$argon2'):
+            if argon2 is None:
+                raise RuntimeError('Hay hashes argon2 pero argon2-cffi no está instalado')
+            try:
+                return argon2.verify(password_hash, password)
+            except (VerifyMismatchError, InvalidHashError):
+                return False
+        return check_password_hash(password_hash, password)
+
+    def hashear(self, password):
+        return self._ejecutar(self._hashear, password)
+
+    def verificar(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._ejecutar(self._verificar, self.argon2, password_hash, password)
+
+    def necesita_rehash(self, password_hash):
+        """True si el hash se generó con otro algoritmo o costo que el configurado."""
+        if password_hash.startswith('$argon2'):
+            return self.algoritmo != 'argon2' or self.argon2.check_needs_rehash(password_hash)
+        if self.algoritmo == 'argon2':
+            return True
+        # Hashes de werkzeug: "pbkdf2:sha256:600000$sal$hash" o "scrypt:32768:8:1$sal$hash"
+        return password_hash.split('$', 1)[0] != self.metodo_werkzeug
+
+
+servicio_hashing = ServicioHashing.desde_entorno()
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, ClaveIdempotencia
+
+# Soporte para el encabezado Idempotency-Key.
+# La clave se guarda en la misma transacción que la operación, junto con la
+# respuesta que se dio; si el cliente reintenta con la misma clave se devuelve
+# esa respuesta sin repetir la operación. Si dos reintentos llegan a la vez,
+# la restricción única de `clave` hace fallar el commit del segundo, que
+# entonces devuelve la respuesta del primero.
+
+TTL_HORAS = int(os.getenv('IDEMPOTENCIA_TTL_HORAS', '24'))
+PURGAR_CADA = 500  # registros entre cada limpieza de claves vencidas
+
+_registros = 0
+_lock = threading.Lock()
+
+
+class ConflictoIdempotencia(Exception):
+    """La clave ya se usó con una petición diferente."""
+
+
+def huella_peticion(datos):
+    contenido = json.dumps(datos, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def respuesta_guardada(clave, huella):
+    """Respuesta Flask previa para `clave`, o None si la clave es nueva."""
+    registro = ClaveIdempotencia.query.filter_by(clave=clave).first()
+    if registro is None or registro.creado_en < datetime.utcnow() - timedelta(hours=TTL_HORAS):
+        return None
+    if registro.huella_peticion != huella:
+        raise ConflictoIdempotencia('Idempotency-Key ya usada con otra petición')
+
+    respuesta = current_app.response_class(registro.respuesta, status=registro.codigo, mimetype='application/json')
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def liberar_claves_vencidas(claves):
+    """Borra, en la transacción actual, las filas vencidas de `claves` que aún no se purgaron.
+
+    respuesta_guardada() ya las trata como claves nuevas; sin borrarlas, el
+    INSERT de la clave reutilizada chocaría con la restricción única.
+    """
+    limite = datetime.utcnow() - timedelta(hours=TTL_HORAS)
+    ClaveIdempotencia.query.filter(
+        ClaveIdempotencia.clave.in_(claves), ClaveIdempotencia.creado_en < limite
+    ).delete(synchronize_session=False)
+
+
+def registrar_clave(clave, huella, cuerpo, codigo):
+    """Agrega la clave a la sesión actual; se guarda con el commit de la operación."""
+    global _registros
+    liberar_claves_vencidas([clave])
+    db.session.add(ClaveIdempotencia(
+        clave=clave,
+        huella_peticion=huella,
+        codigo=codigo,
+        respuesta=current_app.json.dumps(cuerpo),
+    ))
+
+    with _lock:
+        _registros += 1
+        purgar = _registros % PURGAR_CADA == 0
+    if purgar:
+        limite = datetime.utcnow() - timedelta(hours=TTL_HORAS)
+        ClaveIdempotencia.query.filter(ClaveIdempotencia.creado_en < limite).delete(synchronize_session=False)
@@ -0,0 +1,175 @@
+import hashlib
+import io
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from services.medios import medios
+
+# Variantes responsivas de las imágenes de productos.
+# `flask imagenes generar` redimensiona cada imagen de static/images a varios
+# anchos, en WebP y JPEG, dentro de static/images/variantes/ con el hash del
+# contenido en el nombre (`pay_limon-640w.1a2b3c4d.webp`), así que el índice
+# de medios las sirve con cache inmutable. El resultado queda en
+# variantes/manifest.json, que usa Producto.to_dict() para armar el srcset.
+# Es incremental: una imagen cuyo hash y parámetros no cambiaron se omite.
+
+ANCHOS = (320, 640, 960)
+FORMATOS = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+EXTENSIONES = ('.jpg', '.jpeg', '.png')
+DIRECTORIO_VARIANTES = 'variantes'
+MANIFIESTO = 'manifest.json'
+
+
+def _pillow():
+    # Pillow es opcional y solo lo necesita `flask imagenes generar`; se importa
+    # aquí para no cargarlo en cada arranque de la aplicación (models importa este módulo)
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError('Pillow no está instalado: pip install Pillow')
+    return Image
+
+
+def _hash_bytes(datos):
+    return hashlib.blake2b(datos, digest_size=16).hexdigest()
+
+
+def _procesar_imagen(origen, destino, nombre, anchos, calidad):
+    """Genera las variantes de una imagen (se ejecuta en otro proceso)."""
+    Image = _pillow()
+    with open(origen, 'rb') as archivo:
+        datos = archivo.read()
+    imagen = Image.open(io.BytesIO(datos))
+    imagen.load()
+    if imagen.mode not in ('RGB', 'RGBA'):
+        imagen = imagen.convert('RGB')
+
+    base = os.path.splitext(nombre)[0]
+    variantes = []
+    # Solo anchos menores que el original; si no hay ninguno se intenta un WebP
+    # del mismo tamaño, que se descarta si no pesa menos que el archivo original
+    anchos_menores = sorted(a for a in anchos if a < imagen.width)
+    trabajos = [(a, f) for a in anchos_menores for f in FORMATOS] or [(imagen.width, 'webp')]
+    for ancho, formato in trabajos:
+        alto = round(imagen.height * ancho / imagen.width)
+        redimensionada = imagen if ancho == imagen.width else imagen.resize((ancho, alto), Image.LANCZOS)
+        salida = io.BytesIO()
+        if formato == 'jpeg':
+            redimensionada.convert('RGB').save(salida, 'JPEG', quality=calidad, optimize=True, progressive=True)
+            extension = 'jpg'
+        else:
+            redimensionada.save(salida, 'WEBP', quality=calidad, method=6)
+            extension = 'webp'
+        contenido = salida.getvalue()
+        if not anchos_menores and len(contenido) >= len(datos):
+            continue
+        archivo_variante = f'{base}-{ancho}w.{_hash_bytes(contenido)[:8]}.{extension}'
+        with open(os.path.join(destino, archivo_variante), 'wb') as archivo:
+            archivo.write(contenido)
+        variantes.append({'ancho': ancho, 'formato': formato, 'archivo': archivo_variante})
+
+    return nombre, {'hash': _hash_bytes(datos), 'anchos': list(anchos), 'calidad': calidad, 'variantes': variantes}
+
+
+def generar_variantes(directorio, anchos=ANCHOS, calidad=80, procesos=None, forzar=False):
+    """Genera las variantes que falten en `directorio`/variantes y actualiza el manifiesto.
+
+    Devuelve `{'generadas': [...], 'omitidas': n, 'eliminadas': n, 'errores': {...}}`.
+    """
+    _pillow()
+
+    destino = os.path.join(directorio, DIRECTORIO_VARIANTES)
+    os.makedirs(destino, exist_ok=True)
+    manifiesto = _leer_manifiesto(destino)
+    anchos = sorted(anchos)
+
+    pendientes, vigentes = [], {}
+    for nombre in sorted(os.listdir(directorio)):
+        origen = os.path.join(directorio, nombre)
+        if not nombre.lower().endswith(EXTENSIONES) or not os.path.isfile(origen):
+            continue
+        previo = manifiesto.get(nombre)
+        with open(origen, 'rb') as archivo:
+            hash_actual = _hash_bytes(archivo.read())
+        if (not forzar and previo and previo['hash'] == hash_actual and previo.get('anchos') == anchos
+                and previo.get('calidad') == calidad
+                and all(os.path.exists(os.path.join(destino, v['archivo'])) for v in previo['variantes'])):
+            vigentes[nombre] = previo
+        else:
+            pendientes.append(nombre)
+
+    resultado = {'generadas': [], 'omitidas': len(vigentes), 'eliminadas': 0, 'errores': {}}
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = {
+                nombre: pool.submit(_procesar_imagen, os.path.join(directorio, nombre), destino, nombre, anchos, calidad)
+                for nombre in pendientes
+            }
+            for nombre, futuro in futuros.items():
+                try:
+                    _, entrada = futuro.result()
+                except Exception as e:
+                    resultado['errores'][nombre] = str(e)
+                    continue
+                vigentes[nombre] = entrada
+                resultado['generadas'].append(nombre)
+
+    # Borrar variantes que ya no están en el manifiesto (imágenes cambiadas o eliminadas)
+    en_uso = {v['archivo'] for entrada in vigentes.values() for v in entrada['variantes']}
+    for archivo in os.listdir(destino):
+        if archivo != MANIFIESTO and archivo not in en_uso:
+            os.remove(os.path.join(destino, archivo))
+            resultado['eliminadas'] += 1
+
+    _escribir_manifiesto(destino, vigentes)
+    return resultado
+
+
+def _leer_manifiesto(destino):
+    try:
+        with open(os.path.join(destino, MANIFIESTO), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        logging.warning(f'{MANIFIESTO} de variantes dañado; se regeneran todas las imágenes')
+        return {}
+
+
+def _escribir_manifiesto(destino, manifiesto):
+    temporal = os.path.join(destino, MANIFIESTO + '.tmp')
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=2, sort_keys=True)
+    os.replace(temporal, os.path.join(destino, MANIFIESTO))
+
+
+class VariantesImagenes:
+    """Manifiesto de variantes cargado en memoria para armar los srcset."""
+
+    def __init__(self):
+        self._srcset = {}
+
+    def cargar(self, directorio, prefijo_url='static/images'):
+        destino = os.path.join(directorio, DIRECTORIO_VARIANTES)
+        srcset = {}
+        for nombre, entrada in _leer_manifiesto(destino).items():
+            if not entrada['variantes']:
+                continue
+            por_formato = {}
+            for v in entrada['variantes']:
+                url = f"{medios.url_base}/{prefijo_url}/{DIRECTORIO_VARIANTES}/{v['archivo']}"
+                por_formato.setdefault(FORMATOS[v['formato']], []).append(f"{url} {v['ancho']}w")
+            srcset[nombre] = {tipo: ', '.join(urls) for tipo, urls in por_formato.items()}
+        self._srcset = srcset
+        return len(srcset)
+
+    def srcset(self, imagen_url):
+        """`{'image/webp': 'url 320w, ...', 'image/jpeg': ...}` o None si no hay variantes."""
+        if not imagen_url:
+            return None
+        return self._srcset.get(imagen_url.rsplit('/', 1)[-1])
+
+
+variantes_imagenes = VariantesImagenes()
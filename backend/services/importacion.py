@@ -0,0 +1,178 @@
+import csv
+import io
+import json
+import math
+
+from sqlalchemy import insert, select, update
+
+from models import db, Producto
+
+# Importación y exportación masiva del catálogo.
+# La importación lee el archivo como stream (CSV o NDJSON), valida cada fila y
+# escribe en lotes: un SELECT por lote para encontrar los productos que ya
+# existen (por nombre) y un INSERT/UPDATE executemany por lote, todo dentro de
+# una sola transacción. La exportación recorre la tabla con yield_per y genera
+# el archivo línea por línea sin cargarlo completo en memoria.
+
+FORMATOS = ('csv', 'ndjson')
+CAMPOS = ('nombre', 'descripcion', 'precio', 'imagen_url', 'categoria')
+TIPOS_CONTENIDO = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+class ErrorImportacion(Exception):
+    def __init__(self, errores):
+        super().__init__(f'{len(errores)} fila(s) inválida(s)')
+        self.errores = errores
+
+
+def detectar_formato(tipo_contenido, formato=None):
+    if formato:
+        formato = formato.lower()
+    elif tipo_contenido and 'csv' in tipo_contenido:
+        formato = 'csv'
+    elif tipo_contenido and ('ndjson' in tipo_contenido or 'jsonl' in tipo_contenido):
+        formato = 'ndjson'
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato no soportado: {formato} (usa csv o ndjson)')
+    return formato
+
+
+def leer_filas(stream, formato):
+    """Genera `(numero_de_fila, dict)` desde un stream binario o de texto."""
+    texto = stream if isinstance(stream, io.TextIOBase) else io.TextIOWrapper(stream, encoding='utf-8-sig')
+    if formato == 'csv':
+        for numero, fila in enumerate(csv.DictReader(texto), start=2):  # la fila 1 es el encabezado
+            yield numero, fila
+        return
+
+    for numero, linea in enumerate(texto, start=1):
+        if not linea.strip():
+            continue
+        try:
+            yield numero, json.loads(linea)
+        except ValueError:
+            yield numero, None
+
+
+# Longitud máxima de las columnas de texto de Producto (las demás son Text)
+LONGITUDES = {'nombre': 100, 'imagen_url': 200, 'categoria': 50}
+
+
+def _texto(fila, campo):
+    """Valor de texto de `campo` sin espacios alrededor (None si viene vacío) o ValueError."""
+    valor = fila.get(campo)
+    if valor is None:
+        return None
+    if not isinstance(valor, str):
+        raise ValueError(f'{campo} debe ser texto')
+    valor = valor.strip()
+    if campo in LONGITUDES and len(valor) > LONGITUDES[campo]:
+        raise ValueError(f'{campo} de más de {LONGITUDES[campo]} caracteres')
+    return valor or None
+
+
+def validar_fila(fila):
+    """Devuelve los valores listos para insertar o lanza ValueError."""
+    if not isinstance(fila, dict):
+        raise ValueError('no es un objeto JSON válido')
+
+    nombre = _texto(fila, 'nombre')
+    if not nombre:
+        raise ValueError('falta nombre')
+    precio = fila.get('precio')
+    # bool es subclase de int; "nan"/"inf" los acepta float() pero no la base de datos
+    if isinstance(precio, bool) or not isinstance(precio, (int, float, str)):
+        raise ValueError('precio inválido')
+    try:
+        precio = float(precio)
+    except ValueError:
+        raise ValueError('precio inválido')
+    if not math.isfinite(precio):
+        raise ValueError('precio inválido')
+    if precio < 0:
+        raise ValueError('precio negativo')
+
+    valores = {'nombre': nombre, 'precio': precio}
+    # Las columnas opcionales que no vienen en la fila no se tocan al actualizar
+    for campo in ('descripcion', 'imagen_url'):
+        if campo in fila:
+            valores[campo] = _texto(fila, campo)
+    if 'categoria' in fila:
+        categoria = _texto(fila, 'categoria')
+        valores['categoria'] = categoria.lower() if categoria else None
+    return valores
+
+
+def _escribir_lote(lote):
+    # Si el mismo nombre aparece dos veces en el lote gana la última fila
+    por_nombre = {valores['nombre']: valores for valores in lote}
+    existentes = dict(db.session.execute(
+        select(Producto.nombre, Producto.id_producto).where(Producto.nombre.in_(por_nombre))
+    ).all())
+
+    nuevos = [{**dict.fromkeys(CAMPOS), **v} for nombre, v in por_nombre.items() if nombre not in existentes]
+    cambios = [{**v, 'id_producto': existentes[nombre]} for nombre, v in por_nombre.items() if nombre in existentes]
+    if nuevos:
+        db.session.execute(insert(Producto), nuevos)
+    if cambios:
+        # UPDATE por llave primaria en modo executemany
+        db.session.execute(update(Producto), cambios)
+    return len(nuevos), len(cambios)
+
+
+def importar_productos(filas, tamano_lote=500, estricto=False):
+    """Importa `(numero, fila)` en lotes dentro de una transacción (upsert por nombre).
+
+    Las filas inválidas se omiten y se reportan; con `estricto` cualquier
+    error cancela toda la importación (ErrorImportacion). No hace commit:
+    lo decide quien llama.
+    """
+    resultado = {'insertados': 0, 'actualizados': 0, 'errores': []}
+    lote = []
+
+    def vaciar():
+        insertados, actualizados = _escribir_lote(lote)
+        resultado['insertados'] += insertados
+        resultado['actualizados'] += actualizados
+        lote.clear()
+
+    for numero, fila in filas:
+        try:
+            lote.append(validar_fila(fila))
+        except ValueError as e:
+            resultado['errores'].append({'fila': numero, 'error': str(e)})
+            if estricto:
+                raise ErrorImportacion(resultado['errores'])
+            continue
+        if len(lote) >= tamano_lote:
+            vaciar()
+    if lote:
+        vaciar()
+    return resultado
+
+
+def exportar_productos(formato, tamano_lote=500):
+    """Genera el catálogo como texto CSV o NDJSON, fila por fila."""
+    columnas = ['id_producto', *CAMPOS]
+    consulta = (
+        select(*(Producto.__table__.columns[c] for c in columnas))
+        .order_by(Producto.id_producto)
+        .execution_options(yield_per=tamano_lote)
+    )
+    filas = db.session.execute(consulta).mappings()
+
+    if formato == 'ndjson':
+        for fila in filas:
+            yield json.dumps(dict(fila), ensure_ascii=False) + '\n'
+        return
+
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=columnas)
+    escritor.writeheader()
+    for fila in filas:
+        escritor.writerow(fila)
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+
+from flask import abort, current_app, request, send_file
+
+# Archivos estáticos (imágenes y videos) servidos desde un índice.
+# Al iniciar se recorren los directorios una sola vez y cada archivo queda con
+# su ruta absoluta, tamaño y hash de contenido; las peticiones no tocan el
+# sistema de archivos para buscar. Los hashes se guardan en
+# instance/medios_hashes.json por tamaño y mtime, así que solo se leen los
+# archivos nuevos o modificados (`flask imagenes generar` lo actualiza). Además:
+# - URLs con hash (`/static/images/pay_limon.1a2b3c4d.jpg`) que se pueden
+#   cachear como inmutables en el navegador o en un CDN (`url()`).
+# - Range (206) para que el navegador pueda adelantar los videos.
+# - Variantes generadas offline: `foto.webp` junto a `foto.jpg` se entrega a
+#   los navegadores que aceptan WebP, y `archivo.br`/`archivo.gz` a los que
+#   aceptan esa codificación (solo tipos de texto, p. ej. SVG).
+# Con MEDIOS_X_SENDFILE=1 el proxy (nginx/apache) envía el archivo y el worker
+# de gunicorn queda libre en cuanto responde los encabezados.
+
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+TIPOS_COMPRIMIBLES = ('image/svg+xml', 'text/', 'application/json', 'application/javascript')
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+EXTENSIONES_WEBP = ('.jpg', '.jpeg', '.png')
+
+_HASH_EN_NOMBRE = re.compile(r'^(?P<base>.+)\.(?P<hash>[0-9a-f]{8})(?P<ext>\.[^.]+)$')
+
+
+@dataclass
+class Medio:
+    ruta: str
+    tamano: int
+    hash: str
+    tipo: str
+    webp: 'Medio' = None
+    codificaciones: dict = field(default_factory=dict)  # 'br'/'gzip' -> Medio
+
+
+def _hash_archivo(ruta, bloque=1024 * 1024):
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as archivo:
+        while datos := archivo.read(bloque):
+            h.update(datos)
+    return h.hexdigest()
+
+
+def _medio(ruta, hashes):
+    """Medio de `ruta`; el hash se toma de `hashes` si el archivo no cambió (tamaño y mtime)."""
+    tipo = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+    estado = os.stat(ruta)
+    guardado = hashes.get(ruta)
+    if guardado and guardado[:2] == [estado.st_size, estado.st_mtime_ns]:
+        hash_ = guardado[2]
+    else:
+        hash_ = _hash_archivo(ruta)
+        hashes[ruta] = [estado.st_size, estado.st_mtime_ns, hash_]
+    return Medio(ruta=ruta, tamano=estado.st_size, hash=hash_, tipo=tipo)
+
+
+def _leer_hashes(archivo):
+    try:
+        with open(archivo, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_hashes(archivo, hashes):
+    # Varios workers pueden arrancar a la vez: se escribe en un temporal y se reemplaza
+    try:
+        os.makedirs(os.path.dirname(archivo), exist_ok=True)
+        temporal = f'{archivo}.{os.getpid()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(hashes, f)
+        os.replace(temporal, archivo)
+    except OSError as e:
+        logging.warning(f'No se pudo guardar el cache de hashes de medios en {archivo}: {e}')
+
+
+class IndiceMedios:
+    """Índice de `prefijo/ruta` -> Medio para los directorios montados con `montar()`.
+
+    Si dos directorios tienen el mismo prefijo gana el primero que contenga el archivo.
+    """
+
+    def __init__(self, max_age=3600, url_base=''):
+        self.max_age = max_age  # para las URLs sin hash
+        self.url_base = url_base.rstrip('/')
+        self._montajes = []
+        self._medios = {}
+        self._archivo_hashes = None
+
+    @classmethod
+    def desde_entorno(cls):
+        return cls(
+            max_age=int(os.getenv('MEDIOS_MAX_AGE', '3600')),
+            url_base=os.getenv('MEDIOS_URL_BASE', ''),  # p. ej. un CDN delante del backend
+        )
+
+    def montar(self, prefijo, directorio):
+        montaje = (prefijo.strip('/'), os.path.abspath(directorio))
+        if montaje not in self._montajes:  # create_app puede llamarse más de una vez
+            self._montajes.append(montaje)
+
+    def construir(self, archivo_hashes=None):
+        """Recorre los directorios montados y reemplaza el índice.
+
+        Con `archivo_hashes` (JSON de ruta -> [tamaño, mtime, hash]) solo se
+        vuelven a hashear los archivos nuevos o modificados, así que arrancar un
+        worker no lee el contenido de cada imagen y video.
+        """
+        archivo_hashes = archivo_hashes or self._archivo_hashes
+        self._archivo_hashes = archivo_hashes
+        previos = _leer_hashes(archivo_hashes) if archivo_hashes else {}
+        hashes = {}
+        medios = {}
+        for prefijo, directorio in self._montajes:
+            if not os.path.isdir(directorio):
+                continue
+            for raiz, _, archivos in os.walk(directorio):
+                for nombre in archivos:
+                    completa = os.path.join(raiz, nombre)
+                    relativa = os.path.relpath(completa, directorio).replace(os.sep, '/')
+                    clave = f'{prefijo}/{relativa}'
+                    if clave not in medios:
+                        if completa in previos:
+                            hashes[completa] = previos[completa]
+                        medios[clave] = _medio(completa, hashes)
+
+        # Enlazar las variantes con su original
+        for clave, medio in medios.items():
+            base, extension = os.path.splitext(clave)
+            if extension.lower() in EXTENSIONES_WEBP:
+                medio.webp = medios.get(base + '.webp')
+            if medio.tipo.startswith(TIPOS_COMPRIMIBLES):
+                for codificacion, sufijo in CODIFICACIONES:
+                    if clave + sufijo in medios:
+                        medio.codificaciones[codificacion] = medios[clave + sufijo]
+
+        self._medios = medios
+        if archivo_hashes and hashes != previos:
+            _guardar_hashes(archivo_hashes, hashes)
+        logging.info(f'Índice de medios: {len(medios)} archivos')
+        return len(medios)
+
+    def buscar(self, clave):
+        return self._medios.get(clave)
+
+    def url(self, clave):
+        """URL con el hash de contenido para `clave` (p. ej. 'static/images/pay_limon.jpg').
+
+        Devuelve None si el archivo no está en el índice.
+        """
+        medio = self._medios.get(clave)
+        if medio is None:
+            return None
+        base, extension = os.path.splitext(clave)
+        return f'{self.url_base}/{base}.{medio.hash[:8]}{extension}'
+
+    def _resolver(self, clave):
+        """`(medio, inmutable)`; acepta la ruta normal o la versión con hash."""
+        coincidencia = _HASH_EN_NOMBRE.match(clave)
+        medio = self._medios.get(clave)
+        if medio is not None:
+            # Archivos que ya llevan su hash en el nombre (p. ej. las variantes de services/imagenes.py)
+            return medio, bool(coincidencia) and medio.hash.startswith(coincidencia['hash'])
+        if coincidencia:
+            medio = self._medios.get(coincidencia['base'] + coincidencia['ext'])
+            if medio is not None:
+                # Un hash viejo (deploy anterior) recibe el archivo actual sin cache inmutable
+                return medio, medio.hash.startswith(coincidencia['hash'])
+        return None, False
+
+    def servir(self, clave):
+        medio, inmutable = self._resolver(clave)
+        if medio is None and current_app.debug:
+            # En desarrollo se aceptan archivos agregados después de arrancar
+            self.construir()
+            medio, inmutable = self._resolver(clave)
+        if medio is None:
+            abort(404)
+
+        # Variante a entregar según Accept / Accept-Encoding
+        enviar, codificacion, vary = medio, None, []
+        if medio.webp is not None:
+            vary.append('Accept')
+            # Solo si lo pide explícitamente (los navegadores lo envían en las peticiones de <img>)
+            if 'image/webp' in request.accept_mimetypes.values():
+                enviar = medio.webp
+        if medio.codificaciones:
+            vary.append('Accept-Encoding')
+            for nombre, variante in medio.codificaciones.items():
+                if nombre in request.accept_encodings:
+                    enviar, codificacion = variante, nombre
+                    break
+
+        # send_file maneja If-None-Match/If-Modified-Since y Range (206)
+        respuesta = send_file(
+            enviar.ruta,
+            mimetype=medio.tipo if codificacion else enviar.tipo,
+            etag=enviar.hash,
+            conditional=True,
+            max_age=None,
+        )
+        respuesta.headers['Cache-Control'] = CACHE_INMUTABLE if inmutable else f'public, max-age={self.max_age}'
+        if codificacion:
+            respuesta.headers['Content-Encoding'] = codificacion
+        if vary:
+            respuesta.vary.update(vary)
+        return respuesta
+
+
+medios = IndiceMedios.desde_entorno()
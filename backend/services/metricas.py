@@ -0,0 +1,212 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Métricas de rendimiento por petición, expuestas en formato Prometheus (/metrics).
+# - Latencia por endpoint (histograma) y peticiones por código de respuesta.
+# - Consultas SQL y tiempo en la base de datos por petición, medidos con los
+#   eventos before/after_cursor_execute de SQLAlchemy (todos los engines).
+# - Llamadas a servicios externos (Mercado Pago) con su propio histograma, para
+#   separar la latencia de la API de la de nuestra base de datos.
+# - Aviso de posible N+1: una petición que supera el umbral de consultas o que
+#   repite la misma sentencia muchas veces queda en el log con la sentencia.
+# Cada worker de gunicorn tiene sus propias métricas; Prometheus debe leer cada
+# proceso o sumar por instancia.
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect.bisect_left(self.buckets, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+def _etiquetas(**etiquetas):
+    partes = []
+    for nombre, valor in etiquetas.items():
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{nombre}="{valor}"')
+    return ','.join(partes)
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Metricas:
+    def __init__(self, umbral_consultas=20, umbral_repeticiones=10):
+        self.umbral_consultas = umbral_consultas
+        self.umbral_repeticiones = umbral_repeticiones
+        self._lock = threading.Lock()
+        self._latencias = {}      # (endpoint, método) -> Histograma
+        self._consultas = {}      # (endpoint, método) -> Histograma de consultas por petición
+        self._peticiones = Counter()  # (endpoint, método, código) -> n
+        self._segundos_db = Counter()  # endpoint -> segundos
+        self._segundos_externos = Counter()  # endpoint -> segundos
+        self._n_mas_uno = Counter()  # endpoint -> n
+        self._externos = {}       # (servicio, operación) -> Histograma
+        self._errores_externos = Counter()
+        self._consultas_fuera = 0  # consultas de hilos en segundo plano (webhooks, buffer de pedidos)
+        self._segundos_db_fuera = 0.0
+        self._eventos_registrados = False
+
+    @classmethod
+    def desde_entorno(cls):
+        return cls(
+            umbral_consultas=int(os.getenv('METRICAS_UMBRAL_CONSULTAS', '20')),
+            umbral_repeticiones=int(os.getenv('METRICAS_UMBRAL_REPETICIONES', '10')),
+        )
+
+    def init_app(self, app):
+        app.before_request(self._inicio_peticion)
+        app.after_request(self._fin_peticion)
+        if not self._eventos_registrados:
+            event.listen(Engine, 'before_cursor_execute', self._antes_sql)
+            event.listen(Engine, 'after_cursor_execute', self._despues_sql)
+            self._eventos_registrados = True
+
+    # --- Peticiones
+
+    def _inicio_peticion(self):
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_consultas = Counter()
+        g.metricas_segundos_db = 0.0
+        g.metricas_segundos_externos = 0.0
+
+    def _fin_peticion(self, respuesta):
+        inicio = g.get('metricas_inicio')
+        if inicio is None:
+            return respuesta
+        duracion = time.perf_counter() - inicio
+        endpoint = request.endpoint or 'sin_ruta'
+        clave = (endpoint, request.method)
+        consultas = g.metricas_consultas
+        total_consultas = sum(consultas.values())
+
+        with self._lock:
+            self._latencias.setdefault(clave, Histograma(BUCKETS_SEGUNDOS)).observar(duracion)
+            self._consultas.setdefault(clave, Histograma(BUCKETS_CONSULTAS)).observar(total_consultas)
+            self._peticiones[(endpoint, request.method, respuesta.status_code)] += 1
+            self._segundos_db[endpoint] += g.metricas_segundos_db
+            self._segundos_externos[endpoint] += g.metricas_segundos_externos
+
+        if consultas:
+            sentencia, repeticiones = consultas.most_common(1)[0]
+            if total_consultas > self.umbral_consultas or repeticiones >= self.umbral_repeticiones:
+                with self._lock:
+                    self._n_mas_uno[endpoint] += 1
+                logging.warning(
+                    f'Posible N+1 en {request.method} {request.path} ({endpoint}): {total_consultas} consultas, '
+                    f'{repeticiones} veces: {" ".join(sentencia.split())[:200]}'
+                )
+        return respuesta
+
+    # --- SQL
+
+    def _antes_sql(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metricas_inicio_sql', []).append(time.perf_counter())
+
+    def _despues_sql(self, conn, cursor, statement, parameters, context, executemany):
+        pila = conn.info.get('metricas_inicio_sql')
+        if not pila:
+            return
+        segundos = time.perf_counter() - pila.pop()
+        if has_request_context() and 'metricas_consultas' in g:
+            g.metricas_consultas[statement] += 1
+            g.metricas_segundos_db += segundos
+        else:
+            with self._lock:
+                self._consultas_fuera += 1
+                self._segundos_db_fuera += segundos
+
+    # --- Servicios externos
+
+    def observador_externo(self, servicio):
+        """Función `(operacion, segundos, error)` para registrar llamadas a `servicio`."""
+        def observar(operacion, segundos, error):
+            with self._lock:
+                self._externos.setdefault((servicio, operacion), Histograma(BUCKETS_SEGUNDOS)).observar(segundos)
+                if error:
+                    self._errores_externos[(servicio, operacion)] += 1
+            if has_request_context() and 'metricas_segundos_externos' in g:
+                g.metricas_segundos_externos += segundos
+        return observar
+
+    # --- Exposición
+
+    def prometheus(self, extras=None, contadores=None):
+        """Texto en formato de exposición de Prometheus.
+
+        `extras` son gauges y `contadores` valores acumulados desde el arranque
+        (nombres terminados en `_total`), ambos `{nombre: (ayuda, valor)}`.
+        """
+        lineas = []
+
+        def histograma(nombre, ayuda, datos, etiquetas):
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} histogram')
+            for clave, h in sorted(datos.items()):
+                base = _etiquetas(**dict(zip(etiquetas, clave)))
+                acumulado = 0
+                for limite, conteo in zip((*h.buckets, '+Inf'), h.conteos):
+                    acumulado += conteo
+                    lineas.append(f'{nombre}_bucket{{{base},le="{limite}"}} {acumulado}')
+                lineas.append(f'{nombre}_sum{{{base}}} {_numero(h.suma)}')
+                lineas.append(f'{nombre}_count{{{base}}} {h.total}')
+
+        def contador(nombre, ayuda, datos, etiquetas):
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} counter')
+            for clave, valor in sorted(datos.items()):
+                clave = clave if isinstance(clave, tuple) else (clave,)
+                base = _etiquetas(**dict(zip(etiquetas, clave)))
+                lineas.append(f'{nombre}{{{base}}} {_numero(valor)}' if base else f'{nombre} {_numero(valor)}')
+
+        with self._lock:
+            histograma('http_peticion_duracion_segundos', 'Latencia de las peticiones por endpoint.',
+                       self._latencias, ('endpoint', 'metodo'))
+            contador('http_peticiones_total', 'Peticiones atendidas por endpoint y código.',
+                     self._peticiones, ('endpoint', 'metodo', 'codigo'))
+            histograma('sql_consultas_por_peticion', 'Sentencias SQL ejecutadas en cada petición.',
+                       self._consultas, ('endpoint', 'metodo'))
+            contador('sql_duracion_segundos_total', 'Tiempo acumulado en la base de datos por endpoint.',
+                     self._segundos_db, ('endpoint',))
+            contador('sql_n_mas_uno_total', 'Peticiones que superaron el umbral de consultas (posible N+1).',
+                     self._n_mas_uno, ('endpoint',))
+            contador('sql_consultas_segundo_plano_total', 'Sentencias SQL fuera de peticiones (hilos de fondo).',
+                     {'': self._consultas_fuera}, ())
+            contador('sql_duracion_segundo_plano_segundos_total', 'Tiempo en la base de datos fuera de peticiones.',
+                     {'': self._segundos_db_fuera}, ())
+            histograma('externo_duracion_segundos', 'Latencia de las llamadas a servicios externos.',
+                       self._externos, ('servicio', 'operacion'))
+            contador('externo_errores_total', 'Llamadas a servicios externos fallidas.',
+                     self._errores_externos, ('servicio', 'operacion'))
+            contador('externo_duracion_segundos_por_endpoint_total',
+                     'Tiempo acumulado en servicios externos por endpoint.',
+                     self._segundos_externos, ('endpoint',))
+
+        for tipo, valores in (('counter', contadores), ('gauge', extras)):
+            for nombre, (ayuda, valor) in sorted((valores or {}).items()):
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} {tipo}')
+                lineas.append(f'{nombre} {_numero(valor)}')
+        return '\n'.join(lineas) + '\n'
+
+
+metricas = Metricas.desde_entorno()
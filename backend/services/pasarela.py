@@ -0,0 +1,185 @@
+import os
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# Pasarela de pagos compartida por toda la aplicación.
+# El SDK de Mercado Pago crea una requests.Session nueva en cada llamada (con
+# su handshake TLS); aquí se usa un único cliente HTTP con pool de conexiones
+# keep-alive, timeouts, reintentos, un circuit breaker y métricas de latencia.
+# El SDK se importa y se crea en la primera llamada, no al arrancar cada worker.
+
+MERCADOPAGO_API_BASE = 'https://api.mercadopago.com'
+
+
+class CircuitoAbierto(Exception):
+    """Mercado Pago falló demasiadas veces seguidas; no se intenta la llamada."""
+
+
+class CircuitBreaker:
+    def __init__(self, max_fallos=5, reintentar_en=30):
+        self.max_fallos = max_fallos
+        self.reintentar_en = reintentar_en
+        self.fallos = 0
+        self.abierto_desde = None
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        with self._lock:
+            if self.abierto_desde is None:
+                return
+            if time.monotonic() - self.abierto_desde < self.reintentar_en:
+                raise CircuitoAbierto('Mercado Pago no disponible temporalmente')
+            # Semiabierto: se deja pasar una llamada de prueba
+            self.abierto_desde = time.monotonic()
+
+    def exito(self):
+        with self._lock:
+            self.fallos = 0
+            self.abierto_desde = None
+
+    def fallo(self):
+        with self._lock:
+            self.fallos += 1
+            if self.fallos >= self.max_fallos:
+                self.abierto_desde = time.monotonic()
+
+
+class ClienteHttpPooled:
+    """Reemplazo del HttpClient del SDK que reutiliza una sola sesión HTTP.
+
+    No hereda de la clase del SDK para no importarlo al cargar el módulo; el
+    SDK lo recibe envuelto en `_adaptador_sdk()` al crearse.
+
+    Con `base_url` las llamadas se redirigen a otro servidor (p. ej. un stub
+    local en pruebas) en lugar de api.mercadopago.com. `observador`, si se
+    pasa, recibe `(operacion, segundos, error)` de cada llamada (métricas).
+    """
+
+    def __init__(self, timeout=(3.05, 10), reintentos=2, pool=10, base_url=None, breaker=None, observador=None):
+        self.timeout = timeout
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.breaker = breaker or CircuitBreaker()
+        self.observador = observador
+        self.session = requests.Session()
+        # Solo se reintentan métodos idempotentes para no duplicar preferencias
+        adaptador = HTTPAdapter(
+            pool_connections=pool,
+            pool_maxsize=pool,
+            max_retries=Retry(total=reintentos, backoff_factor=0.3,
+                              status_forcelist=[429, 500, 502, 503, 504]),
+        )
+        self.session.mount('https://', adaptador)
+        self.session.mount('http://', adaptador)
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, maxretries=None, **kwargs):
+        if self.base_url and url.startswith(MERCADOPAGO_API_BASE):
+            url = self.base_url + url[len(MERCADOPAGO_API_BASE):]
+        # El SDK siempre pasa su propio timeout (60 s por defecto): se reemplaza por el configurado
+        kwargs['timeout'] = self.timeout
+
+        self.breaker.permitir()
+        operacion = f'{method} {_plantilla_ruta(url)}'
+        inicio = time.perf_counter()
+        try:
+            api_result = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._registrar(operacion, time.perf_counter() - inicio, error=True)
+            self.breaker.fallo()
+            raise
+
+        error = api_result.status_code >= 500
+        self._registrar(operacion, time.perf_counter() - inicio, error=error)
+        if error:
+            self.breaker.fallo()
+        else:
+            self.breaker.exito()
+
+        response = {"status": api_result.status_code, "response": None}
+        if api_result.status_code != 204 and api_result.content:
+            try:
+                response["response"] = api_result.json()
+            except ValueError:
+                response["response"] = None
+        return response
+
+    def _registrar(self, operacion, segundos, error):
+        with self._lock:
+            m = self._metricas.setdefault(operacion, {'llamadas': 0, 'errores': 0, 'segundos_total': 0.0, 'segundos_max': 0.0})
+            m['llamadas'] += 1
+            m['errores'] += int(error)
+            m['segundos_total'] += segundos
+            m['segundos_max'] = max(m['segundos_max'], segundos)
+        if self.observador is not None:
+            self.observador(operacion, segundos, error)
+
+    def metricas(self):
+        """Copia de las métricas de latencia por operación (método + ruta)."""
+        with self._lock:
+            return {op: dict(m) for op, m in self._metricas.items()}
+
+
+def _adaptador_sdk(cliente):
+    """HttpClient del SDK (exige una subclase) que delega en `cliente`."""
+    from mercadopago.http import HttpClient
+
+    class AdaptadorSdk(HttpClient):
+        def request(self, method, url, maxretries=None, **kwargs):
+            return cliente.request(method, url, maxretries=maxretries, **kwargs)
+
+    return AdaptadorSdk()
+
+
+def _plantilla_ruta(url):
+    # /v1/payments/123456 -> /v1/payments/{id}, para agrupar las métricas
+    ruta = re.sub(r'^https?://[^/]+', '', url).split('?')[0]
+    return re.sub(r'/[0-9][0-9A-Za-z-]*', '/{id}', ruta)
+
+
+class PasarelaPagos:
+    def __init__(self, access_token, http_client=None):
+        self.access_token = access_token
+        self.http_client = http_client or ClienteHttpPooled()
+        self._sdk = None
+        self._lock = threading.Lock()
+
+    @property
+    def sdk(self):
+        if self._sdk is None:
+            with self._lock:
+                if self._sdk is None:
+                    import mercadopago
+                    self._sdk = mercadopago.SDK(self.access_token, http_client=_adaptador_sdk(self.http_client))
+        return self._sdk
+
+    @classmethod
+    def desde_entorno(cls, access_token, observador=None):
+        breaker = CircuitBreaker(
+            max_fallos=int(os.getenv('MERCADOPAGO_BREAKER_FALLOS', '5')),
+            reintentar_en=float(os.getenv('MERCADOPAGO_BREAKER_ESPERA', '30')),
+        )
+        http_client = ClienteHttpPooled(
+            timeout=(float(os.getenv('MERCADOPAGO_TIMEOUT_CONEXION', '3.05')),
+                     float(os.getenv('MERCADOPAGO_TIMEOUT_LECTURA', '10'))),
+            reintentos=int(os.getenv('MERCADOPAGO_REINTENTOS', '2')),
+            pool=int(os.getenv('MERCADOPAGO_POOL', '10')),
+            base_url=os.getenv('MERCADOPAGO_API_BASE'),
+            breaker=breaker,
+            observador=observador,
+        )
+        return cls(access_token, http_client=http_client)
+
+    def crear_preferencia(self, preference_data):
+        return self.sdk.preference().create(preference_data)
+
+    def obtener_pago(self, payment_id):
+        return self.sdk.payment().get(payment_id)
+
+    def metricas(self):
+        return self.http_client.metricas()
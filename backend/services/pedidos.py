@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from models import db, ClaveIdempotencia, ResumenPedidosDia
+from services.idempotencia import liberar_claves_vencidas
+
+# Buffer de escritura diferida para los pedidos.
+# En picos (p. ej. encargos de temporada) cada pedido con su propio commit
+# satura la base de datos; con el buffer activo la ruta solo valida, encola y
+# responde 202, y un hilo inserta los pedidos en lotes de hasta `max_lote`
+# con un solo commit, como máximo `max_espera` segundos después.
+# Los pedidos encolados viven en memoria: si el proceso muere antes del
+# commit se pierden, por eso el buffer está desactivado por defecto
+# (PEDIDOS_BUFFER=0) y gunicorn debe apagarse con `detener()` (graceful).
+#
+# Cada escritura de pedidos actualiza además resumen_pedidos_dia (pedidos y
+# cantidad por día de entrega y producto) en la misma transacción, así el
+# reporte de producción lee una fila por día y producto.
+
+MAX_DIAS_RESUMEN = 92
+
+
+def acumular_resumen(pedidos):
+    """Suma los pedidos (dicts con fecha_entrega, producto y cantidad) al resumen diario.
+
+    No hace commit: se llama en la misma transacción que inserta los pedidos.
+    Los pedidos sin fecha de entrega no entran al resumen.
+    """
+    conteo, cantidades = Counter(), Counter()
+    for pedido in pedidos:
+        if pedido.get('fecha_entrega') is None:
+            continue
+        llave = (pedido['fecha_entrega'], pedido['producto'])
+        conteo[llave] += 1
+        cantidades[llave] += pedido.get('cantidad') or 1
+
+    tabla = ResumenPedidosDia.__table__
+    dialecto = db.session.get_bind().dialect.name
+    for (fecha, producto), pedidos_dia in conteo.items():
+        valores = {'fecha_entrega': fecha, 'producto': producto,
+                   'pedidos': pedidos_dia, 'cantidad': cantidades[(fecha, producto)]}
+        # Upsert con incremento atómico: varios workers pueden sumar al mismo día
+        if dialecto in ('mysql', 'mariadb'):
+            stmt = mysql_insert(tabla).values(**valores)
+            stmt = stmt.on_duplicate_key_update(
+                pedidos=tabla.c.pedidos + stmt.inserted.pedidos,
+                cantidad=tabla.c.cantidad + stmt.inserted.cantidad,
+            )
+        else:
+            upsert = postgresql_insert if dialecto == 'postgresql' else sqlite_insert
+            stmt = upsert(tabla).values(**valores)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['fecha_entrega', 'producto'],
+                set_={
+                    'pedidos': tabla.c.pedidos + stmt.excluded.pedidos,
+                    'cantidad': tabla.c.cantidad + stmt.excluded.cantidad,
+                },
+            )
+        db.session.execute(stmt)
+
+
+def resumen_produccion(desde, hasta):
+    """Productos a preparar por día de entrega entre `desde` y `hasta` (inclusive)."""
+    if hasta < desde:
+        raise ValueError('hasta debe ser igual o posterior a desde')
+    if (hasta - desde).days >= MAX_DIAS_RESUMEN:
+        raise ValueError(f'El rango no puede superar {MAX_DIAS_RESUMEN} días')
+
+    filas = db.session.scalars(
+        select(ResumenPedidosDia)
+        .where(ResumenPedidosDia.fecha_entrega.between(desde, hasta))
+        .order_by(ResumenPedidosDia.fecha_entrega, ResumenPedidosDia.cantidad.desc(), ResumenPedidosDia.producto)
+    )
+    dias = {}
+    for fila in filas:
+        dia = dias.setdefault(fila.fecha_entrega, {
+            'fecha_entrega': fila.fecha_entrega.isoformat(), 'pedidos': 0, 'cantidad': 0, 'productos': [],
+        })
+        dia['pedidos'] += fila.pedidos
+        dia['cantidad'] += fila.cantidad
+        dia['productos'].append(fila.to_dict())
+    return {'desde': desde.isoformat(), 'hasta': hasta.isoformat(), 'dias': list(dias.values())}
+
+
+def reconstruir_resumen(modelo):
+    """Recalcula resumen_pedidos_dia desde la tabla de pedidos con un GROUP BY.
+
+    Para poblarlo la primera vez o corregirlo si alguien editó pedidos a mano.
+    No hace commit. Devuelve cuántas filas quedaron en el resumen.
+    """
+    agrupado = (
+        select(
+            modelo.fecha_entrega,
+            modelo.producto,
+            func.count().label('pedidos'),
+            func.coalesce(func.sum(modelo.cantidad), 0).label('cantidad'),
+        )
+        .where(modelo.fecha_entrega.is_not(None))
+        .group_by(modelo.fecha_entrega, modelo.producto)
+    )
+    db.session.execute(delete(ResumenPedidosDia))
+    resultado = db.session.execute(
+        insert(ResumenPedidosDia).from_select(['fecha_entrega', 'producto', 'pedidos', 'cantidad'], agrupado)
+    )
+    return resultado.rowcount
+
+
+class BufferPedidos:
+    def __init__(self, modelo, max_lote=50, max_espera=0.2, max_pendientes=5000):
+        self.modelo = modelo
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self.max_pendientes = max_pendientes
+        self._pendientes = []
+        self._claves = {}  # Idempotency-Key -> (huella, cuerpo) de los pedidos aún no escritos
+        self._condicion = threading.Condition()
+        self._detener = False
+        self._hilo = None
+        self._app = None
+
+    def iniciar(self, app):
+        if self._hilo is not None:
+            return
+        self._app = app
+        self._detener = False
+        self._hilo = threading.Thread(target=self._bucle, name='buffer-pedidos', daemon=True)
+        self._hilo.start()
+
+    @property
+    def activo(self):
+        return self._hilo is not None
+
+    def detener(self, timeout=None):
+        """Escribe lo pendiente y termina el hilo."""
+        with self._condicion:
+            self._detener = True
+            self._condicion.notify()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    def encolar(self, valores, clave=None, huella=None, cuerpo=None):
+        """Agrega un pedido al buffer. Devuelve False si el buffer está lleno."""
+        with self._condicion:
+            if len(self._pendientes) >= self.max_pendientes:
+                return False
+            if clave and clave in self._claves:
+                # Reintento del mismo pedido mientras el original sigue en el buffer
+                return True
+            self._pendientes.append((valores, clave, huella, cuerpo))
+            if clave:
+                self._claves[clave] = (huella, cuerpo)
+            self._condicion.notify()
+            return True
+
+    def pendientes(self):
+        with self._condicion:
+            return len(self._pendientes)
+
+    def clave_pendiente(self, clave):
+        """`(huella, cuerpo)` si hay un pedido en el buffer con esa clave."""
+        with self._condicion:
+            return self._claves.get(clave)
+
+    def _bucle(self):
+        while True:
+            with self._condicion:
+                if not self._pendientes and not self._detener:
+                    self._condicion.wait()
+                if len(self._pendientes) < self.max_lote and not self._detener:
+                    # Esperar un poco a que se junten más pedidos en el mismo commit
+                    self._condicion.wait(self.max_espera)
+                lote = self._pendientes[:self.max_lote]
+                del self._pendientes[:self.max_lote]
+                terminar = self._detener and not self._pendientes
+
+            if lote:
+                inicio = time.perf_counter()
+                try:
+                    with self._app.app_context():
+                        self.escribir(lote)
+                except Exception:
+                    logging.exception(f'No se pudieron guardar {len(lote)} pedido(s) del buffer')
+                else:
+                    logging.debug(f'{len(lote)} pedido(s) escritos en {time.perf_counter() - inicio:.3f}s')
+                with self._condicion:
+                    for _, clave, _, _ in lote:
+                        self._claves.pop(clave, None)
+            if terminar:
+                return
+
+    def escribir(self, lote):
+        """Inserta un lote de pedidos con un solo commit (necesita contexto de aplicación)."""
+        try:
+            self._insertar(lote)
+            db.session.commit()
+            return
+        except IntegrityError:
+            # Alguna clave ya estaba guardada (reintento llegado a otro worker):
+            # se escribe pedido por pedido y se omiten los duplicados
+            db.session.rollback()
+
+        for pedido in lote:
+            try:
+                self._insertar([pedido])
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                logging.info(f'Pedido duplicado descartado (Idempotency-Key {pedido[1]})')
+
+    def _insertar(self, lote):
+        db.session.execute(insert(self.modelo), [valores for valores, _, _, _ in lote])
+        claves = [
+            {'clave': clave, 'huella_peticion': huella, 'codigo': 202, 'respuesta': self._app.json.dumps(cuerpo)}
+            for _, clave, huella, cuerpo in lote if clave
+        ]
+        if claves:
+            liberar_claves_vencidas([c['clave'] for c in claves])
+            db.session.execute(insert(ClaveIdempotencia), claves)
+        acumular_resumen([valores for valores, _, _, _ in lote])
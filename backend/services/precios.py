@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+
+from models import db, Producto, CarritoItem
+from services.cache import cache
+from services.catalogo import CatalogoCache
+
+# Cotización del carrito: resuelve todos los productos del carrito con una sola
+# consulta (JOIN) en lugar de un Producto.query.get() por cada línea.
+# Las rutas de lectura del carrito usan la cotización guardada en el cache
+# compartido (services/cache.py), que se invalida al modificar el carrito o el
+# catálogo; el pago siempre cotiza contra la base de datos.
+# Solo se guarda con CACHE_URL: sin versiones compartidas la invalidación queda
+# en el worker que atendió la escritura y los demás servirían el carrito viejo.
+
+CARRITO_CACHE_TTL = int(os.getenv('CARRITO_CACHE_TTL', '300'))
+
+
+def cotizar_carrito(usuario_id, incluir_productos=False):
+    """Devuelve las líneas del carrito con su precio y el total.
+
+    Las líneas cuyo producto ya no existe se devuelven con `disponible=False`
+    y no cuentan para el total. Con `incluir_productos` cada línea lleva
+    además el producto completo (`Producto.to_dict()`) en la clave `producto`.
+    """
+    filas = (
+        db.session.query(CarritoItem, Producto)
+        .outerjoin(Producto, Producto.id_producto == CarritoItem.producto_id)
+        .filter(CarritoItem.usuario_id == usuario_id)
+        .order_by(CarritoItem.id)
+        .all()
+    )
+
+    items = []
+    total = 0.0
+    cantidad_articulos = 0
+    for item, producto in filas:
+        linea = {
+            'producto_id': item.producto_id,
+            'cantidad': item.cantidad,
+            'fecha_actualizacion': item.fecha_actualizacion.isoformat() if item.fecha_actualizacion else None,
+            'disponible': producto is not None,
+        }
+        if producto is not None:
+            precio = float(producto.precio)
+            linea.update({
+                'nombre': producto.nombre,
+                'precio_unitario': precio,
+                'subtotal': round(precio * item.cantidad, 2),
+            })
+            if incluir_productos:
+                linea['producto'] = producto.to_dict()
+            total += linea['subtotal']
+            cantidad_articulos += item.cantidad
+        items.append(linea)
+
+    return {
+        'items': items,
+        'total': round(total, 2),
+        'cantidad_articulos': cantidad_articulos,
+    }
+
+
+def cotizacion_carrito(usuario_id, incluir_productos=False):
+    """Como `cotizar_carrito`, pero desde el cache si es compartido. El resultado es compartido: no modificarlo."""
+    return cache.obtener(
+        f'carrito:{usuario_id}:{int(incluir_productos)}',
+        lambda: cotizar_carrito(usuario_id, incluir_productos),
+        ttl=CARRITO_CACHE_TTL if cache.versiones_compartidas else 0,
+        etiquetas=(f'carrito:{usuario_id}', CatalogoCache.ETIQUETA),
+    )
+
+
+def invalidar_carrito(usuario_id):
+    """Descarta las cotizaciones guardadas del usuario; llamar después del commit que cambió su carrito."""
+    cache.invalidar(f'carrito:{usuario_id}')
+
+
+def huella_carrito(cotizacion, *extra):
+    """Hash estable del contenido cotizado del carrito (productos, cantidades y precios).
+
+    Dos carritos con las mismas líneas y precios dan la misma huella; `extra`
+    permite mezclar otros datos que afectan a la preferencia (p. ej. las back_urls).
+    """
+    lineas = sorted(
+        (linea['producto_id'], linea['cantidad'], linea['precio_unitario'])
+        for linea in cotizacion['items'] if linea['disponible']
+    )
+    contenido = json.dumps([lineas, list(extra)], separators=(',', ':'))
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
@@ -0,0 +1,124 @@
+import gzip
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa el json de la biblioteca estándar
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él solo se ofrece gzip
+    brotli = None
+
+# Capa común de respuestas para todas las rutas.
+# - ProveedorOrjson: serializa con orjson (varias veces más rápido que json)
+#   produciendo el mismo JSON que el proveedor de Flask (claves ordenadas y
+#   fechas en formato HTTP).
+# - Compresion: comprime con brotli o gzip, según Accept-Encoding, las
+#   respuestas de texto por encima de un tamaño mínimo. Si la respuesta tiene
+#   ETag fuerte (el catálogo), el resultado comprimido se guarda por ETag y las
+#   peticiones siguientes no vuelven a comprimir.
+
+TIPOS_COMPRIMIBLES = ('application/json', 'text/', 'application/x-ndjson', 'image/svg+xml', 'application/javascript')
+
+
+class ProveedorOrjson(DefaultJSONProvider):
+    """Proveedor JSON de Flask basado en orjson."""
+
+    opciones = 0 if orjson is None else (orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                                         | orjson.OPT_NON_STR_KEYS)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Opciones propias de json.dumps (indent, etc.)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.opciones).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if self._app.debug:
+            # En desarrollo Flask indenta la salida; se mantiene ese comportamiento
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        cuerpo = orjson.dumps(obj, default=self.default, option=self.opciones)
+        return self._app.response_class(cuerpo, mimetype=self.mimetype)
+
+
+def configurar_json(app):
+    """Usa orjson como proveedor JSON si está instalado (JSON_RAPIDO=0 lo desactiva)."""
+    if orjson is not None and os.getenv('JSON_RAPIDO', '1') == '1':
+        app.json = ProveedorOrjson(app)
+    logging.info(f'Proveedor JSON: {type(app.json).__name__}')
+
+
+class Compresion:
+    def __init__(self, minimo=1024, nivel_gzip=6, nivel_brotli=5, max_cache=64):
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.nivel_brotli = nivel_brotli
+        self.max_cache = max_cache
+        self.codificaciones = ['br', 'gzip'] if brotli is not None else ['gzip']
+        self._cache = OrderedDict()  # (etag, codificación) -> bytes comprimidos
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_entorno(cls):
+        return cls(
+            minimo=int(os.getenv('COMPRESION_MINIMO', '1024')),
+            nivel_gzip=int(os.getenv('COMPRESION_NIVEL_GZIP', '6')),
+            nivel_brotli=int(os.getenv('COMPRESION_NIVEL_BROTLI', '5')),
+        )
+
+    def init_app(self, app):
+        app.after_request(self.comprimir)
+
+    def _comprimir_bytes(self, datos, codificacion):
+        if codificacion == 'br':
+            return brotli.compress(datos, quality=self.nivel_brotli)
+        return gzip.compress(datos, compresslevel=self.nivel_gzip, mtime=0)
+
+    def comprimir(self, respuesta):
+        if (respuesta.direct_passthrough or respuesta.is_streamed or respuesta.status_code != 200
+                or 'Content-Encoding' in respuesta.headers
+                or not (respuesta.mimetype or '').startswith(TIPOS_COMPRIMIBLES)):
+            return respuesta
+
+        datos = respuesta.get_data()
+        if len(datos) < self.minimo:
+            return respuesta
+        respuesta.vary.add('Accept-Encoding')
+        codificacion = request.accept_encodings.best_match(self.codificaciones)
+        if codificacion is None:
+            return respuesta
+
+        # Cada codificación es una representación distinta: necesita su propio ETag
+        etag, debil = respuesta.get_etag()
+        if etag:
+            etag = f'{etag}-{codificacion}'
+            respuesta.set_etag(etag, weak=debil)
+            respuesta.make_conditional(request)
+            if respuesta.status_code == 304:
+                return respuesta
+
+        clave = (etag, codificacion) if etag and not debil else None
+        comprimido = self._cache.get(clave) if clave else None
+        if comprimido is None:
+            comprimido = self._comprimir_bytes(datos, codificacion)
+            if clave:
+                with self._lock:
+                    self._cache[clave] = comprimido
+                    while len(self._cache) > self.max_cache:
+                        self._cache.popitem(last=False)
+
+        respuesta.set_data(comprimido)
+        respuesta.headers['Content-Encoding'] = codificacion
+        return respuesta
+
+
+compresion = Compresion.desde_entorno()
@@ -0,0 +1,126 @@
+import logging
+import os
+from functools import wraps
+
+from flask import g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+# Tokens de sesión firmados (HMAC con itsdangerous).
+# El token de acceso lleva el id y el rol del usuario, así que las rutas
+# protegidas lo validan sin consultar la base de datos. El token de refresco
+# dura más y solo sirve para pedir un nuevo par en /api/users/refresh.
+
+SECRET_KEY_DESARROLLO = 'pasteleria-dev-secret'
+# Claves publicadas en el repositorio (la de desarrollo y la de .env.example): cualquiera
+# podría firmar un token con rol admin, así que fuera de desarrollo/pruebas no se aceptan
+CLAVES_INSEGURAS = {SECRET_KEY_DESARROLLO, 'cambia-esta-clave'}
+
+
+class ServicioTokens:
+    def __init__(self, secreto=None, ttl_acceso=900, ttl_refresco=30 * 24 * 3600):
+        self.ttl_acceso = ttl_acceso
+        self.ttl_refresco = ttl_refresco
+        self._acceso = self._refresco = None
+        if secreto:
+            self._firmar_con(secreto)
+
+    def _firmar_con(self, secreto):
+        self._acceso = URLSafeTimedSerializer(secreto, salt='acceso')
+        self._refresco = URLSafeTimedSerializer(secreto, salt='refresco')
+
+    def init_app(self, app):
+        """Toma SECRET_KEY y los TTL de la configuración de la aplicación.
+
+        Sin SECRET_KEY (o con una clave publicada) la aplicación no arranca,
+        salvo en desarrollo (DEBUG) o pruebas (TESTING), que usan la clave de desarrollo.
+        """
+        secreto = app.config.get('SECRET_KEY')
+        if not secreto or secreto in CLAVES_INSEGURAS:
+            if not (app.debug or app.testing):
+                raise RuntimeError('SECRET_KEY no definida o insegura: es obligatoria fuera de desarrollo y '
+                                   'pruebas (la misma en todos los workers)')
+            if not secreto:
+                logging.warning('SECRET_KEY no definida: se usa una clave de desarrollo, NO usar en producción')
+                secreto = SECRET_KEY_DESARROLLO
+        self.ttl_acceso = app.config.get('TOKEN_ACCESO_TTL', self.ttl_acceso)
+        self.ttl_refresco = app.config.get('TOKEN_REFRESCO_TTL', self.ttl_refresco)
+        self._firmar_con(secreto)
+
+    def _serializadores(self):
+        if self._acceso is None:
+            raise RuntimeError('ServicioTokens sin configurar: falta servicio_tokens.init_app(app)')
+        return self._acceso, self._refresco
+
+    def emitir(self, usuario_id, rol):
+        """Par de tokens para la respuesta del login/refresh."""
+        acceso, refresco = self._serializadores()
+        return {
+            'access_token': acceso.dumps({'u': usuario_id, 'r': rol}),
+            'refresh_token': refresco.dumps({'u': usuario_id}),
+            'token_type': 'Bearer',
+            'expires_in': self.ttl_acceso,
+        }
+
+    def verificar_acceso(self, token):
+        """Devuelve `(usuario_id, rol)` o None si el token no es válido o expiró."""
+        try:
+            datos = self._serializadores()[0].loads(token, max_age=self.ttl_acceso)
+        except (BadSignature, SignatureExpired):
+            return None
+        return datos['u'], datos.get('r')
+
+    def verificar_refresco(self, token):
+        """Devuelve el usuario_id del token de refresco o None."""
+        try:
+            return self._serializadores()[1].loads(token, max_age=self.ttl_refresco)['u']
+        except (BadSignature, SignatureExpired):
+            return None
+
+
+# Se configura en create_app con SECRET_KEY de config.py
+servicio_tokens = ServicioTokens()
+
+# Mientras haya clientes que solo envían usuario_id, AUTH_USUARIO_ID_LEGADO=1 lo acepta sin token
+USUARIO_ID_LEGADO = os.getenv('AUTH_USUARIO_ID_LEGADO', '0') == '1'
+
+
+def _usuario_id_legado():
+    usuario_id = request.args.get('usuario_id')
+    if usuario_id is None:
+        usuario_id = (request.get_json(silent=True) or {}).get('usuario_id')
+    try:
+        return int(usuario_id) if usuario_id is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def requiere_token(f):
+    """Exige `Authorization: Bearer <access_token>` y deja el usuario en `g.usuario_id` y `g.rol`."""
+    @wraps(f)
+    def envoltura(*args, **kwargs):
+        esquema, _, token = request.headers.get('Authorization', '').partition(' ')
+        identidad = servicio_tokens.verificar_acceso(token) if esquema == 'Bearer' and token else None
+
+        if identidad is None and USUARIO_ID_LEGADO and not token:
+            usuario_id = _usuario_id_legado()
+            if usuario_id is not None:
+                identidad = (usuario_id, None)
+
+        if identidad is None:
+            return jsonify({'error': 'Usuario no autenticado'}), 401
+
+        g.usuario_id, g.rol = identidad
+        return f(*args, **kwargs)
+    return envoltura
+
+
+def requiere_rol(rol):
+    """Como `requiere_token`, pero además exige que el token tenga el rol indicado."""
+    def decorador(f):
+        @wraps(f)
+        def verificar_rol(*args, **kwargs):
+            if g.rol != rol:
+                return jsonify({'error': 'Permisos insuficientes'}), 403
+            return f(*args, **kwargs)
+        return requiere_token(verificar_rol)
+    return decorador
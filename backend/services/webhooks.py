@@ -0,0 +1,175 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, CarritoItem, WebhookPago
+from services.precios import invalidar_carrito
+
+# Cola durable de notificaciones de Mercado Pago.
+# El webhook guarda el payment_id en la tabla webhook_pagos y responde 200 de
+# inmediato; un pool de hilos consulta después el pago en Mercado Pago,
+# reintentando con backoff exponencial. La tabla hace de cola, así que los
+# trabajos sobreviven a reinicios y varios workers de gunicorn pueden
+# procesarla a la vez: cada trabajo se reclama con un UPDATE condicional.
+
+# Estados de Mercado Pago después de los cuales ya no hace falta volver a consultar el pago
+ESTADOS_FINALES = {'approved', 'rejected', 'cancelled', 'refunded', 'charged_back'}
+
+
+def encolar_pago(payment_id):
+    """Registra una notificación de pago. Devuelve False si se descartó por duplicada.
+
+    Una notificación repetida de un pago que ya está en la cola, o que ya llegó
+    a un estado final, se ignora; si el pago quedó en un estado intermedio
+    (p. ej. `pending`) se vuelve a encolar para consultar su nuevo estado.
+    """
+    payment_id = str(payment_id)
+    trabajo = WebhookPago.query.filter_by(payment_id=payment_id).first()
+    if trabajo is None:
+        db.session.add(WebhookPago(payment_id=payment_id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Otra petición insertó la misma notificación al mismo tiempo
+            db.session.rollback()
+            return False
+        return True
+
+    if trabajo.estado in ('pendiente', 'procesando') or trabajo.estado_pago in ESTADOS_FINALES:
+        return False
+
+    trabajo.estado = 'pendiente'
+    trabajo.intentos = 0
+    trabajo.proximo_intento = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+class ProcesadorWebhooks:
+    """Procesa la tabla webhook_pagos con `hilos` hilos en segundo plano.
+
+    `cliente` es una función sin argumentos que devuelve un objeto con la
+    interfaz del SDK de Mercado Pago (`cliente().payment().get(id)`); en
+    pruebas se puede pasar un cliente falso.
+    """
+
+    def __init__(self, cliente, hilos=2, intervalo=2.0, max_intentos=8,
+                 backoff_base=5, backoff_max=3600, bloqueo=300, lote=10):
+        self.cliente = cliente
+        self.hilos = hilos
+        self.intervalo = intervalo
+        self.max_intentos = max_intentos
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bloqueo = bloqueo  # segundos tras los cuales un trabajo 'procesando' se considera abandonado
+        self.lote = lote
+        self._detener = threading.Event()
+        self._hilos = []
+
+    def iniciar(self, app):
+        if self._hilos or self.hilos <= 0:
+            return
+        for i in range(self.hilos):
+            hilo = threading.Thread(target=self._bucle, args=(app,), name=f'webhooks-{i}', daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def detener(self, timeout=None):
+        self._detener.set()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+
+    def _bucle(self, app):
+        while not self._detener.is_set():
+            procesados = 0
+            try:
+                with app.app_context():
+                    procesados = self.procesar_pendientes()
+            except Exception:
+                logging.exception('Error procesando la cola de webhooks')
+            if not procesados:
+                self._detener.wait(self.intervalo)
+
+    def procesar_pendientes(self):
+        """Una pasada sobre la cola: reclama y procesa hasta `lote` trabajos vencidos.
+
+        Necesita un contexto de aplicación. Devuelve cuántos trabajos procesó.
+        """
+        ahora = datetime.utcnow()
+        candidatos = [fila.id for fila in (
+            db.session.query(WebhookPago.id)
+            .filter(or_(
+                (WebhookPago.estado == 'pendiente') & (WebhookPago.proximo_intento <= ahora),
+                (WebhookPago.estado == 'procesando') &
+                (WebhookPago.actualizado_en < ahora - timedelta(seconds=self.bloqueo)),
+            ))
+            .order_by(WebhookPago.proximo_intento)
+            .limit(self.lote)
+        )]
+
+        procesados = 0
+        for trabajo_id in candidatos:
+            trabajo = self._reclamar(trabajo_id)
+            if trabajo is not None:
+                self._procesar(trabajo)
+                procesados += 1
+        return procesados
+
+    def _reclamar(self, trabajo_id):
+        # El UPDATE solo afecta una fila si nadie más la reclamó antes
+        ahora = datetime.utcnow()
+        resultado = db.session.execute(
+            update(WebhookPago)
+            .where(WebhookPago.id == trabajo_id)
+            .where(or_(
+                WebhookPago.estado == 'pendiente',
+                (WebhookPago.estado == 'procesando') &
+                (WebhookPago.actualizado_en < ahora - timedelta(seconds=self.bloqueo)),
+            ))
+            .values(estado='procesando', intentos=WebhookPago.intentos + 1, actualizado_en=ahora)
+        )
+        db.session.commit()
+        if resultado.rowcount != 1:
+            return None
+        return db.session.get(WebhookPago, trabajo_id)
+
+    def _procesar(self, trabajo):
+        try:
+            payment_info = self.cliente().payment().get(trabajo.payment_id)
+            if payment_info.get('status') != 200:
+                raise RuntimeError(f"Mercado Pago respondió {payment_info.get('status')}")
+
+            payment = payment_info['response']
+            trabajo.estado_pago = payment.get('status')
+            usuario_id = None
+            if payment.get('status') == 'approved' and payment.get('external_reference'):
+                # Limpiar el carrito después de un pago exitoso
+                usuario_id = int(payment['external_reference'])
+                CarritoItem.query.filter_by(usuario_id=usuario_id).delete()
+
+            trabajo.estado = 'completado'
+            trabajo.ultimo_error = None
+            db.session.commit()
+            if usuario_id is not None:
+                invalidar_carrito(usuario_id)
+        except Exception as e:
+            db.session.rollback()
+            self._reintentar(trabajo, e)
+
+    def _reintentar(self, trabajo, error):
+        trabajo = db.session.get(WebhookPago, trabajo.id)
+        trabajo.ultimo_error = str(error)
+        if trabajo.intentos >= self.max_intentos:
+            trabajo.estado = 'fallido'
+            logging.error(f'Webhook de pago {trabajo.payment_id} descartado tras {trabajo.intentos} intentos: {error}')
+        else:
+            espera = min(self.backoff_base * 2 ** (trabajo.intentos - 1), self.backoff_max)
+            trabajo.estado = 'pendiente'
+            trabajo.proximo_intento = datetime.utcnow() + timedelta(seconds=espera)
+            logging.warning(f'Webhook de pago {trabajo.payment_id} falló (intento {trabajo.intentos}), '
+                            f'reintento en {espera}s: {error}')
+        db.session.commit()
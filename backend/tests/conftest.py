@@ -0,0 +1,42 @@
+import os
+
+# Antes de importar la aplicación: los servicios leen el entorno al importarse
+os.environ['APP_CONFIG'] = 'pruebas'
+os.environ.setdefault('WEBHOOK_HILOS', '0')
+os.environ.pop('CACHE_URL', None)
+
+import pytest
+
+from aplicacion import create_app
+from models import db
+from services.cache import BackendMemoria, cache
+
+
+@pytest.fixture
+def app():
+    """Aplicación con ConfigPruebas y el esquema creado en un SQLite en memoria."""
+    app = create_app('pruebas')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(autouse=True)
+def cache_vacio(monkeypatch):
+    # El cache compartido es global al proceso: cada prueba empieza con uno vacío
+    backend = BackendMemoria()
+    monkeypatch.setattr(cache, 'backend', backend)
+    monkeypatch.setattr(cache, '_versiones', backend)
+    return cache
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+def autorizacion(usuario_id, rol='user'):
+    """Encabezado Authorization con un token de acceso válido para `usuario_id`."""
+    from services.tokens import servicio_tokens
+    return {'Authorization': f"Bearer {servicio_tokens.emitir(usuario_id, rol)['access_token']}"}
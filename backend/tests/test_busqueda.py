@@ -0,0 +1,87 @@
+import pytest
+
+from models import db, Producto
+from services.busqueda import IndiceMemoria, indice_productos
+from services.catalogo import catalogo_cache
+
+
+@pytest.fixture
+def catalogo(app):
+    # El índice es global al proceso: se reconstruye con la base de cada prueba
+    indice_productos.invalidar()
+    db.session.add(Producto(id_producto=1, nombre='Torta de chocolate', precio=10))
+    db.session.commit()
+
+
+def nombres(respuesta):
+    return [p['nombre'] for p in respuesta.get_json()]
+
+
+def test_busqueda_ve_productos_escritos_por_otro_worker(cliente, catalogo):
+    assert nombres(cliente.get('/api/productos/buscar/torta')) == ['Torta de chocolate']
+
+    # Otro worker agrega un producto: su índice local no se entera, pero la
+    # escritura invalida la etiqueta del catálogo (compartida con CACHE_URL)
+    db.session.add(Producto(id_producto=2, nombre='Torta de limón', precio=12))
+    db.session.commit()
+    catalogo_cache.invalidar()
+
+    assert nombres(cliente.get('/api/productos/buscar/torta')) == ['Torta de chocolate', 'Torta de limón']
+
+
+def test_busqueda_se_sirve_del_cache_hasta_una_escritura(cliente, catalogo):
+    cliente.get('/api/productos/buscar/torta')
+    db.session.add(Producto(id_producto=2, nombre='Torta de limón', precio=12))
+    db.session.commit()
+
+    # Sin invalidar, la respuesta guardada sigue vigente (hasta CATALOGO_CACHE_TTL)
+    assert nombres(cliente.get('/api/productos/buscar/torta')) == ['Torta de chocolate']
+
+
+@pytest.fixture
+def reconstrucciones(monkeypatch):
+    llamadas = []
+    reconstruir = indice_productos.reconstruir
+    monkeypatch.setattr(indice_productos, 'reconstruir', lambda productos: llamadas.append(1) or reconstruir(productos))
+    return llamadas
+
+
+def test_producto_nuevo_se_indexa_sin_reconstruir(cliente, catalogo, reconstrucciones):
+    cliente.get('/api/productos/buscar/torta')
+    assert len(reconstrucciones) == 1
+
+    respuesta = cliente.post('/api/productos', json={'nombre': 'Torta de limón', 'precio': 12})
+    assert respuesta.status_code == 201
+
+    assert nombres(cliente.get('/api/productos/buscar/torta')) == ['Torta de chocolate', 'Torta de limón']
+    assert len(reconstrucciones) == 1
+
+
+def test_otra_escritura_ademas_del_producto_nuevo_reconstruye(cliente, catalogo, reconstrucciones):
+    cliente.get('/api/productos/buscar/torta')
+    db.session.add(Producto(id_producto=5, nombre='Torta de coco', precio=15))
+    db.session.commit()
+    catalogo_cache.invalidar()  # escritura de otro worker
+
+    cliente.post('/api/productos', json={'nombre': 'Torta de limón', 'precio': 12})
+
+    assert nombres(cliente.get('/api/productos/buscar/torta')) == ['Torta de chocolate', 'Torta de coco', 'Torta de limón']
+    assert len(reconstrucciones) == 2
+
+
+def test_reconstruir_equivale_a_agregar_uno_por_uno():
+    productos = [
+        {'id_producto': 1, 'nombre': 'Pay de limón', 'descripcion': 'con merengue'},
+        {'id_producto': 2, 'nombre': 'Brownie', 'descripcion': 'chocolate y nuez'},
+        {'id_producto': 1, 'nombre': 'Pay de mango', 'descripcion': None},  # reemplaza al 1
+    ]
+    completo = IndiceMemoria()
+    completo.reconstruir(productos)
+    incremental = IndiceMemoria()
+    incremental.reconstruir([])
+    for producto in productos:
+        incremental.agregar(producto)
+
+    assert completo._tokens == sorted(completo._postings) == incremental._tokens
+    assert completo._postings == incremental._postings
+    assert completo.buscar('pay') == incremental.buscar('pay') == ([productos[2]], 1)
@@ -0,0 +1,164 @@
+import threading
+import time
+
+import pytest
+
+from services.cache import BackendMemoria, BackendRedis, Cache
+
+
+def test_lru_desaloja_la_entrada_menos_usada():
+    backend = BackendMemoria(max_entradas=2)
+    cache = Cache(backend)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.leer('a') == 1  # 'a' pasa a ser la más reciente
+
+    cache.guardar('c', 3)
+    assert cache.leer('b') is None
+    assert (cache.leer('a'), cache.leer('c')) == (1, 3)
+
+
+def test_entrada_vencida_no_se_sirve():
+    cache = Cache(BackendMemoria())
+    cache.guardar('a', 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.leer('a', 'defecto') == 'defecto'
+
+
+def test_invalidar_etiqueta_descarta_solo_sus_entradas():
+    cache = Cache(BackendMemoria())
+    cache.guardar('productos', [1], etiquetas=('catalogo',))
+    cache.guardar('carrito:7', {'total': 10}, etiquetas=('catalogo', 'carrito:7'))
+    cache.guardar('sesion', 'x')
+
+    cache.invalidar('catalogo')
+    assert cache.leer('productos') is None
+    assert cache.leer('carrito:7') is None
+    assert cache.leer('sesion') == 'x'
+
+    # Lo guardado después de invalidar lleva la versión nueva
+    cache.guardar('productos', [1, 2], etiquetas=('catalogo',))
+    assert cache.leer('productos') == [1, 2]
+
+
+def test_invalidacion_durante_la_carga_no_deja_un_valor_viejo():
+    cache = Cache(BackendMemoria())
+
+    def cargar():
+        cache.invalidar('catalogo')  # una escritura mientras se leía la base
+        return 'viejo'
+
+    assert cache.obtener('productos', cargar, etiquetas=('catalogo',)) == 'viejo'
+    assert cache.obtener('productos', lambda: 'nuevo', etiquetas=('catalogo',)) == 'nuevo'
+
+
+def test_single_flight_carga_una_vez_con_peticiones_simultaneas():
+    cache = Cache(BackendMemoria())
+    cargas = []
+    liberar = threading.Event()
+
+    def cargar():
+        cargas.append(1)
+        liberar.wait(2)
+        return 'valor'
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(cache.obtener('clave', cargar)))
+             for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    time.sleep(0.1)
+    liberar.set()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(cargas) == 1
+    assert resultados == ['valor'] * 8
+
+
+def test_carga_fallida_no_se_guarda():
+    cache = Cache(BackendMemoria())
+
+    def cargar():
+        raise RuntimeError('base caída')
+
+    with pytest.raises(RuntimeError):
+        cache.obtener('clave', cargar)
+    assert cache.obtener('clave', lambda: 'valor') == 'valor'
+
+
+class BackendRoto(BackendMemoria):
+    def leer(self, clave):
+        raise ConnectionError('sin conexión')
+
+    def escribir(self, clave, valor, ttl):
+        raise ConnectionError('sin conexión')
+
+
+def test_backend_caido_carga_desde_la_base():
+    cache = Cache(BackendRoto())
+    assert cache.obtener('clave', lambda: 'valor') == 'valor'
+    assert cache.errores == 2
+
+
+@pytest.fixture
+def servidor_redis():
+    pytest.importorskip('redis')
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.FakeServer()
+
+
+def backend_redis(servidor):
+    """BackendRedis contra un servidor falso en memoria (un cliente por worker)."""
+    import fakeredis
+
+    backend = BackendRedis('redis://localhost:6379/0')
+    backend._redis = fakeredis.FakeRedis(server=servidor)
+    return backend
+
+
+def test_redis_comparte_valores_y_versiones_entre_workers(servidor_redis):
+    uno = Cache(backend_redis(servidor_redis))
+    otro = Cache(backend_redis(servidor_redis))
+
+    uno.guardar('productos', {'items': [1]}, etiquetas=('catalogo',))
+    assert otro.leer('productos') == {'items': [1]}
+
+    otro.invalidar('catalogo')
+    assert uno.leer('productos') is None
+
+
+def test_redis_solo_versiones_con_cache_local(servidor_redis):
+    # CACHE_LOCAL=1: valores en la memoria de cada worker, versiones en Redis
+    uno = Cache(BackendMemoria(), versiones=backend_redis(servidor_redis))
+    otro = Cache(BackendMemoria(), versiones=backend_redis(servidor_redis))
+    uno.guardar('productos', [1], etiquetas=('catalogo',))
+    otro.guardar('productos', [1], etiquetas=('catalogo',))
+
+    otro.invalidar('catalogo')
+    assert uno.leer('productos') is None
+    assert otro.leer('productos') is None
+
+
+def test_redis_single_flight_entre_workers(servidor_redis):
+    uno = Cache(backend_redis(servidor_redis), espera_carga=2)
+    otro = Cache(backend_redis(servidor_redis), espera_carga=2)
+    cargando = threading.Event()
+    liberar = threading.Event()
+    cargas = []
+
+    def cargar_lento():
+        cargas.append('uno')
+        cargando.set()
+        liberar.wait(2)
+        return 'valor'
+
+    hilo = threading.Thread(target=uno.obtener, args=('clave', cargar_lento))
+    hilo.start()
+    cargando.wait(2)
+    threading.Timer(0.1, liberar.set).start()
+
+    # `otro` encuentra el bloqueo de `uno` en Redis y espera su resultado
+    assert otro.obtener('clave', lambda: cargas.append('otro') or 'otro') == 'valor'
+    hilo.join()
+    assert cargas == ['uno']
@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import autorizacion
+from models import db, CarritoItem, Producto
+
+
+@pytest.fixture
+def carrito(app):
+    db.session.add_all([Producto(id_producto=i, nombre=f'Producto {i}', precio=10) for i in (1, 2, 3)])
+    db.session.add(CarritoItem(usuario_id=7, producto_id=1, cantidad=2))
+    db.session.commit()
+
+
+def modificar(cliente, *cambios, cuerpo=None):
+    return cliente.patch('/api/carrito', json={'cambios': list(cambios)} if cuerpo is None else cuerpo,
+                         headers=autorizacion(7))
+
+
+def cantidades():
+    db.session.expire_all()
+    return {i.producto_id: i.cantidad for i in CarritoItem.query.filter_by(usuario_id=7)}
+
+
+@pytest.mark.parametrize('cambio, esperado', [
+    ({'op': 'add', 'producto_id': 1, 'cantidad': 3}, {1: 5}),
+    ({'op': 'add', 'producto_id': 2}, {1: 2, 2: 1}),
+    ({'op': 'set', 'producto_id': 1, 'cantidad': 7}, {1: 7}),
+    ({'op': 'set', 'producto_id': 3, 'cantidad': 4}, {1: 2, 3: 4}),
+    ({'op': 'set', 'producto_id': 1, 'cantidad': 0}, {}),
+    ({'op': 'remove', 'producto_id': 1}, {}),
+    ({'op': 'remove', 'producto_id': 2}, {1: 2}),
+])
+def test_cambios(cliente, carrito, cambio, esperado):
+    assert modificar(cliente, cambio).status_code == 200
+    assert cantidades() == esperado
+
+
+def test_varios_cambios_en_una_peticion(cliente, carrito):
+    respuesta = modificar(cliente,
+                          {'op': 'add', 'producto_id': 2, 'cantidad': 1},
+                          {'op': 'add', 'producto_id': 2, 'cantidad': 2},
+                          {'op': 'remove', 'producto_id': 1})
+    assert respuesta.status_code == 200
+    assert cantidades() == {2: 3}
+
+
+@pytest.mark.parametrize('invalido', [
+    {'op': 'add', 'producto_id': 3, 'cantidad': 0},
+    {'op': 'add', 'producto_id': 3, 'cantidad': -1},
+    {'op': 'set', 'producto_id': 3, 'cantidad': True},
+    {'op': 'set', 'producto_id': 3, 'cantidad': '2'},
+    {'op': 'add', 'producto_id': True},
+    {'op': 'vaciar', 'producto_id': 3},
+    'add 3',
+])
+def test_lote_con_un_cambio_invalido_no_aplica_ninguno(cliente, carrito, invalido):
+    respuesta = modificar(cliente,
+                          {'op': 'add', 'producto_id': 1, 'cantidad': 1},
+                          {'op': 'set', 'producto_id': 2, 'cantidad': 5},
+                          invalido)
+    assert respuesta.status_code == 400
+    assert cantidades() == {1: 2}
+
+
+@pytest.mark.parametrize('cuerpo', [[], 'texto', {'cambios': []}, {'cambios': {'op': 'add'}}])
+def test_cuerpo_invalido(cliente, carrito, cuerpo):
+    assert modificar(cliente, cuerpo=cuerpo).status_code == 400
@@ -0,0 +1,116 @@
+import gzip
+
+import pytest
+
+from models import db, Producto
+
+
+@pytest.fixture
+def productos(app):
+    db.session.add_all([
+        Producto(id_producto=1, nombre='Brownie', precio=30, imagen_url='brownie.jpg', categoria='postres'),
+        Producto(id_producto=2, nombre='Cheesecake', precio=10, imagen_url='cheesecake_mora.jpg', categoria='pasteles'),
+        Producto(id_producto=3, nombre='Alfajor', precio=20, categoria='postres'),
+    ])
+    db.session.commit()
+
+
+def test_pagina_incluye_las_urls_de_imagen_del_catalogo(cliente, productos):
+    completo = {p['id_producto']: p for p in cliente.get('/api/productos').get_json()}
+    pagina = cliente.get('/api/productos', query_string={'limite': 24}).get_json()
+
+    assert pagina['items'] == [completo[1], completo[2], completo[3]]
+    assert pagina['items'][0]['imagen_src'].startswith('/static/images/brownie.')
+
+
+def test_campos_con_imagen_url_agregan_imagen_src_y_srcset(cliente, productos):
+    pagina = cliente.get('/api/productos', query_string={'limite': 1, 'campos': 'nombre,imagen_url'}).get_json()
+    assert set(pagina['items'][0]) == {'nombre', 'imagen_url', 'imagen_src', 'srcset'}
+
+    pagina = cliente.get('/api/productos', query_string={'limite': 1, 'campos': 'nombre'}).get_json()
+    assert pagina['items'] == [{'nombre': 'Brownie'}]
+
+
+def test_etag_y_304_hasta_que_cambia_el_catalogo(cliente, productos):
+    primera = cliente.get('/api/productos')
+    etag = primera.headers['ETag']
+    assert primera.status_code == 200
+
+    repetida = cliente.get('/api/productos', headers={'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.data == b''
+
+    cliente.post('/api/productos', json={'nombre': 'Pay de limón', 'precio': 15})
+    nueva = cliente.get('/api/productos', headers={'If-None-Match': etag})
+    assert nueva.status_code == 200
+    assert nueva.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('ruta, cache_control', [
+    ('/api/productos', 'public, no-cache'),
+    ('/api/productos/categoria/postres', 'public, no-cache'),
+    ('/api/productos/1', 'public, max-age=60'),
+    ('/api/productos/buscar/brownie', 'public, max-age=30'),
+])
+def test_cache_control_por_endpoint(cliente, productos, ruta, cache_control):
+    respuesta = cliente.get(ruta)
+    assert respuesta.status_code == 200
+    assert respuesta.headers['Cache-Control'] == cache_control
+
+
+def test_respuesta_comprimida_tiene_su_propio_etag(cliente, productos):
+    # Por encima de COMPRESION_MINIMO (1024 bytes)
+    db.session.add_all([Producto(id_producto=i, nombre=f'Galletas {i}', precio=5, descripcion='x' * 100)
+                        for i in range(10, 30)])
+    db.session.commit()
+
+    sin_comprimir = cliente.get('/api/productos')
+    comprimida = cliente.get('/api/productos', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in sin_comprimir.headers
+    assert comprimida.headers['Content-Encoding'] == 'gzip'
+    assert comprimida.headers['ETag'] == sin_comprimir.headers['ETag'][:-1] + '-gzip"'
+    assert gzip.decompress(comprimida.data) == sin_comprimir.data
+
+    repetida = cliente.get('/api/productos', headers={'Accept-Encoding': 'gzip',
+                                                      'If-None-Match': comprimida.headers['ETag']})
+    assert repetida.status_code == 304
+
+
+def paginas(cliente, **parametros):
+    """Recorre todas las páginas siguiendo el cursor; devuelve los ids de cada una."""
+    ids, despues = [], None
+    while True:
+        consulta = {**parametros, **({'despues': despues} if despues else {})}
+        pagina = cliente.get('/api/productos', query_string=consulta).get_json()
+        ids.append([p['id_producto'] for p in pagina['items']])
+        despues = pagina['siguiente']
+        if despues is None:
+            return ids
+
+
+@pytest.mark.parametrize('orden, esperado', [
+    ('id', [[1, 2], [3, 4]]),
+    ('-id', [[4, 3], [2, 1]]),
+    ('precio', [[2, 3], [4, 1]]),   # 3 y 4 empatan en precio: desempata el id
+    ('-precio', [[1, 3], [4, 2]]),
+    ('nombre', [[3, 4], [1, 2]]),
+])
+def test_cursor_recorre_el_catalogo_en_orden(cliente, productos, orden, esperado):
+    db.session.add(Producto(id_producto=4, nombre='Alfajor de nuez', precio=20))
+    db.session.commit()
+    assert paginas(cliente, limite=2, orden=orden) == esperado
+
+
+def test_campos_limita_las_columnas(cliente, productos):
+    pagina = cliente.get('/api/productos', query_string={'limite': 2, 'campos': 'id_producto,precio'}).get_json()
+    assert pagina['items'] == [{'id_producto': 1, 'precio': 30}, {'id_producto': 2, 'precio': 10}]
+
+
+@pytest.mark.parametrize('parametros', [
+    {'despues': 'no-es-un-cursor'},
+    {'orden': 'sabor'},
+    {'campos': 'nombre,contrasena'},
+])
+def test_parametros_invalidos_de_paginacion(cliente, productos, parametros):
+    respuesta = cliente.get('/api/productos', query_string={'limite': 2, **parametros})
+    assert respuesta.status_code == 400
@@ -0,0 +1,79 @@
+import os
+import re
+
+import pytest
+from click.testing import CliRunner
+from flask.cli import FlaskGroup
+from sqlalchemy import UniqueConstraint, inspect
+
+from aplicacion import create_app
+from config import ConfigPruebas
+from models import db
+from services.esquema import DIRECTORIO_MIGRACIONES, crear_esquema, migraciones_disponibles, migraciones_pendientes
+
+# Tablas que ya existían antes de la primera migración
+TABLAS_INICIALES = {'productos', 'carrito_items', 'preferencias_pago', 'pedidos', 'users', 'esquema_migraciones'}
+
+
+def test_cada_tabla_de_los_modelos_tiene_su_migracion():
+    creadas = set()
+    for nombre in migraciones_disponibles():
+        with open(os.path.join(DIRECTORIO_MIGRACIONES, nombre), encoding='utf-8') as f:
+            creadas.update(re.findall(r'CREATE TABLE (?:IF NOT EXISTS )?(\w+)', f.read()))
+
+    assert set(db.metadata.tables) - TABLAS_INICIALES <= creadas
+
+
+def test_crear_esquema_marca_las_migraciones_aplicadas(app):
+    db.drop_all()
+    marcadas = crear_esquema()
+
+    assert marcadas == migraciones_disponibles()
+    assert migraciones_pendientes() == []
+    assert set(db.metadata.tables) <= set(inspect(db.engine).get_table_names())
+    # El índice FULLTEXT de 001 solo se declara para MySQL
+    indices = {i['name'] for i in inspect(db.engine).get_indexes('productos')}
+    assert 'ft_productos_nombre_descripcion' not in indices
+
+
+@pytest.fixture
+def inicios(monkeypatch):
+    """Registra en lugar de iniciar los hilos de fondo."""
+    from routes.pagos import procesador_webhooks
+    llamadas = []
+    monkeypatch.setattr(procesador_webhooks, 'iniciar', lambda app: llamadas.append('webhooks'))
+    return llamadas
+
+
+def config_con_hilos():
+    config = ConfigPruebas()
+    config.INICIAR_HILOS = True
+    return config
+
+
+def test_comandos_flask_no_inician_hilos_de_fondo(inicios):
+    grupo = FlaskGroup(create_app=lambda: create_app(config_con_hilos()))
+    resultado = CliRunner().invoke(grupo, ['db', 'estado'])
+
+    assert resultado.exit_code == 0, resultado.output
+    assert inicios == []
+
+
+def test_servidor_inicia_hilos_de_fondo(inicios):
+    create_app(config_con_hilos())
+    assert inicios == ['webhooks']
+
+
+def test_restricciones_unicas_con_los_nombres_de_las_migraciones():
+    nombradas = set()
+    for nombre in migraciones_disponibles():
+        with open(os.path.join(DIRECTORIO_MIGRACIONES, nombre), encoding='utf-8') as f:
+            nombradas.update(re.findall(r'CONSTRAINT (uq_\w+) UNIQUE', f.read()))
+
+    # users.email es anterior a las migraciones (restricción sin nombre)
+    modelos = {
+        restriccion.name
+        for tabla in db.metadata.tables.values() if tabla.name != 'users'
+        for restriccion in tabla.constraints if isinstance(restriccion, UniqueConstraint)
+    }
+    assert modelos == nombradas
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from conftest import autorizacion
+from models import Producto
+from services.importacion import validar_fila
+
+
+def test_validar_fila_normaliza_los_valores():
+    assert validar_fila({'nombre': ' Torta ', 'precio': '12.5', 'categoria': ' Pasteles ', 'descripcion': ''}) == {
+        'nombre': 'Torta', 'precio': 12.5, 'categoria': 'pasteles', 'descripcion': None,
+    }
+
+
+@pytest.mark.parametrize('fila, error', [
+    ({'nombre': 123, 'precio': 1}, 'nombre debe ser texto'),
+    ({'nombre': ['Torta'], 'precio': 1}, 'nombre debe ser texto'),
+    ({'nombre': 'Torta', 'precio': 1, 'categoria': {'a': 1}}, 'categoria debe ser texto'),
+    ({'nombre': 'Torta', 'precio': 1, 'imagen_url': 'x' * 201}, 'imagen_url de más de 200'),
+    ({'nombre': 'Torta', 'precio': 'nan'}, 'precio inválido'),
+    ({'nombre': 'Torta', 'precio': 'inf'}, 'precio inválido'),
+    ({'nombre': 'Torta', 'precio': True}, 'precio inválido'),
+    ({'nombre': 'Torta', 'precio': [1]}, 'precio inválido'),
+    ({'nombre': 'Torta', 'precio': -1}, 'precio negativo'),
+    ({'precio': 1}, 'falta nombre'),
+])
+def test_validar_fila_rechaza_valores_invalidos(fila, error):
+    with pytest.raises(ValueError, match=error):
+        validar_fila(fila)
+
+
+def test_filas_invalidas_se_reportan_sin_cancelar_la_importacion(cliente):
+    filas = [{'nombre': 'Torta', 'precio': 10}, {'nombre': 123, 'precio': 5}, {'nombre': 'Pie', 'precio': 'NaN'}]
+    respuesta = cliente.post(
+        '/api/productos/importar',
+        data='\n'.join(json.dumps(fila) for fila in filas),
+        content_type='application/x-ndjson',
+        headers=autorizacion(1, 'admin'),
+    )
+
+    assert respuesta.status_code == 200
+    assert respuesta.get_json() == {
+        'insertados': 1, 'actualizados': 0,
+        'errores': [{'fila': 2, 'error': 'nombre debe ser texto'}, {'fila': 3, 'error': 'precio inválido'}],
+    }
+    assert [p.nombre for p in Producto.query.all()] == ['Torta']
+
+
+def test_archivo_que_no_es_utf8_responde_400(cliente):
+    respuesta = cliente.post(
+        '/api/productos/importar',
+        data='nombre,precio\nPastel de limón,10\n'.encode('latin-1'),
+        content_type='text/csv',
+        headers=autorizacion(1, 'admin'),
+    )
+    assert respuesta.status_code == 400
+    assert 'UTF-8' in respuesta.get_json()['error']
+    assert Producto.query.count() == 0
+
+
+@pytest.mark.parametrize('nombre, contenido, error', [
+    ('productos.txt', 'nombre,precio\nTorta,10\n'.encode('utf-8'), 'Formato no soportado'),
+    ('productos.csv', 'nombre,precio\nPastel de limón,10\n'.encode('latin-1'), 'UTF-8'),
+])
+def test_cli_reporta_errores_de_archivo_sin_traceback(app, tmp_path, nombre, contenido, error):
+    archivo = tmp_path / nombre
+    archivo.write_bytes(contenido)
+
+    resultado = app.test_cli_runner().invoke(args=['productos', 'import', str(archivo)])
+    assert resultado.exit_code == 1
+    assert resultado.exception is None or isinstance(resultado.exception, SystemExit)
+    assert error in resultado.output
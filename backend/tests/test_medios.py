@@ -0,0 +1,35 @@
+import os
+
+import services.medios as modulo
+from services.medios import IndiceMedios
+
+
+def test_hashes_en_cache_por_tamano_y_mtime(tmp_path, monkeypatch):
+    imagenes = tmp_path / 'images'
+    imagenes.mkdir()
+    for nombre in ('a.jpg', 'b.jpg'):
+        (imagenes / nombre).write_bytes(os.urandom(512))
+    archivo_hashes = str(tmp_path / 'instance' / 'medios_hashes.json')
+
+    leidos = []
+    hash_archivo = modulo._hash_archivo
+    monkeypatch.setattr(modulo, '_hash_archivo', lambda ruta: leidos.append(ruta) or hash_archivo(ruta))
+
+    primero = IndiceMedios()
+    primero.montar('static', str(imagenes))
+    primero.construir(archivo_hashes)
+    assert len(leidos) == 2
+
+    # Otro worker que arranca con los mismos archivos no lee ninguno
+    leidos.clear()
+    segundo = IndiceMedios()
+    segundo.montar('static', str(imagenes))
+    segundo.construir(archivo_hashes)
+    assert leidos == []
+    assert segundo.url('static/a.jpg') == primero.url('static/a.jpg')
+
+    # Solo se vuelve a hashear el archivo modificado
+    (imagenes / 'b.jpg').write_bytes(os.urandom(600))
+    segundo.construir()
+    assert leidos == [str(imagenes / 'b.jpg')]
+    assert segundo.url('static/b.jpg') != primero.url('static/b.jpg')
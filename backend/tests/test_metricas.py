@@ -0,0 +1,46 @@
+import pytest
+
+from aplicacion import create_app
+from config import ConfigProduccion
+
+
+def app_produccion(monkeypatch, token):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')
+    monkeypatch.setenv('SECRET_KEY', 'clave-de-produccion')
+    if token:
+        monkeypatch.setenv('METRICAS_TOKEN', token)
+    else:
+        monkeypatch.delenv('METRICAS_TOKEN', raising=False)
+    config = ConfigProduccion()
+    config.INICIAR_HILOS = False
+    return create_app(config)
+
+
+def test_produccion_sin_token_no_expone_metricas(monkeypatch):
+    assert app_produccion(monkeypatch, None).test_client().get('/metrics').status_code == 404
+
+
+@pytest.mark.parametrize('autorizacion, codigo', [
+    (None, 401), ('Bearer otro', 401), ('Bearer secreto', 200),
+])
+def test_produccion_exige_el_token(monkeypatch, autorizacion, codigo):
+    cliente = app_produccion(monkeypatch, 'secreto').test_client()
+    headers = {'Authorization': autorizacion} if autorizacion else {}
+    assert cliente.get('/metrics', headers=headers).status_code == codigo
+
+
+def test_pruebas_sin_token(cliente):
+    respuesta = cliente.get('/metrics')
+    assert respuesta.status_code == 200
+    assert b'db_sesiones_compartidas_total' in respuesta.data
+
+
+def test_valores_acumulados_se_exponen_como_counter(cliente):
+    tipos = dict(linea.split()[2:4] for linea in cliente.get('/metrics').get_data(as_text=True).splitlines()
+                 if linea.startswith('# TYPE'))
+
+    for nombre in ('db_pool_checkouts_total', 'db_pool_timeouts_total', 'db_pool_espera_segundos_total',
+                   'cache_aciertos_total', 'cache_errores_total', 'db_sesiones_compartidas_total'):
+        assert tipos[nombre] == 'counter'
+    assert tipos['db_pool_espera_max_segundos'] == 'gauge'
+    assert 'db_pool_checkouts' not in tipos
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import autorizacion
+from models import db, CarritoItem, PreferenciaPago, Producto
+from routes.pagos import pasarela
+
+
+@pytest.fixture
+def carrito(app):
+    db.session.add(Producto(id_producto=1, nombre='Torta', precio=10))
+    db.session.add(CarritoItem(usuario_id=7, producto_id=1, cantidad=2))
+    db.session.commit()
+
+
+@pytest.fixture
+def mercadopago(monkeypatch):
+    """Sustituye la llamada a Mercado Pago; `creadas` cuenta las preferencias pedidas."""
+    creadas = []
+
+    def crear(datos):
+        creadas.append(datos)
+        numero = len(creadas)
+        return {'status': 201, 'response': {'id': f'pref-{numero}', 'init_point': f'https://mp/{numero}'}}
+
+    monkeypatch.setattr(pasarela, 'crear_preferencia', crear)
+    return creadas
+
+
+def test_reutiliza_la_preferencia_del_mismo_carrito(cliente, carrito, mercadopago):
+    primera = cliente.post('/api/crear-preferencia', headers=autorizacion(7)).get_json()
+    segunda = cliente.post('/api/crear-preferencia', headers=autorizacion(7)).get_json()
+    assert primera == segunda == {'id': 'pref-1', 'init_point': 'https://mp/1'}
+    assert len(mercadopago) == 1
+
+
+def test_preferencia_vencida_se_reemplaza(cliente, carrito, mercadopago):
+    cliente.post('/api/crear-preferencia', headers=autorizacion(7))
+    PreferenciaPago.query.update({'expira_en': datetime.utcnow() - timedelta(minutes=1)})
+    db.session.commit()
+
+    respuesta = cliente.post('/api/crear-preferencia', headers=autorizacion(7)).get_json()
+    assert respuesta['id'] == 'pref-2'
+    assert [p.mp_preference_id for p in PreferenciaPago.query.all()] == ['pref-2']
+
+
+def test_checkouts_simultaneos_guardan_una_preferencia(app, cliente, carrito, mercadopago, monkeypatch):
+    crear = pasarela.crear_preferencia
+
+    def crear_con_carrera(datos):
+        # Otro checkout del mismo carrito guarda su preferencia mientras esta
+        # petición espera a Mercado Pago
+        respuesta = crear(datos)
+        with app.app_context():
+            db.session.add(PreferenciaPago(
+                usuario_id=7, mp_preference_id='pref-otra', init_point='https://mp/otra',
+                huella_carrito=_huella_de(datos), expira_en=datetime.utcnow() + timedelta(minutes=30),
+            ))
+            db.session.commit()
+        return respuesta
+
+    monkeypatch.setattr(pasarela, 'crear_preferencia', crear_con_carrera)
+    respuesta = cliente.post('/api/crear-preferencia', headers=autorizacion(7)).get_json()
+
+    assert respuesta == {'id': 'pref-otra', 'init_point': 'https://mp/otra'}
+    assert PreferenciaPago.query.count() == 1
+
+
+def _huella_de(datos):
+    from services.precios import cotizar_carrito, huella_carrito
+    return huella_carrito(cotizar_carrito(7), datos['back_urls']['success'])
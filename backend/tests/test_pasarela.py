@@ -0,0 +1,38 @@
+import pytest
+import requests
+
+from services.pasarela import ClienteHttpPooled, PasarelaPagos
+
+
+class SesionFalsa:
+    def __init__(self):
+        self.llamadas = []
+
+    def request(self, method, url, **kwargs):
+        self.llamadas.append((method, url, kwargs))
+        respuesta = requests.Response()
+        respuesta.status_code = 200
+        respuesta._content = b'{"id": "123", "status": "approved"}'
+        return respuesta
+
+
+@pytest.fixture
+def cliente_http():
+    cliente = ClienteHttpPooled(timeout=(1, 2))
+    cliente.session = SesionFalsa()
+    return cliente
+
+
+def test_usa_el_timeout_configurado_aunque_el_llamador_pase_otro(cliente_http):
+    cliente_http.request('GET', 'https://api.mercadopago.com/v1/payments/1', timeout=60.0)
+    assert cliente_http.session.llamadas[0][2]['timeout'] == (1, 2)
+
+
+def test_el_sdk_recibe_el_timeout_configurado(cliente_http):
+    pytest.importorskip('mercadopago')
+    pasarela = PasarelaPagos('TEST-token', http_client=cliente_http)
+
+    assert pasarela.obtener_pago('123')['response']['status'] == 'approved'
+    method, url, kwargs = cliente_http.session.llamadas[0]
+    assert (method, url) == ('GET', 'https://api.mercadopago.com/v1/payments/123')
+    assert kwargs['timeout'] == (1, 2)
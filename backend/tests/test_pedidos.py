@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from conftest import autorizacion
+from models import db, ClaveIdempotencia, Pedido
+from routes.pedidos import buffer_pedidos
+
+PEDIDO = {'nombre': 'Ana', 'email': 'ana@ejemplo.com', 'producto': 'Pastel', 'cantidad': 2}
+
+
+def test_idempotency_key_repite_la_respuesta(cliente):
+    primera = cliente.post('/api/pedidos', json=PEDIDO, headers={'Idempotency-Key': 'k1'})
+    segunda = cliente.post('/api/pedidos', json=PEDIDO, headers={'Idempotency-Key': 'k1'})
+    assert (primera.status_code, segunda.status_code) == (201, 201)
+    assert segunda.headers['Idempotent-Replayed'] == 'true'
+    assert segunda.get_json() == primera.get_json()
+    assert Pedido.query.count() == 1
+
+    otra = cliente.post('/api/pedidos', json={**PEDIDO, 'cantidad': 3}, headers={'Idempotency-Key': 'k1'})
+    assert otra.status_code == 422
+
+
+def vencer_claves():
+    ClaveIdempotencia.query.update({'creado_en': datetime.utcnow() - timedelta(days=2)})
+    db.session.commit()
+
+
+def test_clave_vencida_sin_purgar_se_reutiliza(cliente):
+    cliente.post('/api/pedidos', json=PEDIDO, headers={'Idempotency-Key': 'k2'})
+    vencer_claves()
+
+    respuesta = cliente.post('/api/pedidos', json={**PEDIDO, 'cantidad': 5}, headers={'Idempotency-Key': 'k2'})
+    assert respuesta.status_code == 201
+    assert 'Idempotent-Replayed' not in respuesta.headers
+    assert Pedido.query.count() == 2
+    assert ClaveIdempotencia.query.one().creado_en > datetime.utcnow() - timedelta(minutes=1)
+
+
+def test_buffer_reutiliza_una_clave_vencida(app, cliente, monkeypatch):
+    cliente.post('/api/pedidos', json=PEDIDO, headers={'Idempotency-Key': 'k3'})
+    vencer_claves()
+
+    monkeypatch.setattr(buffer_pedidos, '_app', app)
+    buffer_pedidos.escribir([({**PEDIDO, 'creado_en': datetime.utcnow()}, 'k3', 'h', {'estado': 'en_cola'})])
+    assert Pedido.query.count() == 2
+    assert ClaveIdempotencia.query.one().codigo == 202
+
+
+def test_carrera_con_la_misma_clave_y_otro_cuerpo_responde_422(cliente, monkeypatch):
+    import routes.pedidos as rutas
+
+    cliente.post('/api/pedidos', json={**PEDIDO, 'cantidad': 3}, headers={'Idempotency-Key': 'k4'})
+
+    # El segundo intento no ve la clave al consultarla (el primero todavía no la
+    # había guardado) y choca con ella en el commit
+    respuesta_guardada = rutas.respuesta_guardada
+    consultas = []
+
+    def consulta_antes_del_commit(clave, huella):
+        consultas.append(clave)
+        return None if len(consultas) == 1 else respuesta_guardada(clave, huella)
+
+    monkeypatch.setattr(rutas, 'respuesta_guardada', consulta_antes_del_commit)
+    respuesta = cliente.post('/api/pedidos', json=PEDIDO, headers={'Idempotency-Key': 'k4'})
+    assert respuesta.status_code == 422
+    assert consultas == ['k4', 'k4']
+    assert Pedido.query.count() == 1
+
+
+def test_resumen_suma_los_pedidos_creados(cliente):
+    for producto, cantidad, fecha in [('Pastel', 2, '2026-05-10'), ('Pastel', 3, '2026-05-10'),
+                                      ('Pay', 1, '2026-05-10'), ('Pastel', 4, '2026-05-11'),
+                                      ('Pastel', 9, '2026-05-20')]:
+        respuesta = cliente.post('/api/pedidos', json={**PEDIDO, 'producto': producto, 'cantidad': cantidad,
+                                                       'fecha_entrega': fecha})
+        assert respuesta.status_code == 201
+
+    respuesta = cliente.get('/api/pedidos/resumen', query_string={'desde': '2026-05-10', 'hasta': '2026-05-11'},
+                            headers=autorizacion(1, 'admin'))
+    assert respuesta.get_json() == {'desde': '2026-05-10', 'hasta': '2026-05-11', 'dias': [
+        {'fecha_entrega': '2026-05-10', 'pedidos': 3, 'cantidad': 6, 'productos': [
+            {'producto': 'Pastel', 'pedidos': 2, 'cantidad': 5},
+            {'producto': 'Pay', 'pedidos': 1, 'cantidad': 1},
+        ]},
+        {'fecha_entrega': '2026-05-11', 'pedidos': 1, 'cantidad': 4, 'productos': [
+            {'producto': 'Pastel', 'pedidos': 1, 'cantidad': 4},
+        ]},
+    ]}
+
+
+def test_resumen_solo_para_admin_y_con_rango_valido(cliente):
+    assert cliente.get('/api/pedidos/resumen', headers=autorizacion(1)).status_code == 403
+    respuesta = cliente.get('/api/pedidos/resumen', query_string={'desde': '2026-05-10', 'hasta': '2026-05-01'},
+                            headers=autorizacion(1, 'admin'))
+    assert respuesta.status_code == 400
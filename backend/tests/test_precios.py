@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import autorizacion
+from models import db, CarritoItem, Producto
+from services.cache import BackendMemoria, Cache
+
+
+class VersionesCompartidas(BackendMemoria):
+    """Contadores de versión comunes a varios workers, como los de Redis con CACHE_URL."""
+    compartido = True
+
+
+@pytest.fixture
+def carrito(app):
+    db.session.add(Producto(id_producto=1, nombre='Torta', precio=10))
+    db.session.add(CarritoItem(usuario_id=7, producto_id=1, cantidad=2))
+    db.session.commit()
+
+
+def worker(monkeypatch, cache):
+    """Atiende las peticiones siguientes con el cache de `cache` (un worker de gunicorn)."""
+    monkeypatch.setattr('services.precios.cache', cache)
+    return cache
+
+
+def cantidad(cliente):
+    return cliente.get('/api/carrito/resumen', headers=autorizacion(7)).get_json()['cantidad_articulos']
+
+
+def modificar(cliente):
+    cambio = {'op': 'set', 'producto_id': 1, 'cantidad': 5}
+    respuesta = cliente.patch('/api/carrito', json={'cambios': [cambio]}, headers=autorizacion(7))
+    assert respuesta.status_code == 200
+
+
+def test_sin_versiones_compartidas_el_carrito_no_se_guarda(cliente, carrito, monkeypatch):
+    uno, otro = Cache(BackendMemoria()), Cache(BackendMemoria())
+
+    worker(monkeypatch, uno)
+    assert cantidad(cliente) == 2
+    worker(monkeypatch, otro)
+    modificar(cliente)
+
+    # La invalidación de `otro` no llega a `uno`: si guardara el carrito lo serviría viejo
+    worker(monkeypatch, uno)
+    assert cantidad(cliente) == 5
+    assert uno.aciertos == 0
+
+
+def test_con_versiones_compartidas_la_escritura_invalida_en_todos_los_workers(cliente, carrito, monkeypatch):
+    versiones = VersionesCompartidas()
+    uno = Cache(BackendMemoria(), versiones=versiones)
+    otro = Cache(BackendMemoria(), versiones=versiones)
+
+    worker(monkeypatch, uno)
+    assert cantidad(cliente) == 2
+    assert cantidad(cliente) == 2
+    assert uno.aciertos == 1
+
+    worker(monkeypatch, otro)
+    modificar(cliente)
+
+    worker(monkeypatch, uno)
+    assert cantidad(cliente) == 5
@@ -0,0 +1,34 @@
+import pytest
+from itsdangerous import URLSafeTimedSerializer
+
+from aplicacion import create_app
+from config import ConfigProduccion
+from services.tokens import SECRET_KEY_DESARROLLO, servicio_tokens
+
+
+def configuracion_produccion(monkeypatch, secreto):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')
+    if secreto is None:
+        monkeypatch.delenv('SECRET_KEY', raising=False)
+    else:
+        monkeypatch.setenv('SECRET_KEY', secreto)
+    config = ConfigProduccion()
+    config.INICIAR_HILOS = False
+    return config
+
+
+@pytest.mark.parametrize('secreto', [None, '', SECRET_KEY_DESARROLLO, 'cambia-esta-clave'])
+def test_produccion_no_arranca_sin_secret_key(monkeypatch, secreto):
+    with pytest.raises(RuntimeError, match='SECRET_KEY'):
+        create_app(configuracion_produccion(monkeypatch, secreto))
+
+
+def test_token_firmado_con_la_clave_de_desarrollo_no_vale_en_produccion(monkeypatch):
+    app = create_app(configuracion_produccion(monkeypatch, 'clave-de-produccion'))
+    falso = URLSafeTimedSerializer(SECRET_KEY_DESARROLLO, salt='acceso').dumps({'u': 1, 'r': 'admin'})
+
+    respuesta = app.test_client().get('/api/productos/exportar', headers={'Authorization': f'Bearer {falso}'})
+    assert respuesta.status_code == 401
+
+    valido = servicio_tokens.emitir(1, 'admin')['access_token']
+    assert servicio_tokens.verificar_acceso(valido) == (1, 'admin')
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, CarritoItem, Producto, WebhookPago
+from services.precios import cotizacion_carrito
+from services.webhooks import ProcesadorWebhooks, encolar_pago
+
+
+class MercadoPagoFalso:
+    """Cliente con la interfaz del SDK: `cliente().payment().get(id)`.
+
+    `respuestas` es {payment_id: respuesta o excepción}; los pagos sin
+    respuesta devuelven status 500.
+    """
+
+    def __init__(self, respuestas=None):
+        self.respuestas = respuestas or {}
+        self.consultas = []
+
+    def __call__(self):
+        return self
+
+    def payment(self):
+        return self
+
+    def get(self, payment_id):
+        self.consultas.append(payment_id)
+        respuesta = self.respuestas.get(payment_id, {'status': 500, 'response': {}})
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+
+def pago(estado, usuario_id=None):
+    respuesta = {'status': estado}
+    if usuario_id is not None:
+        respuesta['external_reference'] = str(usuario_id)
+    return {'status': 200, 'response': respuesta}
+
+
+def procesador(cliente, **opciones):
+    return ProcesadorWebhooks(cliente, hilos=0, backoff_base=5, **opciones)
+
+
+def trabajo(payment_id):
+    db.session.expire_all()
+    return WebhookPago.query.filter_by(payment_id=payment_id).one()
+
+
+def test_encolar_pago_descarta_duplicados(app):
+    assert encolar_pago('100') is True
+    assert encolar_pago(100) is False  # ya está pendiente
+    assert WebhookPago.query.count() == 1
+
+    # Ya procesado con un estado final: no se vuelve a consultar
+    procesador(MercadoPagoFalso({'100': pago('approved')})).procesar_pendientes()
+    assert encolar_pago('100') is False
+
+    # Estado intermedio: se vuelve a encolar
+    assert encolar_pago('200') is True
+    procesador(MercadoPagoFalso({'200': pago('pending')})).procesar_pendientes()
+    assert trabajo('200').estado == 'completado'
+    assert encolar_pago('200') is True
+    assert trabajo('200').estado == 'pendiente'
+    assert trabajo('200').intentos == 0
+
+
+def test_reintento_con_backoff_exponencial(app):
+    encolar_pago('300')
+    cliente = MercadoPagoFalso()
+    webhooks = procesador(cliente)
+
+    antes = datetime.utcnow()
+    assert webhooks.procesar_pendientes() == 1
+    fila = trabajo('300')
+    assert (fila.estado, fila.intentos) == ('pendiente', 1)
+    assert 'Mercado Pago respondió 500' in fila.ultimo_error
+    assert fila.proximo_intento >= antes + timedelta(seconds=5)
+
+    # Hasta que vence el backoff no se vuelve a consultar
+    assert webhooks.procesar_pendientes() == 0
+    assert cliente.consultas == ['300']
+
+    fila.proximo_intento = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    antes = datetime.utcnow()
+    assert webhooks.procesar_pendientes() == 1
+    fila = trabajo('300')
+    assert fila.intentos == 2
+    assert fila.proximo_intento >= antes + timedelta(seconds=10)
+
+
+def test_reclamar_trabajo_en_proceso(app):
+    encolar_pago('400')
+    webhooks = procesador(MercadoPagoFalso(), bloqueo=300)
+    fila = trabajo('400')
+
+    assert webhooks._reclamar(fila.id) is not None
+    # Otro worker no puede reclamar el mismo trabajo mientras está en proceso
+    assert webhooks._reclamar(fila.id) is None
+    assert webhooks.procesar_pendientes() == 0
+
+    # Un trabajo 'procesando' abandonado (worker caído) se vuelve a reclamar tras `bloqueo`
+    db.session.execute(
+        db.update(WebhookPago).where(WebhookPago.id == fila.id)
+        .values(actualizado_en=datetime.utcnow() - timedelta(seconds=301))
+    )
+    db.session.commit()
+    assert webhooks.procesar_pendientes() == 1
+    assert trabajo('400').intentos == 2
+
+
+def test_fallido_tras_max_intentos(app):
+    encolar_pago('500')
+    webhooks = procesador(MercadoPagoFalso({'500': RuntimeError('sin conexión')}), max_intentos=2)
+
+    for _ in range(2):
+        fila = trabajo('500')
+        fila.proximo_intento = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert webhooks.procesar_pendientes() == 1
+
+    fila = trabajo('500')
+    assert (fila.estado, fila.intentos, fila.ultimo_error) == ('fallido', 2, 'sin conexión')
+    fila.proximo_intento = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert webhooks.procesar_pendientes() == 0
+
+
+@pytest.mark.parametrize('estado, vaciado', [('approved', True), ('rejected', False)])
+def test_pago_aprobado_limpia_el_carrito(app, cache_vacio, monkeypatch, estado, vaciado):
+    # Como con CACHE_URL: la cotización del carrito se guarda en el cache
+    monkeypatch.setattr(cache_vacio.backend, 'compartido', True)
+    db.session.add(Producto(id_producto=1, nombre='Torta', precio=10))
+    db.session.add_all([CarritoItem(usuario_id=7, producto_id=1, cantidad=2),
+                        CarritoItem(usuario_id=8, producto_id=1, cantidad=1)])
+    db.session.commit()
+    assert cotizacion_carrito(7)['cantidad_articulos'] == 2  # queda en el cache
+
+    encolar_pago('600')
+    procesador(MercadoPagoFalso({'600': pago(estado, usuario_id=7)})).procesar_pendientes()
+
+    fila = trabajo('600')
+    assert (fila.estado, fila.estado_pago) == ('completado', estado)
+    assert CarritoItem.query.filter_by(usuario_id=7).count() == (0 if vaciado else 1)
+    assert cotizacion_carrito(7)['cantidad_articulos'] == (0 if vaciado else 2)
+    assert CarritoItem.query.filter_by(usuario_id=8).count() == 1
@@ -45,6 +45,7 @@ export class Pedidos implements OnInit {
   customPrice = 25;
 
   enviando = false;
+  private envioPendiente: { clave: string; firma: string } | null = null;
   mensaje = '';
 
   // opciones
@@ -144,10 +145,16 @@ export class Pedidos implements OnInit {
     }
 
     this.enviando = true;
-    this.pedidosService.crearPedido(payload).subscribe({
+    // Si el envío falla y el usuario reintenta sin cambiar el pedido se reutiliza la misma clave
+    const firma = JSON.stringify(payload);
+    if (this.envioPendiente?.firma !== firma) {
+      this.envioPendiente = { clave: crypto.randomUUID(), firma };
+    }
+    this.pedidosService.crearPedido(payload, this.envioPendiente.clave).subscribe({
       next: (res) => {
         this.mensaje = 'Pedido agregado correctamente. ID: ' + (res.id || 'N/A');
         this.enviando = false;
+        this.envioPendiente = null;
         // reset básico
         this.nombre = '';
         this.email = '';
@@ -31,9 +31,17 @@ export class Productos implements OnInit {
   cargarProductos() {
     this.cargando = true;
     this.error = '';
-    this.productosService.getProductos().subscribe({
-      next: (data) => { this.productos = data; this.productosAll = [...data]; this.cargando = false; },
-      error: (e) => { this.error = 'Error al cargar los productos.'; this.cargando = false; console.error(e); }
+    this.productos = [];
+    this.productosAll = [];
+    // Se muestran los productos conforme llega cada página en lugar de esperar el catálogo completo
+    this.productosService.streamProductos({ limite: 24 }).subscribe({
+      next: (pagina) => {
+        this.productosAll = [...this.productosAll, ...pagina];
+        this.productos = [...this.productosAll];
+        this.cargando = false;
+      },
+      error: (e) => { this.error = 'Error al cargar los productos.'; this.cargando = false; console.error(e); },
+      complete: () => { this.cargando = false; }
     });
   }
 
@@ -41,12 +49,23 @@ export class Productos implements OnInit {
   getImageUrl(producto: Producto) {
     try {
       const base = this.productosService.apiUrl.replace(/\/api\/?$/, '');
+      if (producto.imagen_src) {
+        return /^https?:\/\//i.test(producto.imagen_src) ? producto.imagen_src : `${base}${producto.imagen_src}`;
+      }
   return producto.imagen_url ? `${base}/static/images/${producto.imagen_url}` : `${base}/static/images/placeholder.svg`;
     } catch (e) {
       return `/static/images/placeholder.png`;
     }
   }
 
+  // srcset de las variantes generadas por `flask imagenes generar`, con la URL del backend
+  getSrcset(producto: Producto, tipo: 'image/webp' | 'image/jpeg'): string | null {
+    const srcset = producto.srcset?.[tipo];
+    if (!srcset) { return null; }
+    const base = this.productosService.apiUrl.replace(/\/api\/?$/, '');
+    return srcset.split(', ').map(c => c.startsWith('/') ? base + c : c).join(', ');
+  }
+
   filtrarPorCategoria(categoria: string) {
     // Acepta 'all' como recargar todos los productos
     // Filtrado en cliente: evita llamar al endpoint /productos/categoria que puede no existir
@@ -57,9 +76,11 @@ export class Productos implements OnInit {
       return;
     }
 
-    // Normalizar término y filtrar por nombre/descripcion que contenga la palabra de categoría
+    // Normalizar término y filtrar por la categoría del producto o, si no coincide,
+    // por nombre/descripcion que contenga la palabra de categoría
     const term = categoria.toLowerCase();
     this.productos = (this.productosAll.length ? this.productosAll : this.productos).filter(p => {
+      if ((p.categoria || '').toLowerCase() === term) { return true; }
       const name = (p.nombre || '').toLowerCase();
       const desc = (p.descripcion || '').toLowerCase();
       return name.includes(term) || desc.includes(term);
@@ -0,0 +1,33 @@
+import { inject } from '@angular/core';
+import { HttpErrorResponse, HttpInterceptorFn, HttpRequest } from '@angular/common/http';
+import { catchError, switchMap, throwError } from 'rxjs';
+import { AuthService } from '../services/auth.service';
+
+// Agrega el token de acceso a las peticiones y, si expiró (401), lo renueva una vez y reintenta
+export const authInterceptor: HttpInterceptorFn = (req, next) => {
+  const authService = inject(AuthService);
+  const withToken = (request: HttpRequest<unknown>) => {
+    const token = authService.getAccessToken();
+    return token ? request.clone({ setHeaders: { Authorization: `Bearer ${token}` } }) : request;
+  };
+
+  // Las rutas de login/refresh no llevan token ni se reintentan
+  if (/\/users\/(login|refresh)$/.test(req.url)) {
+    return next(req);
+  }
+
+  return next(withToken(req)).pipe(
+    catchError((error: HttpErrorResponse) => {
+      if (error.status !== 401 || !authService.getAccessToken()) {
+        return throwError(() => error);
+      }
+      return authService.refreshTokens().pipe(
+        switchMap(() => next(withToken(req))),
+        catchError(refreshError => {
+          authService.logout();
+          return throwError(() => refreshError);
+        })
+      );
+    })
+  );
+};
@@ -14,7 +14,15 @@ interface LoginResponse {
 interface ApiLoginResponse {
   user?: LoginResponse;
   message?: string;
-  token?: string;
+  access_token?: string;
+  refresh_token?: string;
+}
+
+export interface TokenResponse {
+  access_token: string;
+  refresh_token: string;
+  token_type: string;
+  expires_in: number;
 }
 
 interface RegisterResponse {
@@ -46,6 +54,11 @@ export class AuthService {
   login(email: string, password: string): Observable<LoginResponse> {
     return this.http.post<ApiLoginResponse>(`${this.apiUrl}/login`, { email, password })
       .pipe(
+        tap(response => {
+          if (response.access_token && response.refresh_token) {
+            this.storeTokens(response.access_token, response.refresh_token);
+          }
+        }),
         map(response => {
           if (response.user) {
             return response.user;
@@ -83,9 +96,30 @@ export class AuthService {
 
   logout() {
     localStorage.removeItem('currentUser');
+    localStorage.removeItem('accessToken');
+    localStorage.removeItem('refreshToken');
     this.currentUserSubject.next(null);
   }
 
+  // Token de acceso que el interceptor agrega como "Authorization: Bearer ..."
+  getAccessToken(): string | null {
+    return localStorage.getItem('accessToken');
+  }
+
+  // Pide un nuevo par de tokens con el token de refresco
+  refreshTokens(): Observable<TokenResponse> {
+    const refreshToken = localStorage.getItem('refreshToken');
+    return this.http.post<TokenResponse>(`${this.apiUrl}/refresh`, { refresh_token: refreshToken })
+      .pipe(
+        tap(tokens => this.storeTokens(tokens.access_token, tokens.refresh_token))
+      );
+  }
+
+  private storeTokens(accessToken: string, refreshToken: string): void {
+    localStorage.setItem('accessToken', accessToken);
+    localStorage.setItem('refreshToken', refreshToken);
+  }
+
   isLoggedIn(): boolean {
     return this.currentUserSubject.value !== null;
   }
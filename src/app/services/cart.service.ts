@@ -1,10 +1,16 @@
 import { Injectable } from '@angular/core';
-import { BehaviorSubject, Observable, Subscription, forkJoin, of } from 'rxjs';
-import { catchError } from 'rxjs/operators';
+import { BehaviorSubject, Subscription } from 'rxjs';
 import { AuthService } from './auth.service';
 import { HttpClient } from '@angular/common/http';
 import { ProductosService, Producto } from './productos.service';
 
+// Cambio individual que se envía a PATCH /api/carrito
+export interface CartChange {
+  op: 'add' | 'set' | 'remove';
+  producto_id: number;
+  cantidad?: number;
+}
+
 export interface CartItem {
   id: number;
   name: string;
@@ -67,13 +73,13 @@ export class CartService {
 
   
 
-  private saveCart(): void {
+  private saveCart(cambio: CartChange): void {
     // Solo persistir si hay un usuario autenticado
     if (this.currentUser && this.currentUser.id != null && this.currentUser.id !== 0) {
-      // Guardar en el backend
-      this.http.post(`${this.apiUrl}/carrito`, {
-        usuario_id: this.currentUser.id,
-        items: this.items
+      // Enviar solo el cambio del producto, no el carrito completo.
+      // El usuario lo toma el backend del token (auth.interceptor)
+      this.http.patch(`${this.apiUrl}/carrito`, {
+        cambios: [cambio]
       }).subscribe({
         error: (error) => console.error('Error al guardar el carrito:', error)
       });
@@ -97,12 +103,12 @@ export class CartService {
       this.items.push({ ...product, quantity: 1 });
     }
     
-    this.saveCart();
+    this.saveCart({ op: 'add', producto_id: product.id, cantidad: 1 });
   }
 
   removeFromCart(productId: number): void {
     this.items = this.items.filter(item => item.id !== productId);
-    this.saveCart();
+    this.saveCart({ op: 'remove', producto_id: productId });
   }
 
   updateQuantity(productId: number, quantity: number): void {
@@ -112,7 +118,7 @@ export class CartService {
       if (item.quantity === 0) {
         this.removeFromCart(productId);
       } else {
-        this.saveCart();
+        this.saveCart({ op: 'set', producto_id: productId, cantidad: item.quantity });
       }
     }
   }
@@ -145,66 +151,41 @@ export class CartService {
   private loadCart(): void {
     this.items = [];
     if (this.currentUser && this.currentUser.id != null && this.currentUser.id !== 0) {
-      // Cargar desde el backend
+      // Cargar desde el backend con los datos de cada producto en la misma respuesta
       this.http.get(`${this.apiUrl}/carrito`, {
-        params: { usuario_id: this.currentUser.id.toString() }
+        params: { expand: 'productos' }
       }).subscribe({
         next: (response: any) => {
-          if (response.items && response.items.length) {
-            // Para cada item pedimos detalles del producto y los combinamos
-            const calls = response.items.map((item: any) =>
-              this.productosService.getProducto(item.producto_id).pipe(
-                catchError(err => {
-                  console.error('Error al obtener producto', item.producto_id, err);
-                  return of(null);
-                })
-              )
-            );
-
-            // Ejecutar todas las llamadas en paralelo (cast para ajustar tipos de TS)
-            (forkJoin(calls) as Observable<Array<Producto | null>>).subscribe((products) => {
-              const baseUrl = this.productosService.apiUrl.replace(/\/api\/?$/,'');
-              this.items = response.items.map((item: any, idx: number) => {
-                const prod = products[idx];
-                let imageUrl: string | undefined = undefined;
-                if (prod && prod.imagen_url) {
-                  const img = prod.imagen_url.trim();
-                  if (/^https?:\/\//i.test(img)) {
-                    // URL absoluta ya válida
-                    imageUrl = img;
-                  } else if (/^static\//i.test(img) || /^images\//i.test(img) || /\//.test(img)) {
-                    // Ruta relativa que ya incluye carpeta, p. ej. 'static/images/...' o 'images/...'
-                    imageUrl = `${baseUrl}/${img.replace(/^\//, '')}`;
-                  } else {
-                    // Solo nombre de archivo, asumir carpeta 'static/images'
-                    imageUrl = `${baseUrl}/static/images/${img}`;
-                  }
-                }
-
-                return {
-                  id: item.producto_id,
-                  quantity: item.cantidad,
-                  name: prod ? prod.nombre : ('Producto ' + item.producto_id),
-                  price: prod ? prod.precio : 0,
-                  image: imageUrl,
-                  description: prod ? prod.descripcion : undefined
-                } as any;
-              });
-              this.updateCart();
-            }, (err) => {
-              console.error('Error en forkJoin productos:', err);
-              this.items = response.items.map((item: any) => ({
-                id: item.producto_id,
-                quantity: item.cantidad,
-                name: 'Producto ' + item.producto_id,
-                price: 0
-              }));
-              this.updateCart();
-            });
-          } else {
-            this.items = [];
-            this.updateCart();
-          }
+          const baseUrl = this.productosService.apiUrl.replace(/\/api\/?$/,'');
+          this.items = (response.items || []).map((item: any) => {
+            const prod: Producto | undefined = item.producto;
+            let imageUrl: string | undefined = undefined;
+            if (prod && prod.imagen_src) {
+              imageUrl = /^https?:\/\//i.test(prod.imagen_src) ? prod.imagen_src : `${baseUrl}${prod.imagen_src}`;
+            } else if (prod && prod.imagen_url) {
+              const img = prod.imagen_url.trim();
+              if (/^https?:\/\//i.test(img)) {
+                // URL absoluta ya válida
+                imageUrl = img;
+              } else if (/^static\//i.test(img) || /^images\//i.test(img) || /\//.test(img)) {
+                // Ruta relativa que ya incluye carpeta, p. ej. 'static/images/...' o 'images/...'
+                imageUrl = `${baseUrl}/${img.replace(/^\//, '')}`;
+              } else {
+                // Solo nombre de archivo, asumir carpeta 'static/images'
+                imageUrl = `${baseUrl}/static/images/${img}`;
+              }
+            }
+
+            return {
+              id: item.producto_id,
+              quantity: item.cantidad,
+              name: prod ? prod.nombre : ('Producto ' + item.producto_id),
+              price: prod ? prod.precio : 0,
+              image: imageUrl,
+              description: prod ? prod.descripcion : undefined
+            } as CartItem;
+          });
+          this.updateCart();
         },
         error: (error) => {
           console.error('Error al cargar el carrito:', error);
@@ -33,8 +33,8 @@ export class PagosService {
     // 🔥 Llamada CORRECTA: /api/crear-preferencia
     return this.http.post<PreferenciaPago>(
       `${this.apiUrl}/crear-preferencia`,
-      { 
-        usuario_id: usuario.id,
+      {
+        // El usuario lo toma el backend del token (auth.interceptor)
         timestamp: Date.now()  // Evita cache del navegador
       }
     ).pipe(
@@ -1,5 +1,5 @@
 import { Injectable } from '@angular/core';
-import { HttpClient } from '@angular/common/http';
+import { HttpClient, HttpHeaders } from '@angular/common/http';
 import { Observable } from 'rxjs';
 
 export interface PedidoPayload {
@@ -12,8 +12,9 @@ export interface PedidoPayload {
 }
 
 export interface PedidoResponse extends PedidoPayload {
-  id: number;
+  id: number | null; // null mientras el pedido está en cola (respuesta 202)
   creado_en: string;
+  estado?: 'en_cola';
 }
 
 @Injectable({
@@ -24,7 +25,9 @@ export class PedidosService {
 
   constructor(private http: HttpClient) {}
 
-  crearPedido(pedido: PedidoPayload): Observable<PedidoResponse> {
-    return this.http.post<PedidoResponse>(`${this.apiUrl}/pedidos`, pedido);
+  // Reenviar con la misma idempotencyKey no duplica el pedido: el backend devuelve la respuesta original
+  crearPedido(pedido: PedidoPayload, idempotencyKey?: string): Observable<PedidoResponse> {
+    const headers = idempotencyKey ? new HttpHeaders({ 'Idempotency-Key': idempotencyKey }) : undefined;
+    return this.http.post<PedidoResponse>(`${this.apiUrl}/pedidos`, pedido, { headers });
   }
 }
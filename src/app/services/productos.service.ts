@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
-import { HttpClient } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { HttpClient, HttpParams } from '@angular/common/http';
+import { EMPTY, Observable } from 'rxjs';
+import { expand, map } from 'rxjs/operators';
 
 export interface Producto {
   id_producto: number;
@@ -8,6 +9,27 @@ export interface Producto {
   descripcion?: string;
   precio: number;
   imagen_url?: string;
+  imagen_src?: string | null; // URL con hash de contenido, cacheable de forma permanente
+  srcset?: { [tipo: string]: string } | null; // variantes por tipo MIME: 'url 320w, url 640w'
+  categoria?: string | null;
+}
+
+export interface CategoriaConteo {
+  categoria: string;
+  total: number;
+}
+
+// Página del listado con cursor de /api/productos
+export interface PaginaProductos {
+  items: Partial<Producto>[];
+  siguiente: string | null;
+}
+
+export interface OpcionesPagina {
+  limite?: number;
+  despues?: string | null;
+  campos?: (keyof Producto)[];
+  orden?: 'id' | '-id' | 'precio' | '-precio' | 'nombre' | '-nombre';
 }
 
 @Injectable({
@@ -24,6 +46,30 @@ export class ProductosService {
     return this.http.get<Producto[]>(`${this.apiUrl}/productos`);
   }
 
+  // Obtener una página del catálogo (paginación por cursor, columnas opcionales)
+  getProductosPagina(opciones: OpcionesPagina = {}): Observable<PaginaProductos> {
+    let params = new HttpParams().set('limite', String(opciones.limite ?? 24));
+    if (opciones.despues) { params = params.set('despues', opciones.despues); }
+    if (opciones.campos?.length) { params = params.set('campos', opciones.campos.join(',')); }
+    if (opciones.orden) { params = params.set('orden', opciones.orden); }
+    return this.http.get<PaginaProductos>(`${this.apiUrl}/productos`, { params });
+  }
+
+  // Recorre el catálogo página por página; emite los productos de cada página conforme llegan
+  streamProductos(opciones: OpcionesPagina = {}): Observable<Producto[]> {
+    return this.getProductosPagina(opciones).pipe(
+      expand(pagina => pagina.siguiente
+        ? this.getProductosPagina({ ...opciones, despues: pagina.siguiente })
+        : EMPTY),
+      map(pagina => pagina.items as Producto[])
+    );
+  }
+
+  // Categorías con el número de productos de cada una
+  getCategorias(): Observable<CategoriaConteo[]> {
+    return this.http.get<CategoriaConteo[]>(`${this.apiUrl}/categorias`);
+  }
+
   // Obtener productos por categoría
   getProductosPorCategoria(categoria: string): Observable<Producto[]> {
     return this.http.get<Producto[]>(`${this.apiUrl}/productos/categoria/${categoria}`);